@@ -2,7 +2,7 @@ import streamlit as st
 import logging
 from apps.paper_scanner_app.methods.process_run import process_selected_method
 from apps.paper_scanner_app.methods.retrieve_runs import retrieve_runs
-from packages.workflows import paper_scanner
+from packages.workflows import paper_scanner, paper_scanner_stream
 from datetime import datetime
 
 # This is the main app file for the streamlit Paper Scanner app.
@@ -12,6 +12,7 @@ VERSION_MAP = {
     version: {
         "description": f"{version}" + (" (Latest)" if version == "v0" else ""),
         "function": func,
+        "stream_function": paper_scanner_stream.get(version),
     }
     for version, func in paper_scanner.items()
     if version != "available_versions" and version != "latest"
@@ -86,7 +87,11 @@ with tab1:
         if user_name and uploaded_file:
             process_func = VERSION_MAP[selected_version]["function"]
             process_selected_method(
-                process_func, uploaded_file, selected_version, user_name
+                process_func,
+                uploaded_file,
+                selected_version,
+                user_name,
+                stream_method=VERSION_MAP[selected_version]["stream_function"],
             )
         else:
             st.error("Please provide your name and upload a file.")
@@ -307,10 +312,10 @@ with tab3:
     st.subheader("⚠️ Core Architectural Limitations")
     st.markdown(
         """
-    - **Sequential Processing**: Chunks must be processed in order, no parallel processing support
+    - **Sequential Processing**: Chunks are processed in order by default, windowed concurrent discovery is opt-in
     - **Processing Time**: As chunks are processed sequentially, it takes its time
     - **Error Recovery**: No retry mechanism or partial results saving on failure besides LLM retries
     - **Memory Constraints**: All chunks and findings must be held in memory
-    - **Processing Flow**: No ability to pause/resume or reprocess specific sections
+    - **Processing Flow**: Resume is only available for checkpointed runs, no way to reprocess specific sections
     """
     )
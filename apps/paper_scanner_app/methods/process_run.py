@@ -5,6 +5,7 @@ from io import BytesIO
 from apps.paper_scanner_app.methods.retrieve_runs import retrieve_runs
 from apps.paper_scanner_app.methods.store_run import store_to_bigquery
 from apps.paper_scanner_app.utils import IS_DEV
+from packages.workflows.paper_scanner.v0.streaming import ScannerEventType
 
 
 import logging
@@ -14,8 +15,35 @@ from datetime import datetime
 import pytz
 
 
+# Runs the streaming agent, showing findings as they are found, and returns the final result
+def run_with_progress(stream_method, raw_content):
+    progress = st.empty()
+    processed_chunks, finding_titles = 0, []
+
+    for event in stream_method(pdf_paper=raw_content, use_local_marker=IS_DEV):
+        if event["type"] == ScannerEventType.CHUNK_FINISHED:
+            processed_chunks += 1
+        elif event["type"] == ScannerEventType.FINDING_CREATED:
+            finding_titles.append(event["finding"]["title"])
+        elif event["type"] == ScannerEventType.CONSOLIDATION_DONE:
+            progress.info("Consolidating findings...")
+            continue
+        elif event["type"] == ScannerEventType.RUN_FINISHED:
+            progress.empty()
+            return event["result"]
+        else:
+            continue
+
+        progress.info(
+            f"Processed {processed_chunks} chunks, {len(finding_titles)} findings so far:\n\n"
+            + "\n".join(f"- {title}" for title in finding_titles[-10:])
+        )
+
+
 # Runs agent and stores the result in BigQuery
-def process_selected_method(selected_method, uploaded_file, version, user_name):
+def process_selected_method(
+    selected_method, uploaded_file, version, user_name, stream_method=None
+):
     """
     Processes the file using the selected method.
 
@@ -24,6 +52,7 @@ def process_selected_method(selected_method, uploaded_file, version, user_name):
         uploaded_file (UploadedFile): The uploaded file object from Streamlit.
         version (str): The selected version string.
         user_name (str): The user's name.
+        stream_method (Callable, optional): Streaming counterpart of the method, used to show partial results.
     """
     # Validate user input
     if not user_name:
@@ -55,11 +84,14 @@ def process_selected_method(selected_method, uploaded_file, version, user_name):
         with st.spinner(
             f"Processing file with version {version}. It may take up to 5m depending on the paper's length and model availability delay..."
         ):
-            # Call the selected processing function
-            result = selected_method(
-                pdf_paper=raw_content,  # Pass content as raw bytes
-                use_local_marker=IS_DEV,
-            )
+            # Call the selected processing function, streaming partial results when possible
+            if stream_method:
+                result = run_with_progress(stream_method, raw_content)
+            else:
+                result = selected_method(
+                    pdf_paper=raw_content,  # Pass content as raw bytes
+                    use_local_marker=IS_DEV,
+                )
 
             # Get end time
             end_execution = datetime.now(pytz.UTC).isoformat()
@@ -31,8 +31,12 @@ def store_to_bigquery(
 
     client = bigquery.Client(credentials=bigquery_credentials)
 
+    # Profile added to the result by the workflow, missing from older versions
+    profile = state.get("profile") or {}
+
     # Format the data to match the BigQuery schema
     row = {
+        "paper_fingerprint": state.get("paper_fingerprint"),
         "metadata": {
             "title": state["metadata"].get("title"),
             "authors": state["metadata"].get("authors", []),
@@ -63,6 +67,7 @@ def store_to_bigquery(
             {
                 "chunk_id": chunk["chunk_id"],
                 "content": chunk.get("content"),
+                "status": chunk.get("status"),
             }
             for chunk in state.get("processed_chunks", [])
         ],
@@ -72,6 +77,15 @@ def store_to_bigquery(
             "status": run_metadata["status"],
             "user_name": run_metadata["user_name"],
             "version": run_metadata["version"],
+            "wall_seconds": profile.get("wall_seconds"),
+            "llm_calls": profile.get("llm_calls"),
+            "llm_call_seconds": profile.get("llm_call_seconds"),
+            "llm_queue_seconds": profile.get("llm_queue_seconds"),
+            "prompt_tokens": profile.get("prompt_tokens"),
+            "completion_tokens": profile.get("completion_tokens"),
+            "retries": profile.get("retries"),
+            "parse_failures": profile.get("parse_failures"),
+            "node_profiles": profile.get("nodes", []),
         },
     }
 
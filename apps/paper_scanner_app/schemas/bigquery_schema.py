@@ -2,6 +2,7 @@ from google.cloud import bigquery
 from typing import TypedDict, List, Optional
 
 PAPER_SCANNER_SCHEMA = [
+    bigquery.SchemaField("paper_fingerprint", "STRING", mode="NULLABLE"),
     bigquery.SchemaField(
         "metadata",
         "RECORD",
@@ -44,6 +45,8 @@ PAPER_SCANNER_SCHEMA = [
         fields=[
             bigquery.SchemaField("chunk_id", "STRING", mode="REQUIRED"),
             bigquery.SchemaField("content", "STRING", mode="NULLABLE"),
+            # "processed", "failed" or "skipped" for low-value sections
+            bigquery.SchemaField("status", "STRING", mode="NULLABLE"),
         ],
     ),
     bigquery.SchemaField(
@@ -58,6 +61,36 @@ PAPER_SCANNER_SCHEMA = [
             ),  # e.g., "SUCCESS", "FAILURE"
             bigquery.SchemaField("user_name", "STRING", mode="NULLABLE"),
             bigquery.SchemaField("version", "STRING", mode="NULLABLE"),
+            # Run profile, see RunProfiler
+            bigquery.SchemaField("wall_seconds", "FLOAT", mode="NULLABLE"),
+            bigquery.SchemaField("llm_calls", "INTEGER", mode="NULLABLE"),
+            bigquery.SchemaField("llm_call_seconds", "FLOAT", mode="NULLABLE"),
+            bigquery.SchemaField("llm_queue_seconds", "FLOAT", mode="NULLABLE"),
+            bigquery.SchemaField("prompt_tokens", "INTEGER", mode="NULLABLE"),
+            bigquery.SchemaField("completion_tokens", "INTEGER", mode="NULLABLE"),
+            bigquery.SchemaField("retries", "INTEGER", mode="NULLABLE"),
+            bigquery.SchemaField("parse_failures", "INTEGER", mode="NULLABLE"),
+            bigquery.SchemaField(
+                "node_profiles",
+                "RECORD",
+                mode="REPEATED",
+                fields=[
+                    bigquery.SchemaField("node", "STRING", mode="REQUIRED"),
+                    bigquery.SchemaField("invocations", "INTEGER", mode="NULLABLE"),
+                    bigquery.SchemaField("wall_seconds", "FLOAT", mode="NULLABLE"),
+                    bigquery.SchemaField("llm_calls", "INTEGER", mode="NULLABLE"),
+                    bigquery.SchemaField("llm_call_seconds", "FLOAT", mode="NULLABLE"),
+                    bigquery.SchemaField(
+                        "llm_queue_seconds", "FLOAT", mode="NULLABLE"
+                    ),
+                    bigquery.SchemaField("prompt_tokens", "INTEGER", mode="NULLABLE"),
+                    bigquery.SchemaField(
+                        "completion_tokens", "INTEGER", mode="NULLABLE"
+                    ),
+                    bigquery.SchemaField("retries", "INTEGER", mode="NULLABLE"),
+                    bigquery.SchemaField("parse_failures", "INTEGER", mode="NULLABLE"),
+                ],
+            ),
         ],
     ),
 ]
@@ -89,6 +122,20 @@ class ConsolidatedFindingTypedDict(TypedDict, total=False):
 class ChunkTypedDict(TypedDict, total=False):
     chunk_id: str
     content: Optional[str]
+    status: Optional[str]
+
+
+class NodeProfileTypedDict(TypedDict, total=False):
+    node: str
+    invocations: Optional[int]
+    wall_seconds: Optional[float]
+    llm_calls: Optional[int]
+    llm_call_seconds: Optional[float]
+    llm_queue_seconds: Optional[float]
+    prompt_tokens: Optional[int]
+    completion_tokens: Optional[int]
+    retries: Optional[int]
+    parse_failures: Optional[int]
 
 
 class RunMetadataTypedDict(TypedDict, total=False):
@@ -97,9 +144,19 @@ class RunMetadataTypedDict(TypedDict, total=False):
     status: Optional[str]
     user_name: Optional[str]
     version: Optional[str]
+    wall_seconds: Optional[float]
+    llm_calls: Optional[int]
+    llm_call_seconds: Optional[float]
+    llm_queue_seconds: Optional[float]
+    prompt_tokens: Optional[int]
+    completion_tokens: Optional[int]
+    retries: Optional[int]
+    parse_failures: Optional[int]
+    node_profiles: List[NodeProfileTypedDict]
 
 
 class PaperScannerSchema(TypedDict, total=False):
+    paper_fingerprint: Optional[str]
     metadata: Optional[MetadataTypedDict]
     raw_findings: List[RawFindingTypedDict]
     consolidated_findings: List[ConsolidatedFindingTypedDict]
@@ -0,0 +1,211 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+
+class SQLiteLLMCache(BaseCache):
+    """A persistent, content-addressed LLM response cache stored in a SQLite file.
+
+    Entries are keyed by a hash of the LLM string (model name, temperature and other
+    model parameters) and the rendered prompt, which already embeds the format
+    instructions of the output schema. The file can be shared by several threads and
+    processes: every process opens its own connections in WAL mode and writes run in
+    IMMEDIATE transactions. Lookups only read, the recency and the hit counter of an entry
+    are written on hits, misses are counted with the next write of the process.
+
+    Example:
+        .. code-block:: python
+
+            cache = SQLiteLLMCache(".cache/llm.sqlite", max_bytes=512 * 1024 * 1024)
+            model = get_chat_model("gemini-1.5-flash-002", cache=cache)
+    """
+
+    def __init__(
+        self,
+        database_path: str,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        max_age_seconds: Optional[float] = None,
+        timeout: float = 30.0,
+    ):
+        """
+        Args:
+            database_path (str): Path of the SQLite file, created if missing.
+            max_entries (Optional[int]): Evict least recently used entries above this count.
+            max_bytes (Optional[int]): Evict least recently used entries above this total size.
+            max_age_seconds (Optional[float]): Entries older than this are ignored and evicted.
+            timeout (float): Seconds to wait for a lock held by another process.
+        """
+        self.database_path = database_path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.timeout = timeout
+        self._local = threading.local()
+        # Misses not written yet, see _write_misses
+        self._pending_misses = 0
+        self._pending_misses_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(database_path) or ".", exist_ok=True)
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    generations TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+            connection.execute(
+                "INSERT OR IGNORE INTO stats (name, value) VALUES ('hits', 0), ('misses', 0)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread, SQLite connections must not be shared between threads
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.database_path, timeout=self.timeout, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode()).hexdigest()
+
+    def _count(self, connection: sqlite3.Connection, name: str, count: int = 1) -> None:
+        connection.execute(
+            "UPDATE stats SET value = value + ? WHERE name = ?", (count, name)
+        )
+
+    def _write_misses(self, connection: sqlite3.Connection) -> None:
+        # A miss is followed by the LLM call and the update of its response, counting it
+        # then keeps misses from taking the write lock
+        with self._pending_misses_lock:
+            misses, self._pending_misses = self._pending_misses, 0
+        if misses:
+            self._count(connection, "misses", misses)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        connection = self._connection()
+        key = self._key(prompt, llm_string)
+        now = time.time()
+
+        # A plain read, WAL readers do not wait for writers
+        row = connection.execute(
+            "SELECT generations, created_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+
+        # Expired entries are deleted by the eviction of the next update
+        if row is None or (
+            self.max_age_seconds is not None and now - row[1] > self.max_age_seconds
+        ):
+            with self._pending_misses_lock:
+                self._pending_misses += 1
+            return None
+
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._count(connection, "hits")
+            self._write_misses(connection)
+        return loads(row[0])
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        connection = self._connection()
+        generations = dumps(list(return_val))
+        now = time.time()
+
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (key, generations, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (
+                    self._key(prompt, llm_string),
+                    generations,
+                    len(generations),
+                    now,
+                    now,
+                ),
+            )
+            self._evict(connection, now)
+            self._write_misses(connection)
+
+    def _evict(self, connection: sqlite3.Connection, now: float) -> None:
+        if self.max_age_seconds is not None:
+            connection.execute(
+                "DELETE FROM responses WHERE created_at < ?",
+                (now - self.max_age_seconds,),
+            )
+
+        if self.max_entries is not None:
+            connection.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+        if self.max_bytes is not None:
+            total_bytes = connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()[0]
+            if total_bytes > self.max_bytes:
+                # Drop least recently used entries until the cache fits
+                evicted_keys = []
+                for key, size in connection.execute(
+                    "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+                ):
+                    if total_bytes <= self.max_bytes:
+                        break
+                    evicted_keys.append((key,))
+                    total_bytes -= size
+                connection.executemany(
+                    "DELETE FROM responses WHERE key = ?", evicted_keys
+                )
+
+    def clear(self, **kwargs: Any) -> None:
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute("DELETE FROM responses")
+            connection.execute("UPDATE stats SET value = 0")
+        with self._pending_misses_lock:
+            self._pending_misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Returns hit and miss counters (shared by every process) and the current size."""
+        connection = self._connection()
+        if self._pending_misses:
+            with connection:
+                connection.execute("BEGIN IMMEDIATE")
+                self._write_misses(connection)
+        counters = dict(connection.execute("SELECT name, value FROM stats"))
+        entries, total_bytes = connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        return {
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "entries": entries,
+            "bytes": total_bytes,
+        }
@@ -0,0 +1,290 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.callbacks.manager import (
+    adispatch_custom_event,
+    dispatch_custom_event,
+)
+from langchain_core.exceptions import OutputParserException
+from langchain_core.outputs import LLMResult
+from typing_extensions import TypedDict
+
+# Custom events reported from inside a run, see report_event
+LLM_SLOT_WAIT_EVENT = "llm_slot_wait"  # Waiting for a slot of the shared LLM calls budget
+LLM_RATE_LIMIT_WAIT_EVENT = "llm_rate_limit_wait"  # Waiting for the rate limiter, within the model call
+RETRY_EVENT = "retry"  # A retry policy is about to retry
+
+UNKNOWN_NODE = "unknown"
+MAX_COUNTED_ERRORS = 256  # Parse errors remembered while they go up through their parent runs
+
+
+class NodeProfile(TypedDict):
+    node: str
+    invocations: int
+    wall_seconds: float
+    llm_calls: int
+    llm_call_seconds: float
+    llm_queue_seconds: float
+    prompt_tokens: int
+    completion_tokens: int
+    retries: int
+    parse_failures: int
+
+
+class RunProfile(TypedDict):
+    wall_seconds: float
+    llm_calls: int
+    llm_call_seconds: float
+    llm_queue_seconds: float
+    prompt_tokens: int
+    completion_tokens: int
+    retries: int
+    parse_failures: int
+    nodes: List[NodeProfile]
+
+
+def report_event(name: str, data: Dict[str, Any]) -> None:
+    # Outside of a run there is nobody to report to
+    try:
+        dispatch_custom_event(name, data)
+    except RuntimeError:
+        pass
+
+
+async def areport_event(name: str, data: Dict[str, Any]) -> None:
+    try:
+        await adispatch_custom_event(name, data)
+    except RuntimeError:
+        pass
+
+
+class RunProfiler(BaseCallbackHandler):
+    """Collects per-node latency, token, retry and parse failure counts of a LangGraph run.
+
+    Node invocations are the chain runs named after their `langgraph_node` metadata, LLM
+    calls and errors are attributed to the node they run in. Queue time is the time spent
+    waiting for the shared LLM calls budget and for the rate limiter, it is reported with
+    custom events (see report_event) and left out of the LLM call time.
+
+    Example:
+        .. code-block:: python
+
+            profiler = RunProfiler()
+            agent.invoke(agent_input, {**config, "callbacks": [profiler]})
+            profiler.profile()  # -> {"wall_seconds": ..., "nodes": [...]}
+    """
+
+    # Timings are taken when the events happen, not when a thread pool gets to them
+    run_inline = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started_at: Optional[float] = None
+        self._ended_at: Optional[float] = None
+        self._node_runs: Dict[UUID, tuple] = {}
+        self._nested_runs: set = set()
+        self._llm_runs: Dict[UUID, tuple] = {}
+        # Parse errors already counted by id, the errors are kept so their ids are not reused
+        self._counted_errors: "OrderedDict[int, BaseException]" = OrderedDict()
+        self._nodes: Dict[str, NodeProfile] = {}
+
+    def _node(self, name: Optional[str]) -> NodeProfile:
+        name = name or UNKNOWN_NODE
+        if name not in self._nodes:
+            self._nodes[name] = NodeProfile(
+                node=name,
+                invocations=0,
+                wall_seconds=0.0,
+                llm_calls=0,
+                llm_call_seconds=0.0,
+                llm_queue_seconds=0.0,
+                prompt_tokens=0,
+                completion_tokens=0,
+                retries=0,
+                parse_failures=0,
+            )
+        return self._nodes[name]
+
+    # Nodes
+    # -----
+
+    def on_chain_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        inputs: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        now = time.perf_counter()
+        node = (metadata or {}).get("langgraph_node")
+        with self._lock:
+            if self._started_at is None:
+                self._started_at = now
+            # Runnables of a node named like the node (e.g. its RunnableLambda) are not invocations
+            if kwargs.get("name") != node or node is None:
+                return
+            if parent_run_id in self._node_runs or parent_run_id in self._nested_runs:
+                self._nested_runs.add(run_id)
+                return
+            self._node_runs[run_id] = (node, now)
+
+    def _end_chain(self, run_id: UUID) -> None:
+        now = time.perf_counter()
+        with self._lock:
+            self._ended_at = now
+            self._nested_runs.discard(run_id)
+            node_run = self._node_runs.pop(run_id, None)
+            if node_run is not None:
+                node, started_at = node_run
+                profile = self._node(node)
+                profile["invocations"] += 1
+                profile["wall_seconds"] += now - started_at
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_chain(run_id)
+
+    def on_chain_error(
+        self,
+        error: BaseException,
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        node = None
+        with self._lock:
+            if run_id in self._node_runs:
+                node = self._node_runs[run_id][0]
+            # The error goes up through every parent run, count it once
+            if (
+                isinstance(error, OutputParserException)
+                and id(error) not in self._counted_errors
+            ):
+                self._counted_errors[id(error)] = error
+                # An error reaches its parent runs right away, older ones are not seen again
+                if len(self._counted_errors) > MAX_COUNTED_ERRORS:
+                    self._counted_errors.popitem(last=False)
+                self._node(node or (metadata or {}).get("langgraph_node"))[
+                    "parse_failures"
+                ] += 1
+        self._end_chain(run_id)
+
+    # LLM calls
+    # ---------
+
+    def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: List[List[Any]],
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        with self._lock:
+            self._llm_runs[run_id] = (node, time.perf_counter())
+
+    def on_llm_start(
+        self,
+        serialized: Dict[str, Any],
+        prompts: List[str],
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        with self._lock:
+            self._llm_runs[run_id] = (node, time.perf_counter())
+
+    def _end_llm(self, run_id: UUID, response: Optional[LLMResult]) -> None:
+        now = time.perf_counter()
+        prompt_tokens, completion_tokens = 0, 0
+        for generations in response.generations if response else []:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    prompt_tokens += usage.get("input_tokens", 0)
+                    completion_tokens += usage.get("output_tokens", 0)
+
+        with self._lock:
+            llm_run = self._llm_runs.pop(run_id, None)
+            if llm_run is None:
+                return
+            node, started_at = llm_run
+            profile = self._node(node)
+            profile["llm_calls"] += 1
+            profile["llm_call_seconds"] += now - started_at
+            profile["prompt_tokens"] += prompt_tokens
+            profile["completion_tokens"] += completion_tokens
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_llm(run_id, response)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_llm(run_id, None)
+
+    # Retries and queue time
+    # ----------------------
+
+    def on_retry(self, retry_state: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            node = self._llm_runs.get(run_id, (None,))[0]
+            self._node(node)["retries"] += 1
+
+    def on_custom_event(
+        self,
+        name: str,
+        data: Any,
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        if name not in (LLM_SLOT_WAIT_EVENT, LLM_RATE_LIMIT_WAIT_EVENT, RETRY_EVENT):
+            return
+        with self._lock:
+            profile = self._node((metadata or {}).get("langgraph_node"))
+            if name == RETRY_EVENT:
+                profile["retries"] += 1
+                return
+            profile["llm_queue_seconds"] += data["seconds"]
+            # The rate limiter waits within the model call
+            if name == LLM_RATE_LIMIT_WAIT_EVENT:
+                profile["llm_call_seconds"] -= data["seconds"]
+
+    def profile(self) -> RunProfile:
+        """Returns the totals of the run and the profile of every node, slowest first."""
+        with self._lock:
+            nodes = sorted(
+                (NodeProfile(**node) for node in self._nodes.values()),
+                key=lambda node: node["wall_seconds"],
+                reverse=True,
+            )
+            wall_seconds = (
+                self._ended_at - self._started_at
+                if self._started_at is not None and self._ended_at is not None
+                else 0.0
+            )
+
+        totals = {
+            key: sum(node[key] for node in nodes)
+            for key in (
+                "llm_calls",
+                "llm_call_seconds",
+                "llm_queue_seconds",
+                "prompt_tokens",
+                "completion_tokens",
+                "retries",
+                "parse_failures",
+            )
+        }
+        return RunProfile(wall_seconds=wall_seconds, nodes=nodes, **totals)
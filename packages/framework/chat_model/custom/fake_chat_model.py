@@ -0,0 +1,290 @@
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from packages.framework.utils.estimate_tokens import estimate_tokens
+
+# Schema printed by PydanticOutputParser format instructions
+OUTPUT_SCHEMA_PATTERN = re.compile(
+    r"Here is the output schema:\s*```\s*(\{.*?\})\s*```", re.DOTALL
+)
+WORD_PATTERN = re.compile(r"[A-Za-z][A-Za-z\-]{3,}")
+
+
+class FakeChatModel(BaseChatModel):
+    """A chat model running offline, for end-to-end tests and benchmarks.
+
+    In "record" mode, prompts are sent to `recorded_model` and the answers written to
+    the cassette file. In "replay" mode, answers are read back from the cassette, a
+    prompt missing from it raises an error. In "synthetic" mode, answers are generated
+    from the JSON schema of the format instructions in the prompt, deterministically
+    for a given prompt and seed. String properties named in `reference_fields` take
+    values listed in the prompt as "<Name>: <value>" lines, so generated updates point
+    to existing ids.
+
+    Each call waits for a latency drawn from the `latency` distribution, "recorded"
+    replays the latency measured when the cassette was recorded.
+
+    Example:
+        .. code-block:: python
+
+            model = FakeChatModel(mode="synthetic", latency="lognormal", latency_seconds=2.0)
+            recorder = FakeChatModel(mode="record", cassette_path="paper.json", recorded_model=gemini)
+            player = FakeChatModel(mode="replay", cassette_path="paper.json", latency="recorded")
+    """
+
+    mode: Literal["synthetic", "record", "replay"] = "synthetic"
+    """How answers are produced"""
+    cassette_path: Optional[str] = None
+    """JSON file of recorded answers, required by the record and replay modes"""
+    recorded_model: Optional[BaseChatModel] = None
+    """The model whose answers are recorded"""
+    model_name: str = "fake"
+    """Name reported to callbacks"""
+    latency: Literal["constant", "uniform", "lognormal", "recorded"] = "constant"
+    """Distribution of the simulated latency"""
+    latency_seconds: float = 0.0
+    """Mean simulated latency"""
+    latency_spread: float = 0.5
+    """Relative half-width of the uniform distribution, sigma of the lognormal one"""
+    seed: int = 0
+    """Seed of the synthetic answers and latencies"""
+    max_items: int = 2
+    """Largest number of items of synthetic arrays"""
+    reference_fields: List[str] = ["id"]
+    """Properties whose synthetic values are taken from the prompt"""
+
+    _cassette: Optional[Dict[str, dict]] = None
+    _lock: Any = None
+
+    def __init__(self, **data: Any):
+        super().__init__(**data)
+        if self.mode != "synthetic" and not self.cassette_path:
+            raise ValueError(f"A cassette_path is required in {self.mode} mode")
+        if self.mode == "record" and self.recorded_model is None:
+            raise ValueError("A recorded_model is required in record mode")
+        self._lock = threading.Lock()
+
+    # Cassette
+    # --------
+
+    @staticmethod
+    def prompt_key(messages: List[BaseMessage]) -> str:
+        serialized = json.dumps(
+            [(message.type, message.content) for message in messages]
+        )
+        return hashlib.sha256(serialized.encode()).hexdigest()
+
+    def _load_cassette(self) -> Dict[str, dict]:
+        if self._cassette is None:
+            try:
+                with open(self.cassette_path, encoding="utf-8") as file:
+                    self._cassette = json.load(file)
+            except FileNotFoundError:
+                self._cassette = {}
+        return self._cassette
+
+    def _record(self, key: str, entry: dict) -> None:
+        with self._lock:
+            cassette = self._load_cassette()
+            cassette[key] = entry
+            # Write then rename so readers never see a partial file
+            os.makedirs(os.path.dirname(self.cassette_path) or ".", exist_ok=True)
+            temporary_path = (
+                f"{self.cassette_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            )
+            with open(temporary_path, "w", encoding="utf-8") as file:
+                json.dump(cassette, file, indent=1)
+            os.replace(temporary_path, self.cassette_path)
+
+    def _replay(self, key: str) -> dict:
+        with self._lock:
+            entry = self._load_cassette().get(key)
+        if entry is None:
+            raise KeyError(f"Prompt {key} is not recorded in {self.cassette_path}")
+        return entry
+
+    # Synthetic answers
+    # -----------------
+
+    def synthetic_answer(self, prompt: str) -> str:
+        digest = hashlib.sha256(prompt.encode()).hexdigest()
+        rng = random.Random(f"{self.seed}:{digest}")
+        match = OUTPUT_SCHEMA_PATTERN.search(prompt)
+        # Words of the prompt, format instructions excluded, make up the strings
+        words = sorted(set(WORD_PATTERN.findall(prompt[: match.start()] if match else prompt)))
+        if match is None:
+            return " ".join(rng.sample(words, min(len(words), 20)))
+
+        schema = json.loads(match.group(1))
+        definitions = schema.get("$defs", {})
+        # Values the prompt lists as "<Name>: <value>" lines
+        references = {
+            field: list(
+                dict.fromkeys(
+                    re.findall(rf"(?im)^\s*{re.escape(field)}:\s*(\S+)\s*$", prompt)
+                )
+            )
+            for field in self.reference_fields
+        }
+
+        def resolve(schema: dict) -> dict:
+            if "$ref" in schema:
+                return definitions[schema["$ref"].split("/")[-1]]
+            return schema
+
+        def generate(schema: dict, name: str) -> Any:
+            schema = resolve(schema)
+            if "anyOf" in schema:
+                options = [o for o in schema["anyOf"] if o.get("type") != "null"]
+                nullable = len(options) < len(schema["anyOf"])
+                if not options or (nullable and rng.random() < 0.5):
+                    return None
+                schema = resolve(options[0])
+            if "enum" in schema:
+                return rng.choice(schema["enum"])
+
+            schema_type = schema.get("type", "object")
+            if schema_type == "object":
+                properties = schema.get("properties", {})
+                return {key: generate(value, key) for key, value in properties.items()}
+            if schema_type == "array":
+                item_schema = resolve(schema.get("items", {}))
+                item_fields = item_schema.get("properties", {})
+                # Items pointing to the prompt are limited to the values it lists
+                referenced = [f for f in self.reference_fields if f in item_fields]
+                length = min(
+                    [rng.randint(0, self.max_items)]
+                    + [len(references[field]) for field in referenced]
+                )
+                items = [generate(item_schema, name) for _ in range(length)]
+                for field in referenced:
+                    values = rng.sample(references[field], length)
+                    for item, value in zip(items, values):
+                        item[field] = value
+                return items
+            if schema_type == "string":
+                if references.get(name):
+                    return rng.choice(references[name])
+                sample = rng.sample(words, min(len(words), rng.randint(3, 8)))
+                return " ".join([name.replace("_", " ").capitalize(), *sample])
+            if schema_type == "integer":
+                return rng.randint(0, 100)
+            if schema_type == "number":
+                return round(rng.uniform(0, 100), 2)
+            if schema_type == "boolean":
+                return rng.random() < 0.5
+            return None
+
+        return json.dumps(generate(schema, ""))
+
+    # Chat model
+    # ----------
+
+    def _sample_latency(self, prompt: str, recorded_seconds: Optional[float]) -> float:
+        if self.latency == "recorded":
+            return recorded_seconds or 0.0
+        if self.latency_seconds <= 0:
+            return 0.0
+
+        rng = random.Random(f"{self.seed}:latency:{prompt}")
+        if self.latency == "uniform":
+            spread = self.latency_seconds * self.latency_spread
+            return rng.uniform(
+                self.latency_seconds - spread, self.latency_seconds + spread
+            )
+        if self.latency == "lognormal":
+            # Mean of the distribution is latency_seconds
+            sigma = self.latency_spread
+            return rng.lognormvariate(
+                math.log(self.latency_seconds) - sigma**2 / 2, sigma
+            )
+        return self.latency_seconds
+
+    def _answer(self, messages: List[BaseMessage]) -> Tuple[str, float]:
+        """Returns the answer and the latency to simulate, recorded calls already waited."""
+        prompt = "\n".join(str(message.content) for message in messages)
+        if self.mode == "synthetic":
+            return self.synthetic_answer(prompt), self._sample_latency(prompt, None)
+
+        key = self.prompt_key(messages)
+        if self.mode == "replay":
+            entry = self._replay(key)
+            latency_seconds = self._sample_latency(prompt, entry.get("latency_seconds"))
+            return entry["content"], latency_seconds
+
+        start = time.perf_counter()
+        content = str(self.recorded_model.invoke(messages).content)
+        self._record(
+            key, {"content": content, "latency_seconds": time.perf_counter() - start}
+        )
+        return content, 0.0
+
+    def _result(self, messages: List[BaseMessage], content: str) -> ChatResult:
+        prompt_tokens = sum(
+            estimate_tokens(str(message.content)) for message in messages
+        )
+        completion_tokens = estimate_tokens(content)
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        content, latency_seconds = self._answer(messages)
+        time.sleep(latency_seconds)
+        return self._result(messages, content)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.mode == "record":
+            # The recorded model call is blocking, keep it off the event loop
+            content, latency_seconds = await asyncio.to_thread(self._answer, messages)
+        else:
+            content, latency_seconds = self._answer(messages)
+        await asyncio.sleep(latency_seconds)
+        return self._result(messages, content)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {
+            "model_name": self.model_name,
+            "mode": self.mode,
+            "cassette_path": self.cassette_path,
+            "seed": self.seed,
+        }
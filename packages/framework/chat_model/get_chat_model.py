@@ -1,10 +1,13 @@
-from typing import Literal, Dict, Any, Optional
-from packages.framework.chat_model.custom.chat_med_palm import ChatMedPalm
-from langchain.chat_models.base import BaseChatModel
-from langchain_google_vertexai import ChatVertexAI
-from langchain_community.chat_models import ChatOpenAI
+from importlib import import_module
+from typing import TYPE_CHECKING, Literal, Dict, Any, Optional, Type
+from packages.framework.rate_limiters.sqlite_token_bucket import (
+    DEFAULT_RATE_LIMIT_PATH,
+    get_rate_limiter,
+)
+from langchain_core.language_models import BaseChatModel
 
-from langchain_google_vertexai import HarmBlockThreshold, HarmCategory
+if TYPE_CHECKING:
+    from langchain_google_vertexai import HarmBlockThreshold, HarmCategory
 
 # Define Literal for model values
 ModelType = Literal[
@@ -19,39 +22,66 @@ ModelType = Literal[
     "medlm-medium",
     "gpt-3.5-turbo",
     "gpt-4-turbo",
+    "fake-synthetic",
+    "fake-record",
+    "fake-replay",
 ]
 
 
+# Chat model classes are imported on first use, provider SDKs are slow to import
+CHAT_VERTEX_AI = "langchain_google_vertexai:ChatVertexAI"
+CHAT_MED_PALM = "packages.framework.chat_model.custom.chat_med_palm:ChatMedPalm"
+CHAT_OPEN_AI = "langchain_community.chat_models:ChatOpenAI"
+FAKE_CHAT_MODEL = "packages.framework.chat_model.custom.fake_chat_model:FakeChatModel"
+
 modelToClassMap = {
-    "gemini-1.5-flash": ChatVertexAI,
-    "gemini-1.5-flash-001": ChatVertexAI,
-    "gemini-1.5-flash-002": ChatVertexAI,
-    "gemini-1.5-pro": ChatVertexAI,
-    "gemini-1.5-pro-001": ChatVertexAI,
-    "gemini-1.5-pro-002": ChatVertexAI,
-    "gemini-2.0-flash-exp": ChatVertexAI,
-    "chat-bison": ChatVertexAI,
-    "medlm-large": ChatMedPalm,
-    "medlm-medium": ChatMedPalm,
-    "gpt-3.5-turbo": ChatOpenAI,
-    "gpt-4-turbo": ChatOpenAI,
+    "gemini-1.5-flash": CHAT_VERTEX_AI,
+    "gemini-1.5-flash-001": CHAT_VERTEX_AI,
+    "gemini-1.5-flash-002": CHAT_VERTEX_AI,
+    "gemini-1.5-pro": CHAT_VERTEX_AI,
+    "gemini-1.5-pro-001": CHAT_VERTEX_AI,
+    "gemini-1.5-pro-002": CHAT_VERTEX_AI,
+    "gemini-2.0-flash-exp": CHAT_VERTEX_AI,
+    "chat-bison": CHAT_VERTEX_AI,
+    "medlm-large": CHAT_MED_PALM,
+    "medlm-medium": CHAT_MED_PALM,
+    "gpt-3.5-turbo": CHAT_OPEN_AI,
+    "gpt-4-turbo": CHAT_OPEN_AI,
+    # Offline models, see FakeChatModel
+    "fake-synthetic": FAKE_CHAT_MODEL,
+    "fake-record": FAKE_CHAT_MODEL,
+    "fake-replay": FAKE_CHAT_MODEL,
 }
 
 
-def get_chat_model(
-    model_name: ModelType,
-    temperature: Optional[float] = 0,
-    max_tokens: Optional[int] = None,
-    max_retries: Optional[int] = 6,
-    stop: Optional[str] = None,
-    safety_settings: Optional[Dict[HarmCategory, HarmBlockThreshold]] = {
+def get_chat_model_class(model_name: ModelType) -> Type[BaseChatModel]:
+    module_name, class_name = modelToClassMap[model_name].split(":")
+    return getattr(import_module(module_name), class_name)
+
+
+def default_safety_settings() -> Dict["HarmCategory", "HarmBlockThreshold"]:
+    from langchain_google_vertexai import HarmBlockThreshold, HarmCategory
+
+    return {
         HarmCategory.HARM_CATEGORY_UNSPECIFIED: HarmBlockThreshold.OFF,
         HarmCategory.HARM_CATEGORY_CIVIC_INTEGRITY: HarmBlockThreshold.OFF,
         HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.OFF,
         HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.OFF,
         HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.OFF,
         HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.OFF,
-    },
+    }
+
+
+def get_chat_model(
+    model_name: ModelType,
+    temperature: Optional[float] = 0,
+    max_tokens: Optional[int] = None,
+    max_retries: Optional[int] = 6,
+    stop: Optional[str] = None,
+    safety_settings: Optional[Dict["HarmCategory", "HarmBlockThreshold"]] = None,
+    requests_per_minute: Optional[float] = None,
+    tokens_per_minute: Optional[float] = None,
+    rate_limit_path: Optional[str] = DEFAULT_RATE_LIMIT_PATH,
     **extra_props: Any,
 ) -> BaseChatModel:
     # Base configuration for all models
@@ -62,14 +92,45 @@ def get_chat_model(
         "stop": stop,
     }
 
-    # Include safety_settings only for Gemini models
+    # Include safety_settings only for Gemini models, every filter is off by default
     if model_name.startswith("gemini-"):
-        base_config["safety_settings"] = safety_settings
+        base_config["safety_settings"] = (
+            safety_settings
+            if safety_settings is not None
+            else default_safety_settings()
+        )
+
+    # Offline models take their mode from the name, the recorded model can be given by name
+    if model_name.startswith("fake-"):
+        base_config["mode"] = model_name[len("fake-") :]
+        recorded_model = extra_props.pop("recorded_model", None)
+        if isinstance(recorded_model, str):
+            recorded_model = get_chat_model(
+                recorded_model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                max_retries=max_retries,
+                stop=stop,
+                requests_per_minute=requests_per_minute,
+                tokens_per_minute=tokens_per_minute,
+                rate_limit_path=rate_limit_path,
+            )
+        base_config["recorded_model"] = recorded_model
+
+    # Requests and tokens per minute are shared by every model, thread and process using the same model name.
+    # When recording, the recorded model is the one limited.
+    if (requests_per_minute or tokens_per_minute) and model_name != "fake-record":
+        base_config["rate_limiter"] = get_rate_limiter(
+            rate_limit_path,
+            model_name,
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+        )
 
     # Merge base_config with extra_props
     full_config = {**base_config, **extra_props}
 
-    ChatClass = modelToClassMap[model_name]
+    ChatClass = get_chat_model_class(model_name)
 
     # Configure the specified model
     return ChatClass(model_name=model_name, **full_config)
@@ -0,0 +1,144 @@
+from typing import Any, Callable, Dict, List, Optional
+from typing_extensions import TypedDict
+
+from packages.framework.document_loaders.hybrid_loader.text_layer import (
+    TextLayerPage,
+    extract_text_layer,
+)
+from packages.framework.document_loaders.marker_loader import PdfBuffer
+from packages.framework.document_loaders.marker_loader.stitching import (
+    stitch_renders,
+)
+
+# HERE LIES THE HYBRID PDF LOADER
+# Pages are read from the PDF text layer first, only the pages it does not render well go through
+# marker, in ranges of consecutive pages, then every page is stitched back into one document
+# ----------------------------
+
+# Converts the 0-based page ranges of a PDF with marker, one render per range in the same order
+PageRangesConverter = Callable[[PdfBuffer, List[List[int]]], List[Dict[str, Any]]]
+
+DEFAULT_MIN_TEXT_QUALITY = 0.8
+DEFAULT_MAX_MATH_DENSITY = 0.08
+# Pages with fewer characters are read from their images, when images cover the page
+MIN_PAGE_CHARACTERS = 100
+MIN_SCANNED_IMAGE_COVERAGE = 0.5
+
+TEXT_LAYER_ROUTE = "text_layer"
+
+
+class PageRoute(TypedDict):
+    page: int
+    route: str  # text_layer, or why the page went through marker: scanned, garbled or math
+    quality: float
+    math_density: float
+
+
+def route_page(
+    page: TextLayerPage,
+    min_text_quality: float = DEFAULT_MIN_TEXT_QUALITY,
+    max_math_density: float = DEFAULT_MAX_MATH_DENSITY,
+) -> str:
+    """Returns text_layer when the text layer of the page is good enough, otherwise why marker should read it."""
+    if page["characters"] < MIN_PAGE_CHARACTERS:
+        # Blank and nearly blank pages have nothing more to read
+        return (
+            "scanned"
+            if page["image_coverage"] >= MIN_SCANNED_IMAGE_COVERAGE
+            else TEXT_LAYER_ROUTE
+        )
+    # Symbols lower the quality of math pages too, math is the first reason
+    if page["math_density"] > max_math_density:
+        return "math"
+    if page["quality"] < min_text_quality:
+        return "garbled"
+    return TEXT_LAYER_ROUTE
+
+
+def _text_layer_render(page: TextLayerPage) -> Dict[str, Any]:
+    return {
+        "markdown": page["markdown"],
+        "images": {},
+        "metadata": {
+            "table_of_contents": page["table_of_contents"],
+            "page_stats": [
+                {"page_id": page["page"], "text_extraction_method": "pdfplumber"}
+            ],
+        },
+    }
+
+
+def hybrid_load(
+    pdf_buffer: PdfBuffer,
+    convert_ranges: PageRangesConverter,
+    min_text_quality: Optional[float] = None,
+    max_math_density: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Processes a PDF from its text layer, and with marker for the pages it does not render well.
+
+    Every page is rendered from its text layer with pdfplumber and scored (see
+    extract_text_layer). Scanned pages, pages of garbled text and math-heavy pages are
+    converted by marker, consecutive ones in a single range, and the pages are stitched
+    back together in order (see stitch_renders). A born-digital paper without much math
+    never reaches marker.
+
+    Args:
+        pdf_buffer (PdfBuffer): PDF data as bytes, bytearray, memoryview or BytesIO buffer.
+        convert_ranges (PageRangesConverter): Converts page ranges of the PDF with marker.
+        min_text_quality (Optional[float]): Share of well-formed words under which a page goes through marker.
+        max_math_density (Optional[float]): Share of math characters over which a page goes through marker.
+
+    Returns:
+        Dict[str, Any]: Markdown, images and metadata of the whole PDF, the metadata
+                        page_routes tell how each page was read.
+    """
+    min_text_quality = (
+        DEFAULT_MIN_TEXT_QUALITY if min_text_quality is None else min_text_quality
+    )
+    max_math_density = (
+        DEFAULT_MAX_MATH_DENSITY if max_math_density is None else max_math_density
+    )
+    pages = extract_text_layer(pdf_buffer)
+    routes = [route_page(page, min_text_quality, max_math_density) for page in pages]
+
+    # Consecutive marker pages are one range, converted in parallel with the other ranges
+    page_ranges: List[List[int]] = []
+    for page, route in zip(pages, routes):
+        if route == TEXT_LAYER_ROUTE:
+            continue
+        if page_ranges and page_ranges[-1][-1] == page["page"] - 1:
+            page_ranges[-1].append(page["page"])
+        else:
+            page_ranges.append([page["page"]])
+    # Renders of the marker ranges by their first page
+    marker_renders = (
+        {
+            page_range[0]: render
+            for page_range, render in zip(
+                page_ranges, convert_ranges(pdf_buffer, page_ranges)
+            )
+        }
+        if page_ranges
+        else {}
+    )
+
+    renders = []
+    for page, route in zip(pages, routes):
+        if route == TEXT_LAYER_ROUTE:
+            renders.append(_text_layer_render(page))
+        elif page["page"] in marker_renders:
+            renders.append(marker_renders[page["page"]])
+
+    rendered = stitch_renders(renders)
+    page_routes: List[PageRoute] = [
+        {
+            "page": page["page"],
+            "route": route,
+            "quality": page["quality"],
+            "math_density": page["math_density"],
+        }
+        for page, route in zip(pages, routes)
+    ]
+    rendered["metadata"]["page_routes"] = page_routes
+    return rendered
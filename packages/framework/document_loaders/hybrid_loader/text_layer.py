@@ -0,0 +1,225 @@
+from collections import Counter
+from io import BytesIO
+import re
+import statistics
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
+from typing_extensions import TypedDict
+
+from packages.framework.document_loaders.marker_loader import PdfBuffer
+
+# HERE LIES THE TEXT LAYER EXTRACTION OF A PDF WITH PDFPLUMBER
+# Each page is rendered to markdown from its embedded text, without models, and scored so that the
+# pages the text layer does not render well (scanned, garbled or math-heavy) go through marker
+# ----------------------------
+
+# Fonts of the math symbols of LaTeX papers, e.g. "ABCDEF+CMMI10", and of other math typesetting
+MATH_FONT_PATTERN = re.compile(
+    r"CMMI|CMSY|CMEX|CMBSY|MSAM|MSBM|EUFM|RSFS|Math|Symbol|STIX", re.IGNORECASE
+)
+# Glyphs pdfminer could not map to unicode
+UNMAPPED_GLYPH_PATTERN = re.compile(r"\(cid:\d+\)")
+WORD_PATTERN = re.compile(r"\S+")
+VOWELS = set("aeiouyàáâäèéêëìíîïòóôöùúûüAEIOUYÀÁÂÄÈÉÊËÌÍÎÏÒÓÔÖÙÚÛÜ")
+
+# Lines this much larger than the body text are headings
+MIN_HEADING_SIZE_RATIO = 1.15
+MAX_HEADING_WORDS = 15
+# Vertical gaps between lines larger than this ratio of the body size start a paragraph
+MIN_PARAGRAPH_GAP_RATIO = 0.6
+
+
+class TextLayerPage(TypedDict):
+    page: int  # 0-based page index
+    markdown: str
+    table_of_contents: List[Dict[str, Any]]  # Headings, shaped like the marker ones
+    characters: int  # Non-space characters of the text layer
+    image_coverage: float  # Share of the page area covered by images
+    quality: float  # Share of well-formed words, 0 to 1
+    math_density: float  # Share of the characters set in math fonts or math symbols
+
+
+def _is_math_character(char: Dict[str, Any]) -> bool:
+    text = char["text"]
+    return bool(MATH_FONT_PATTERN.search(char.get("fontname") or "")) or (
+        len(text) == 1
+        and (
+            unicodedata.category(text) == "Sm"
+            or "Ͱ" <= text <= "Ͽ"  # Greek letters
+            or "\U0001d400" <= text <= "\U0001d7ff"  # Math alphanumerics
+        )
+    )
+
+
+def _is_word(token: str) -> bool:
+    word = token.strip(".,;:!?()[]{}\"'`-–—")
+    if not word:
+        return True
+    if word.replace(".", "").replace(",", "").replace("%", "").isdigit():
+        return True
+    # Words have letters and, past a letter or two, a vowel
+    return word.replace("-", "").isalpha() and (
+        len(word) <= 2 or any(char in VOWELS for char in word)
+    )
+
+
+def text_quality(text: str) -> float:
+    """Share of the words of a text that look like words, unmapped glyphs and control characters count against it."""
+    tokens = WORD_PATTERN.findall(text)
+    if not tokens:
+        return 0.0
+    broken = len(UNMAPPED_GLYPH_PATTERN.findall(text)) + sum(
+        1
+        for char in text
+        if char == "\ufffd"
+        or (unicodedata.category(char) in ("Cc", "Co") and char not in "\n\t")
+    )
+    words = sum(1 for token in tokens if _is_word(token))
+    return max(0.0, (words - broken) / len(tokens))
+
+
+def _image_coverage(page) -> float:
+    area = 0.0
+    for image in page.images:
+        # Images are clipped to the page, overlapping ones may count twice
+        width = min(image["x1"], page.width) - max(image["x0"], 0)
+        height = min(image["bottom"], page.height) - max(image["top"], 0)
+        area += max(width, 0) * max(height, 0)
+    return min(area / (page.width * page.height), 1.0) if page.width else 0.0
+
+
+def _line_size(line: Dict[str, Any]) -> float:
+    return statistics.median(char["size"] for char in line["chars"])
+
+
+def _is_page_number(line: Dict[str, Any]) -> bool:
+    return line["text"].strip().isdigit()
+
+
+def render_page_markdown(lines: List[Dict[str, Any]], body_size: float):
+    """
+    Renders the text lines of a page to markdown, with the headings of the page.
+
+    Lines larger than the body text are headings (consecutive heading lines of a size
+    are one heading), other lines are joined into paragraphs split on vertical gaps,
+    and words hyphenated at a line end are joined back.
+
+    Args:
+        lines (List[Dict[str, Any]]): pdfplumber text lines of the page, with their chars
+        body_size (float): Font size of the body text of the document
+
+    Returns:
+        Tuple[str, List[Dict[str, Any]]]: Markdown of the page and its headings
+    """
+    # Running page numbers are dropped, marker removes them too
+    if lines and _is_page_number(lines[0]):
+        lines = lines[1:]
+    if lines and _is_page_number(lines[-1]):
+        lines = lines[:-1]
+
+    # Lines of each heading or paragraph, with whether it is a heading
+    blocks: List[Tuple[bool, List[str]]] = []
+    table_of_contents: List[Dict[str, Any]] = []
+    previous: Optional[Dict[str, Any]] = None
+    for line in lines:
+        text = line["text"].strip()
+        if not text:
+            continue
+        size = _line_size(line)
+        heading = (
+            size >= body_size * MIN_HEADING_SIZE_RATIO
+            and len(text.split()) <= MAX_HEADING_WORDS
+        )
+        gap = line["top"] - previous["bottom"] if previous is not None else -1.0
+        # Lines going up start a block too, e.g. the top of the next column
+        if (
+            previous is None
+            or heading != blocks[-1][0]
+            or not 0 <= gap <= body_size * MIN_PARAGRAPH_GAP_RATIO
+            or (heading and abs(size - _line_size(previous)) > 0.5)
+        ):
+            blocks.append((heading, []))
+            if heading:
+                table_of_contents.append(
+                    {
+                        "title": "",
+                        "heading_level": 2,
+                        "polygon": [
+                            [line["x0"], line["top"]],
+                            [line["x1"], line["top"]],
+                            [line["x1"], line["bottom"]],
+                            [line["x0"], line["bottom"]],
+                        ],
+                    }
+                )
+        blocks[-1][1].append(text)
+        if heading:
+            table_of_contents[-1]["title"] = " ".join(blocks[-1][1])
+        previous = line
+
+    markdown_blocks = []
+    for heading, block in blocks:
+        if heading:
+            markdown_blocks.append(f"## {' '.join(block)}")
+            continue
+        paragraph = block[0]
+        for text in block[1:]:
+            # "in-" then "put" is "input", a dash before a capital or a digit is kept
+            if paragraph.endswith("-") and text[0].islower():
+                paragraph = paragraph[:-1] + text
+            else:
+                paragraph = f"{paragraph} {text}"
+        markdown_blocks.append(paragraph)
+    return "\n\n".join(markdown_blocks), table_of_contents
+
+
+def extract_text_layer(pdf_buffer: PdfBuffer) -> List[TextLayerPage]:
+    """
+    Renders every page of a PDF to markdown from its text layer, and scores it.
+
+    Args:
+        pdf_buffer (PdfBuffer): PDF data as bytes, bytearray, memoryview or BytesIO buffer.
+
+    Returns:
+        List[TextLayerPage]: Markdown, headings and scores of each page, in page order
+    """
+    # pdfplumber comes with the PDF loaders, import it on first use only
+    import pdfplumber
+
+    stream = pdf_buffer if isinstance(pdf_buffer, BytesIO) else BytesIO(pdf_buffer)
+    page_lines = []
+    sizes: Counter = Counter()
+    with pdfplumber.open(stream) as pdf:
+        for page in pdf.pages:
+            # Text flow keeps the columns of a two-column paper apart
+            lines = page.extract_text_lines(use_text_flow=True, return_chars=True)
+            page_lines.append((lines, _image_coverage(page)))
+            for line in lines:
+                sizes.update(round(char["size"], 1) for char in line["chars"])
+            # The parsed layout is cached by the page, release it as we go
+            page.close()
+    # The most frequent size is the body text of the document
+    body_size = sizes.most_common(1)[0][0] if sizes else 0.0
+
+    pages: List[TextLayerPage] = []
+    for index, (lines, image_coverage) in enumerate(page_lines):
+        chars = [
+            char
+            for line in lines
+            for char in line["chars"]
+            if not char["text"].isspace()
+        ]
+        markdown, table_of_contents = render_page_markdown(lines, body_size)
+        math_characters = sum(1 for char in chars if _is_math_character(char))
+        pages.append(
+            {
+                "page": index,
+                "markdown": markdown,
+                "table_of_contents": table_of_contents,
+                "characters": len(chars),
+                "image_coverage": image_coverage,
+                "quality": text_quality("\n".join(line["text"] for line in lines)),
+                "math_density": math_characters / len(chars) if chars else 0.0,
+            }
+        )
+    return pages
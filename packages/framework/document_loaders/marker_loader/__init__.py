@@ -1,50 +1,205 @@
-from marker.converters.pdf import PdfConverter
-from marker.models import create_model_dict
+from contextlib import contextmanager
+from functools import lru_cache
 from io import BytesIO
-from typing import Dict, Any, Union
+from typing import Callable, Dict, Any, Iterator, List, Optional, Sequence, Tuple
+from typing import Union, TYPE_CHECKING
+import errno
+import logging
 import tempfile
 import os
 
+if TYPE_CHECKING:
+    from packages.framework.document_loaders.marker_loader.worker_pool import (
+        MarkerWorkerPool,
+    )
+
+# Renders the PDF file at a path into a dictionary of markdown, images and metadata, converters
+# supporting page ranges take the 0-based pages to render as a page_range keyword argument
+PdfConverterFunction = Callable[..., Dict[str, Any]]
+# PDF data, bytes-like buffers are read without copies
+PdfBuffer = Union[bytes, bytearray, memoryview, BytesIO]
+
+# RAM-backed directory of the in-memory PDFs. Anonymous memfd files do not work, their
+# /proc/<pid>/fd path is resolved by pypdfium2 to a "/memfd:... (deleted)" path
+SHARED_MEMORY_DIR = "/dev/shm"
+
+
+def create_marker_converter() -> PdfConverterFunction:
+    """
+    Loads the marker models and returns a function converting a PDF file path.
+    Loading the models takes tens of seconds and gigabytes, reuse the returned function.
+
+    Returns:
+        PdfConverterFunction: Function rendering a PDF path into markdown, images and metadata
+    """
+    # Marker pulls torch and transformers, import it on first use only
+    from marker.converters.pdf import PdfConverter
+    from marker.models import create_model_dict
+
+    # Create the artifact dictionary and initialize PdfConverter with it
+    artifact_dict = create_model_dict()
+    converter = PdfConverter(artifact_dict=artifact_dict)
+
+    def convert(
+        pdf_path: str, page_range: Optional[Sequence[int]] = None
+    ) -> Dict[str, Any]:
+        # Converters of page ranges share the loaded models, creating them is cheap
+        range_converter = (
+            converter
+            if page_range is None
+            else PdfConverter(
+                artifact_dict=artifact_dict, config={"page_range": list(page_range)}
+            )
+        )
+        rendered = range_converter(pdf_path)
+        return {
+            "markdown": rendered.markdown,
+            "images": rendered.images,
+            "metadata": rendered.metadata,
+        }
+
+    return convert
+
+
+# Models of this process are loaded once, on the first local conversion
+get_marker_converter = lru_cache(maxsize=1)(create_marker_converter)
+
+
+def pdf_buffer_view(pdf_buffer: PdfBuffer) -> memoryview:
+    # BytesIO buffers are viewed in place, the BytesIO cannot be resized until the view is released
+    if isinstance(pdf_buffer, BytesIO):
+        return pdf_buffer.getbuffer()
+    return memoryview(pdf_buffer)
+
+
+def _write_all(fd: int, view: memoryview) -> None:
+    # os.write may write part of the view, slices of a memoryview are not copies
+    written = 0
+    while written < len(view):
+        written += os.write(fd, view[written:])
+
+
+def _create_buffer_file(in_memory: bool) -> Tuple[int, str]:
+    # A plain path, marker and its pdftext workers open it by name
+    if in_memory and os.access(SHARED_MEMORY_DIR, os.W_OK):
+        return tempfile.mkstemp(suffix=".pdf", dir=SHARED_MEMORY_DIR)
+    return tempfile.mkstemp(suffix=".pdf")
+
+
+def _write_buffer_file(view: memoryview, in_memory: bool) -> str:
+    fd, path = _create_buffer_file(in_memory)
+    try:
+        try:
+            _write_all(fd, view)
+        finally:
+            os.close(fd)
+    except BaseException as e:
+        # No partial file is left behind
+        os.remove(path)
+        # /dev/shm is small in containers, 64MB by default with Docker
+        if (
+            isinstance(e, OSError)
+            and e.errno == errno.ENOSPC
+            and os.path.dirname(path) == SHARED_MEMORY_DIR
+        ):
+            logging.warning(
+                f"{SHARED_MEMORY_DIR} is full, writing the PDF to a temporary file on disk"
+            )
+            return _write_buffer_file(view, in_memory=False)
+        raise
+    return path
+
+
+@contextmanager
+def pdf_buffer_path(pdf_buffer: PdfBuffer, in_memory: bool = True) -> Iterator[str]:
+    """
+    Exposes a PDF buffer as a file path for converters that only open paths.
+
+    The buffer is written once, without intermediate copies, to a file in /dev/shm, and to
+    a temporary file on disk when in_memory is False, /dev/shm is not available or it is full.
+
+    Args:
+        pdf_buffer (PdfBuffer): PDF data as bytes, bytearray, memoryview or BytesIO buffer.
+        in_memory (bool): Use a RAM-backed file instead of a temporary file on disk.
+
+    Yields:
+        str: Path of the PDF, valid until the context exits.
+    """
+    with pdf_buffer_view(pdf_buffer) as view:
+        path = _write_buffer_file(view, in_memory)
+    try:
+        yield path
+    finally:
+        # Clean up the temporary file
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def convert_pdf_buffer(
+    convert: PdfConverterFunction,
+    pdf_buffer: PdfBuffer,
+    in_memory: bool = True,
+    page_range: Optional[Sequence[int]] = None,
+) -> Dict[str, Any]:
+    with pdf_buffer_path(pdf_buffer, in_memory=in_memory) as pdf_path:
+        if page_range is None:
+            return convert(pdf_path)
+        return convert(pdf_path, page_range=page_range)
+
 
 # Runks the marker locally to process a PDF buffer and return the rendered version
-def marker_load(pdf_buffer: Union[bytes, BytesIO]) -> Dict[str, Any]:
+def marker_load(
+    pdf_buffer: PdfBuffer,
+    pool: Optional["MarkerWorkerPool"] = None,
+    pages_per_range: Optional[int] = None,
+) -> Dict[str, Any]:
     """
     Processes a PDF from a buffer and returns the rendered version.
-    Creates a temporary file for processing and deletes it afterward.
+    The buffer is handed to marker through an in-memory file (see pdf_buffer_path).
 
     Args:
-        pdf_buffer (Union[bytes, BytesIO]): PDF data as either bytes or BytesIO buffer.
+        pdf_buffer (PdfBuffer): PDF data as bytes, memoryview or BytesIO buffer.
+        pool (Optional[MarkerWorkerPool]): Warm worker pool converting the PDF, None to
+            convert in this process with models loaded on the first call.
+        pages_per_range (Optional[int]): Pages of the ranges converted in parallel by the
+            pool workers then stitched, None to convert the PDF in one piece.
 
     Returns:
         Dict[str, Any]: A dictionary containing the rendered PDF's markdown,
                         images, and metadata.
     """
-    # Create the artifact dictionary
-    artifact_dict = create_model_dict()
+    if pages_per_range and pool is None:
+        raise ValueError("Page ranges are converted in parallel by a worker pool")
+    if pool is not None:
+        if pages_per_range:
+            return pool.convert_pages(pdf_buffer, pages_per_range)
+        return pool.convert(pdf_buffer)
 
-    # Initialize PdfConverter with the artifact_dict
-    converter = PdfConverter(artifact_dict=artifact_dict)
+    return convert_pdf_buffer(get_marker_converter(), pdf_buffer)
 
-    # Create a temporary file and write the buffer contents to it
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
-        # Handle both bytes and BytesIO inputs
-        content = (
-            pdf_buffer.getvalue() if isinstance(pdf_buffer, BytesIO) else pdf_buffer
-        )
-        temp_file.write(content)
-        temp_path = temp_file.name
 
-    try:
-        # Convert the PDF using the temporary file path
-        rendered = converter(temp_path)
-    finally:
-        # Clean up the temporary file
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-
-    # Return the full rendered version as a dictionary
-    return {
-        "markdown": rendered.markdown,
-        "images": rendered.images,
-        "metadata": rendered.metadata,
-    }
+def marker_load_ranges(
+    pdf_buffer: PdfBuffer,
+    page_ranges: Sequence[Sequence[int]],
+    pool: Optional["MarkerWorkerPool"] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Processes 0-based page ranges of a PDF, one rendered version per range, in order.
+
+    Args:
+        pdf_buffer (PdfBuffer): PDF data as bytes, memoryview or BytesIO buffer.
+        page_ranges (Sequence[Sequence[int]]): Pages of each range.
+        pool (Optional[MarkerWorkerPool]): Warm worker pool converting the ranges in
+            parallel, None to convert them in this process one after the other.
+
+    Returns:
+        List[Dict[str, Any]]: Markdown, images and metadata of each range.
+    """
+    if pool is not None:
+        return pool.convert_ranges(pdf_buffer, page_ranges)
+
+    convert = get_marker_converter()
+    return [
+        convert_pdf_buffer(convert, pdf_buffer, page_range=page_range)
+        for page_range in page_ranges
+    ]
@@ -0,0 +1,301 @@
+from collections import defaultdict, deque
+from io import BytesIO
+import math
+import re
+from typing import Any, Deque, Dict, List, Optional
+
+from packages.framework.document_loaders.marker_loader import PdfBuffer
+
+# HERE LIES THE SPLITTING OF A PDF INTO PAGE RANGES AND THE STITCHING OF THEIR MARKDOWN
+# Ranges are converted separately (see MarkerWorkerPool.convert_pages), tables and paragraphs cut by a
+# range boundary are joined back, and heading levels are recomputed over the whole document
+# ----------------------------
+
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*)$")
+TABLE_ROW_PATTERN = re.compile(r"^\s*\|")
+TABLE_SEPARATOR_PATTERN = re.compile(
+    r"^\s*\|?\s*:?-{3,}:?\s*(?:\|\s*:?-{3,}:?\s*)*\|?\s*$"
+)
+HTML_TAG_PATTERN = re.compile(r"<[^>]+>")
+# Separator of the pages of a paginated marker output: the 0-based page, e.g. "{3}", and 48 dashes
+PAGE_SEPARATOR_PATTERN = re.compile(r"\n*\{(\d+)\}-{48}\n*")
+IMAGE_PAGE_PATTERN = re.compile(r"_page_(\d+)_")
+NON_WORD_PATTERN = re.compile(r"[\W_]+")
+
+# Marker levels headings when a document has more headings than levels, see SectionHeaderProcessor
+HEADING_LEVEL_COUNT = 4
+# Headings whose heights are within this ratio share a level
+HEADING_HEIGHT_TOLERANCE = 0.1
+# Characters ending a sentence, a range ending otherwise is continued by the next one
+SENTENCE_END_CHARACTERS = ".!?:)]\"'*`$"
+
+
+def count_pdf_pages(pdf_buffer: PdfBuffer) -> int:
+    # pypdfium2 comes with marker, it reads bytes and files in place
+    import pypdfium2 as pdfium
+
+    source = (
+        pdf_buffer if isinstance(pdf_buffer, (bytes, BytesIO)) else bytes(pdf_buffer)
+    )
+    document = pdfium.PdfDocument(source)
+    try:
+        return len(document)
+    finally:
+        document.close()
+
+
+def extract_pdf_pages(pdf_buffer: PdfBuffer, pages: List[int]) -> bytes:
+    """Returns a PDF of the given 0-based pages, for converters taking whole PDFs only."""
+    import pypdfium2 as pdfium
+
+    source = (
+        pdf_buffer if isinstance(pdf_buffer, (bytes, BytesIO)) else bytes(pdf_buffer)
+    )
+    document = pdfium.PdfDocument(source)
+    subset = pdfium.PdfDocument.new()
+    try:
+        subset.import_pages(document, pages)
+        buffer = BytesIO()
+        subset.save(buffer)
+        return buffer.getvalue()
+    finally:
+        subset.close()
+        document.close()
+
+
+def split_paginated_render(
+    render: Dict[str, Any], page_ranges: List[List[int]]
+) -> List[Dict[str, Any]]:
+    """
+    Splits the paginated render of a PDF of the given page ranges back into one render per range.
+
+    The PDF holds the pages of the ranges one after the other (see extract_pdf_pages), the
+    markdown of each range is stitched from its pages, and the page ids of the metadata are
+    mapped back to the pages of the original PDF.
+
+    Args:
+        render (Dict[str, Any]): Markdown, images and metadata of the PDF, converted with pagination
+        page_ranges (List[List[int]]): 0-based pages of each range in the original PDF
+
+    Returns:
+        List[Dict[str, Any]]: Markdown, images and metadata of each range, in the same order
+    """
+    pages = [page for page_range in page_ranges for page in page_range]
+    # Range of each page of the converted PDF
+    range_indexes = [
+        index for index, page_range in enumerate(page_ranges) for _ in page_range
+    ]
+    renders = [
+        {
+            "markdown": [],
+            "images": {},
+            "metadata": {"table_of_contents": [], "page_stats": []},
+        }
+        for _ in page_ranges
+    ]
+
+    # Split gives the text before the first separator, then each page number and its text
+    parts = PAGE_SEPARATOR_PATTERN.split(render["markdown"])
+    for page_id, markdown in zip(parts[1::2], parts[2::2]):
+        if int(page_id) < len(pages):
+            renders[range_indexes[int(page_id)]]["markdown"].append(markdown)
+    for name, image in (render.get("images") or {}).items():
+        match = IMAGE_PAGE_PATTERN.search(name)
+        page_id = int(match.group(1)) if match else 0
+        renders[range_indexes[min(page_id, len(pages) - 1)]]["images"][name] = image
+    metadata = render.get("metadata") or {}
+    for key in ("table_of_contents", "page_stats"):
+        for entry in metadata.get(key) or []:
+            page_id = entry.get("page_id", 0)
+            if page_id < len(pages):
+                entry = {**entry, "page_id": pages[page_id]}
+            renders[range_indexes[min(page_id, len(pages) - 1)]]["metadata"][
+                key
+            ].append(entry)
+
+    for range_render in renders:
+        range_render["markdown"] = stitch_markdown(range_render["markdown"])
+    return renders
+
+
+def split_page_ranges(page_count: int, pages_per_range: int) -> List[List[int]]:
+    # Ranges of about the same size, 10 pages in ranges of 4 are 4, 3 and 3 pages
+    num_ranges = max(1, math.ceil(page_count / pages_per_range))
+    size, extra = divmod(page_count, num_ranges)
+    ranges, start = [], 0
+    for i in range(num_ranges):
+        # The first ranges take one of the remaining pages each
+        end = start + size + (1 if i < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+def _table_cells(row: str) -> List[str]:
+    return [cell.strip() for cell in row.strip().strip("|").split("|")]
+
+
+def _join_table(previous: str, following: str) -> Optional[str]:
+    """Continues the table ending previous with the table starting following, or returns None."""
+    # The last block of previous, all of it for a single block
+    start = previous.rfind("\n\n")
+    previous_rows = (previous[start + 2 :] if start >= 0 else previous).split("\n")
+    following_rows = following.split("\n", 2)
+    if (
+        not all(TABLE_ROW_PATTERN.match(row) for row in previous_rows)
+        or len(following_rows) < 2
+        or not TABLE_ROW_PATTERN.match(following_rows[0])
+        or not TABLE_SEPARATOR_PATTERN.match(following_rows[1])
+    ):
+        return None
+
+    header = _table_cells(previous_rows[0])
+    following_header = _table_cells(following_rows[0])
+    if len(header) != len(following_header):
+        return None
+
+    # Marker gives the continued table a header row, a repeated header is dropped, otherwise it is data
+    rows = [] if following_header == header else [following_rows[0]]
+    rest = following_rows[2] if len(following_rows) > 2 else ""
+    return "\n".join([previous] + rows + ([rest] if rest else []))
+
+
+def _continues_paragraph(previous: str, following: str) -> bool:
+    last_line = previous[previous.rfind("\n") + 1 :]
+    return (
+        bool(last_line)
+        and not HEADING_PATTERN.match(last_line)
+        and not TABLE_ROW_PATTERN.match(last_line)
+        and last_line[-1] not in SENTENCE_END_CHARACTERS
+        and following[0].islower()
+    )
+
+
+def stitch_markdown(parts: List[str]) -> str:
+    """
+    Joins the markdown of consecutive page ranges, in order.
+
+    A table cut by a range boundary is continued (its repeated header row dropped), and a
+    paragraph cut mid-sentence is joined with a space, other parts are separated by a blank line.
+
+    Args:
+        parts (List[str]): Markdown of the page ranges, in page order
+
+    Returns:
+        str: Markdown of the whole document
+    """
+    markdown = ""
+    for part in parts:
+        part = part.strip()
+        if not part:
+            continue
+        if not markdown:
+            markdown = part
+            continue
+
+        table = _join_table(markdown, part)
+        if table is not None:
+            markdown = table
+        elif _continues_paragraph(markdown, part):
+            markdown = f"{markdown} {part}"
+        else:
+            markdown = f"{markdown}\n\n{part}"
+    return markdown
+
+
+def normalize_heading(text: str) -> str:
+    return NON_WORD_PATTERN.sub("", HTML_TAG_PATTERN.sub("", text)).lower()
+
+
+def _heading_height(entry: Dict[str, Any]) -> float:
+    # Height of the heading box, close to the font size for single-line headings
+    ys = [point[1] for point in entry.get("polygon") or []]
+    return max(ys) - min(ys) if ys else 0.0
+
+
+def heading_levels(heights: List[float]) -> Dict[float, int]:
+    """Maps heading heights to levels, the tallest headings are level 1."""
+    levels: Dict[float, int] = {}
+    level, level_height = 0, None
+    for height in sorted(set(heights), reverse=True):
+        if (
+            level_height is None
+            or height < level_height * (1 - HEADING_HEIGHT_TOLERANCE)
+        ):
+            level, level_height = min(level + 1, HEADING_LEVEL_COUNT), height
+        levels[height] = level
+    return levels
+
+
+def relevel_headings(renders: List[Dict[str, Any]]) -> List[str]:
+    """
+    Recomputes the heading levels of the page ranges over the whole document.
+
+    Marker levels headings per conversion, a range with few headings gets the default level for
+    all of them. Heights come from the table of contents of each range, headings are matched to
+    the markdown by their text.
+
+    Returns:
+        List[str]: Markdown of each range with the document heading levels
+    """
+    entries = [
+        entry
+        for render in renders
+        for entry in (render.get("metadata") or {}).get("table_of_contents") or []
+        if _heading_height(entry) > 0
+    ]
+    # Like marker, few headings all keep the default level
+    if len(entries) <= HEADING_LEVEL_COUNT:
+        return [render["markdown"] for render in renders]
+
+    levels = heading_levels([_heading_height(entry) for entry in entries])
+    markdowns = []
+    for render in renders:
+        titles: Dict[str, Deque[int]] = defaultdict(deque)
+        for entry in (render.get("metadata") or {}).get("table_of_contents") or []:
+            if _heading_height(entry) > 0:
+                # The stitched table of contents gets the document levels too
+                level = levels[_heading_height(entry)]
+                entry["heading_level"] = level
+                titles[normalize_heading(entry.get("title") or "")].append(level)
+
+        lines = render["markdown"].split("\n")
+        for i, line in enumerate(lines):
+            match = HEADING_PATTERN.match(line)
+            if match:
+                title_levels = titles.get(normalize_heading(match.group(2)))
+                if title_levels:
+                    lines[i] = f"{'#' * title_levels.popleft()} {match.group(2)}"
+        markdowns.append("\n".join(lines))
+    return markdowns
+
+
+def stitch_renders(renders: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Stitches the rendered page ranges of a PDF into one rendered document.
+
+    Args:
+        renders (List[Dict[str, Any]]): Markdown, images and metadata of each range, in page order
+
+    Returns:
+        Dict[str, Any]: Markdown, images and metadata of the whole document
+    """
+    markdown = stitch_markdown(relevel_headings(renders))
+    images: Dict[str, Any] = {}
+    table_of_contents, page_stats = [], []
+    for render in renders:
+        # Image names carry their page number, they are unique across ranges
+        images.update(render.get("images") or {})
+        metadata = render.get("metadata") or {}
+        table_of_contents.extend(metadata.get("table_of_contents") or [])
+        page_stats.extend(metadata.get("page_stats") or [])
+
+    return {
+        "markdown": markdown,
+        "images": images,
+        "metadata": {
+            "table_of_contents": table_of_contents,
+            "page_stats": page_stats,
+            "page_ranges": len(renders),
+        },
+    }
@@ -0,0 +1,451 @@
+import asyncio
+from concurrent.futures import Future
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from typing_extensions import TypedDict
+
+from packages.framework.document_loaders.marker_loader import (
+    PdfBuffer,
+    PdfConverterFunction,
+    convert_pdf_buffer,
+    create_marker_converter,
+    pdf_buffer_view,
+)
+from packages.framework.document_loaders.marker_loader.stitching import (
+    count_pdf_pages,
+    split_page_ranges,
+    stitch_renders,
+)
+
+# HERE LIES A POOL OF LONG-LIVED PROCESSES CONVERTING PDFS WITH MARKER
+# Each worker loads the marker models once and converts PDFs sent over its pipe, it is replaced by a
+# fresh one after max_documents_per_worker conversions or when its peak RSS goes past max_worker_rss_mb
+# ----------------------------
+
+
+# Future, PDF view, page range and submission time of a queued PDF
+PdfTask = Tuple[Future, memoryview, Optional[List[int]], float]
+
+
+class MarkerPoolStats(TypedDict):
+    workers: int
+    documents: int  # Converted PDFs, a PDF converted in page ranges counts once
+    page_ranges: int  # Converted page ranges of the PDFs split by convert_pages
+    failures: int  # Failed conversions, including workers dying mid-conversion
+    pages: int  # Pages of the converted PDFs, from the marker page stats
+    recycled_workers: int  # Workers replaced after their documents or memory limit
+    model_load_seconds: float  # Total model loading time of the started workers
+    conversion_seconds: float  # Total conversion time in the workers
+    queue_seconds: float  # Total time PDFs waited for a free worker
+    uptime_seconds: float
+    documents_per_minute: float
+    pages_per_minute: float
+
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Not available on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _worker_main(
+    connection,
+    converter_factory: Callable[[], PdfConverterFunction],
+    max_rss_mb: Optional[float],
+    max_documents: Optional[int],
+    threads: Optional[int],
+):
+    # Runs in the worker process, the models are loaded once for every PDF it converts
+    if threads:
+        # Set before torch is imported by the factory, workers do not fight over the cores
+        os.environ["OMP_NUM_THREADS"] = str(threads)
+        os.environ["MKL_NUM_THREADS"] = str(threads)
+    start = time.monotonic()
+    try:
+        convert = converter_factory()
+    except Exception as error:
+        connection.send(("error", f"{type(error).__name__}: {error}", 0.0, False))
+        return
+    connection.send(("ready", None, time.monotonic() - start, False))
+
+    documents = 0
+    while True:
+        # Each PDF is a header with its page range then the raw bytes, None stops the worker
+        try:
+            task = connection.recv()
+            if task is None:
+                return
+            pdf_bytes = connection.recv_bytes()
+        except EOFError:
+            return
+
+        start = time.monotonic()
+        try:
+            status, payload = "done", convert_pdf_buffer(
+                convert, pdf_bytes, page_range=task["page_range"]
+            )
+        except Exception as error:
+            status, payload = "error", f"{type(error).__name__}: {error}"
+        documents += 1
+
+        rss_mb = peak_rss_mb()
+        recycle = bool(
+            (max_documents and documents >= max_documents)
+            or (max_rss_mb and rss_mb is not None and rss_mb > max_rss_mb)
+        )
+        connection.send((status, payload, time.monotonic() - start, recycle))
+        if recycle:
+            return
+
+
+class MarkerWorkerPool:
+    """A pool of worker processes keeping the marker models loaded between PDFs.
+
+    Workers are started with the pool and load the models once, then convert the PDFs
+    submitted to the pool in order, one at a time each. A worker is replaced by a fresh
+    one after `max_documents_per_worker` conversions or when its peak RSS goes past
+    `max_worker_rss_mb`, and when it dies mid-conversion (the PDF fails). Conversion
+    counts and times are available with `stats`.
+
+    `convert_pages` splits a PDF into page ranges converted in parallel by the workers,
+    then stitches their markdown back together in page order.
+
+    Example:
+        .. code-block:: python
+
+            with MarkerWorkerPool(num_workers=2, max_worker_rss_mb=8000) as pool:
+                futures = [pool.submit(pdf_bytes) for pdf_bytes in pdfs]
+                markdowns = [future.result()["markdown"] for future in futures]
+                print(pool.stats())
+
+            # A long PDF converted in ranges of 8 pages by the two workers
+            with MarkerWorkerPool(num_workers=2, threads_per_worker=4) as pool:
+                markdown = pool.convert_pages(pdf_bytes, pages_per_range=8)["markdown"]
+    """
+
+    def __init__(
+        self,
+        num_workers: int = 1,
+        max_worker_rss_mb: Optional[float] = None,
+        max_documents_per_worker: Optional[int] = None,
+        converter_factory: Callable[
+            [], PdfConverterFunction
+        ] = create_marker_converter,
+        start_timeout: Optional[float] = None,
+        threads_per_worker: Optional[int] = None,
+    ):
+        """
+        Args:
+            num_workers (int): Worker processes, each one holds its own copy of the models.
+            max_worker_rss_mb (Optional[float]): Peak RSS after which a worker is replaced, None for no limit.
+            max_documents_per_worker (Optional[int]): Conversions after which a worker is replaced, None for no limit.
+            converter_factory (Callable): Picklable function loading the models in a worker and returning the converter.
+            start_timeout (Optional[float]): Seconds to wait for a worker to load the models, None to wait forever.
+            threads_per_worker (Optional[int]): Torch threads of each worker, None for the torch default (every core).
+        """
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1")
+
+        self.num_workers = num_workers
+        self.max_worker_rss_mb = max_worker_rss_mb
+        self.max_documents_per_worker = max_documents_per_worker
+        self.converter_factory = converter_factory
+        self.start_timeout = start_timeout
+        self.threads_per_worker = threads_per_worker
+
+        # Torch does not survive a fork, workers are spawned
+        self._context = multiprocessing.get_context("spawn")
+        self._tasks: "queue.Queue[Optional[PdfTask]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._started_at = time.monotonic()
+        self._stats = {
+            "documents": 0,
+            "page_ranges": 0,
+            "failures": 0,
+            "pages": 0,
+            "recycled_workers": 0,
+            "model_load_seconds": 0.0,
+            "conversion_seconds": 0.0,
+            "queue_seconds": 0.0,
+        }
+
+        # One thread per worker process feeds it the queued PDFs and restarts it when needed
+        self._threads: List[threading.Thread] = [
+            threading.Thread(
+                target=self._run_worker, name=f"marker-worker-{i}", daemon=True
+            )
+            for i in range(num_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _add_stats(self, **values: float) -> None:
+        with self._lock:
+            for key, value in values.items():
+                self._stats[key] += value
+
+    def _start_worker(self):
+        parent_connection, child_connection = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(
+                child_connection,
+                self.converter_factory,
+                self.max_worker_rss_mb,
+                self.max_documents_per_worker,
+                self.threads_per_worker,
+            ),
+            daemon=True,
+        )
+        process.start()
+        # The parent keeps its end only, a dead worker then reads as EOFError
+        child_connection.close()
+
+        try:
+            if not parent_connection.poll(self.start_timeout):
+                raise TimeoutError(
+                    f"Marker worker did not load the models in "
+                    f"{self.start_timeout} seconds"
+                )
+            status, error, load_seconds, _ = parent_connection.recv()
+        except BaseException:
+            self._stop_worker(process, parent_connection)
+            raise
+        if status != "ready":
+            self._stop_worker(process, parent_connection)
+            raise RuntimeError(f"Marker worker failed to load the models: {error}")
+
+        self._add_stats(model_load_seconds=load_seconds)
+        logging.info(
+            f"Marker worker {process.pid} loaded the models in {load_seconds:.1f}s"
+        )
+        return process, parent_connection
+
+    def _stop_worker(self, process, connection, timeout: float = 10.0) -> None:
+        try:
+            connection.send(None)
+        except (BrokenPipeError, EOFError, OSError):
+            pass
+        process.join(timeout)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+        connection.close()
+
+    def _run_worker(self) -> None:
+        worker = None
+        while True:
+            # Warm up before the next PDF arrives, a failed start is retried on the next PDF
+            if worker is None:
+                try:
+                    worker = self._start_worker()
+                except Exception as error:
+                    logging.error(f"Marker worker failed to start: {error}")
+
+            task = self._tasks.get()
+            if task is None:
+                if worker is not None:
+                    self._stop_worker(*worker)
+                return
+
+            future, pdf_view, page_range, submitted_at = task
+            # The view is released once converted, BytesIO buffers can be resized again
+            with pdf_view:
+                worker = self._convert(
+                    worker, future, pdf_view, page_range, submitted_at
+                )
+
+    def _convert(
+        self,
+        worker,
+        future: Future,
+        pdf_view: memoryview,
+        page_range: Optional[List[int]],
+        submitted_at: float,
+    ):
+        """Converts one PDF with the worker, returns the worker for the next one."""
+        if not future.set_running_or_notify_cancel():
+            return worker
+        if worker is None:
+            try:
+                worker = self._start_worker()
+            except Exception as error:
+                self._add_stats(failures=1)
+                future.set_exception(error)
+                return None
+
+        process, connection = worker
+        self._add_stats(queue_seconds=time.monotonic() - submitted_at)
+        try:
+            # Raw bytes from the view, the PDF is not pickled
+            connection.send({"page_range": page_range})
+            connection.send_bytes(pdf_view)
+            status, payload, seconds, recycle = connection.recv()
+        except (BrokenPipeError, EOFError, OSError):
+            # The worker died, e.g. killed for its memory, it is replaced on the next loop
+            self._stop_worker(process, connection)
+            self._add_stats(failures=1)
+            future.set_exception(
+                RuntimeError(
+                    f"Marker worker {process.pid} exited with code "
+                    f"{process.exitcode} while converting"
+                )
+            )
+            return None
+
+        # Stats are updated before the caller gets the result
+        if recycle:
+            self._add_stats(recycled_workers=1)
+        if status == "done":
+            pages = len((payload.get("metadata") or {}).get("page_stats") or [])
+            # Ranges of a PDF count as one document once stitched, see convert_pages
+            self._add_stats(
+                pages=pages,
+                conversion_seconds=seconds,
+                **({"documents": 1} if page_range is None else {"page_ranges": 1}),
+            )
+            future.set_result(payload)
+        else:
+            self._add_stats(failures=1, conversion_seconds=seconds)
+            future.set_exception(RuntimeError(f"Marker conversion failed: {payload}"))
+
+        if recycle:
+            logging.info(f"Recycling marker worker {process.pid}")
+            self._stop_worker(process, connection)
+            return None
+        return worker
+
+    def submit(
+        self, pdf_buffer: PdfBuffer, page_range: Optional[Sequence[int]] = None
+    ) -> "Future[Dict[str, Any]]":
+        """Queues a PDF, or its 0-based pages in page_range, for the next free worker.
+        The future resolves to the markdown, images and metadata of the PDF.
+
+        The buffer is not copied, it must not change until the future resolves (a
+        BytesIO cannot be resized until then)."""
+        future: "Future[Dict[str, Any]]" = Future()
+        task = (
+            future,
+            pdf_buffer_view(pdf_buffer),
+            list(page_range) if page_range is not None else None,
+            time.monotonic(),
+        )
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The marker worker pool is closed")
+            self._tasks.put(task)
+        return future
+
+    def convert(self, pdf_buffer: PdfBuffer) -> Dict[str, Any]:
+        return self.submit(pdf_buffer).result()
+
+    async def aconvert(self, pdf_buffer: PdfBuffer) -> Dict[str, Any]:
+        return await asyncio.wrap_future(self.submit(pdf_buffer))
+
+    def _submit_pages(
+        self, pdf_buffer: PdfBuffer, pages_per_range: int
+    ) -> List["Future[Dict[str, Any]]"]:
+        if pages_per_range < 1:
+            raise ValueError("pages_per_range must be at least 1")
+        page_ranges = split_page_ranges(count_pdf_pages(pdf_buffer), pages_per_range)
+        if len(page_ranges) == 1:
+            return [self.submit(pdf_buffer)]
+        return [self.submit(pdf_buffer, page_range) for page_range in page_ranges]
+
+    def _gather(self, futures: List["Future[Dict[str, Any]]"]) -> List[Dict[str, Any]]:
+        try:
+            return [future.result() for future in futures]
+        finally:
+            # A failed range fails the PDF, the ranges still queued are dropped
+            for future in futures:
+                future.cancel()
+
+    def convert_ranges(
+        self, pdf_buffer: PdfBuffer, page_ranges: Sequence[Sequence[int]]
+    ) -> List[Dict[str, Any]]:
+        """Converts 0-based page ranges of a PDF in parallel on the free workers, the
+        renders are returned in the order of the ranges, without stitching."""
+        return self._gather(
+            [self.submit(pdf_buffer, page_range) for page_range in page_ranges]
+        )
+
+    def _stitch(self, renders: List[Dict[str, Any]]) -> Dict[str, Any]:
+        if len(renders) == 1:
+            return renders[0]
+        self._add_stats(documents=1)
+        return stitch_renders(renders)
+
+    def convert_pages(
+        self, pdf_buffer: PdfBuffer, pages_per_range: int
+    ) -> Dict[str, Any]:
+        """
+        Converts a PDF in ranges of about pages_per_range pages, in parallel on the free
+        workers, and stitches their markdown back together in page order.
+
+        Tables and paragraphs cut by a range boundary are joined back, and heading
+        levels are recomputed over the whole document (see stitch_renders). PDFs of a
+        single range are converted in one piece.
+
+        Args:
+            pdf_buffer (PdfBuffer): PDF data as bytes, memoryview or BytesIO buffer.
+            pages_per_range (int): Pages of each range, ranges are about the same size.
+
+        Returns:
+            Dict[str, Any]: Markdown, images and metadata of the whole PDF
+        """
+        return self._stitch(
+            self._gather(self._submit_pages(pdf_buffer, pages_per_range))
+        )
+
+    async def aconvert_pages(
+        self, pdf_buffer: PdfBuffer, pages_per_range: int
+    ) -> Dict[str, Any]:
+        futures = self._submit_pages(pdf_buffer, pages_per_range)
+        try:
+            renders = await asyncio.gather(
+                *(asyncio.wrap_future(future) for future in futures)
+            )
+        finally:
+            for future in futures:
+                future.cancel()
+        return self._stitch(list(renders))
+
+    def stats(self) -> MarkerPoolStats:
+        with self._lock:
+            stats = dict(self._stats)
+        uptime = time.monotonic() - self._started_at
+        return MarkerPoolStats(
+            workers=self.num_workers,
+            uptime_seconds=uptime,
+            documents_per_minute=stats["documents"] * 60 / uptime if uptime else 0.0,
+            pages_per_minute=stats["pages"] * 60 / uptime if uptime else 0.0,
+            **stats,
+        )
+
+    def close(self) -> None:
+        """Converts the PDFs already queued, then stops the workers."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            for _ in self._threads:
+                self._tasks.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def __enter__(self) -> "MarkerWorkerPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,266 @@
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+from langchain_core.rate_limiters import BaseRateLimiter
+
+from packages.framework.callbacks.run_profiler import (
+    LLM_RATE_LIMIT_WAIT_EVENT,
+    areport_event,
+    report_event,
+)
+
+# Buckets shared by every process of the user, whatever their working directory
+DEFAULT_RATE_LIMIT_PATH = os.path.join(
+    os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "papers_scanner",
+    "llm_rate_limits.sqlite",
+)
+
+# Estimated tokens of the request about to acquire the limiter, set by the caller around the model call
+requested_tokens: ContextVar[int] = ContextVar("requested_tokens", default=0)
+
+
+@contextmanager
+def rate_limited_tokens(tokens: int) -> Iterator[None]:
+    reset_token = requested_tokens.set(tokens)
+    try:
+        yield
+    finally:
+        requested_tokens.reset(reset_token)
+
+
+class SQLiteTokenBucketRateLimiter(BaseRateLimiter):
+    """A token bucket rate limiter shared by every thread and process using the same SQLite file.
+
+    One bucket of requests and one bucket of tokens are kept per name (e.g. the model name),
+    refilled continuously at `requests_per_minute` and `tokens_per_minute`. Each acquisition
+    takes one request and the tokens set with `rate_limited_tokens` (0 when unset). Waiting
+    callers poll the buckets, so queued time is recorded in shared counters (see `stats`).
+
+    Example:
+        .. code-block:: python
+
+            limiter = SQLiteTokenBucketRateLimiter(
+                DEFAULT_RATE_LIMIT_PATH, "gemini-1.5-flash-002", requests_per_minute=60
+            )
+            model = ChatVertexAI(model_name="gemini-1.5-flash-002", rate_limiter=limiter)
+            with rate_limited_tokens(1200):
+                model.invoke("...")
+    """
+
+    def __init__(
+        self,
+        database_path: str,
+        name: str,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        burst_seconds: float = 60.0,
+        max_poll_seconds: float = 1.0,
+        timeout: float = 30.0,
+    ):
+        """
+        Args:
+            database_path (str): Path of the SQLite file coordinating the processes, created if missing.
+            name (str): Name of the buckets, limiters with the same name share them.
+            requests_per_minute (Optional[float]): Requests allowed per minute, None for no limit.
+            tokens_per_minute (Optional[float]): Tokens allowed per minute, None for no limit.
+            burst_seconds (float): Seconds of allowance a full bucket holds.
+            max_poll_seconds (float): Longest sleep between two attempts of a waiting caller.
+            timeout (float): Seconds to wait for a lock held by another process.
+        """
+        self.database_path = database_path
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.burst_seconds = burst_seconds
+        self.max_poll_seconds = max_poll_seconds
+        self.timeout = timeout
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(database_path) or ".", exist_ok=True)
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS buckets (
+                    name TEXT PRIMARY KEY,
+                    requests REAL NOT NULL,
+                    tokens REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS wait_stats (
+                    name TEXT PRIMARY KEY,
+                    acquired INTEGER NOT NULL DEFAULT 0,
+                    waited INTEGER NOT NULL DEFAULT 0,
+                    wait_seconds REAL NOT NULL DEFAULT 0
+                )
+                """
+            )
+            # New buckets start full
+            connection.execute(
+                "INSERT OR IGNORE INTO buckets (name, requests, tokens, updated_at) VALUES (?, ?, ?, ?)",
+                (
+                    name,
+                    self._capacity(requests_per_minute),
+                    self._capacity(tokens_per_minute),
+                    time.time(),
+                ),
+            )
+            connection.execute(
+                "INSERT OR IGNORE INTO wait_stats (name) VALUES (?)", (name,)
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread, SQLite connections must not be shared between threads
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.database_path, timeout=self.timeout, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def _capacity(self, per_minute: Optional[float]) -> float:
+        return per_minute * self.burst_seconds / 60 if per_minute else 0.0
+
+    def _try_acquire(self, tokens: int) -> Tuple[bool, float]:
+        """Takes one request and the tokens if available, otherwise returns the seconds to wait."""
+        connection = self._connection()
+        now = time.time()
+
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            requests_level, tokens_level, updated_at = connection.execute(
+                "SELECT requests, tokens, updated_at FROM buckets WHERE name = ?",
+                (self.name,),
+            ).fetchone()
+            elapsed = max(0.0, now - updated_at)
+
+            wait_seconds = 0.0
+            levels = []
+            for level, per_minute, needed in [
+                (requests_level, self.requests_per_minute, 1),
+                (tokens_level, self.tokens_per_minute, tokens),
+            ]:
+                if not per_minute:
+                    levels.append(level)
+                    continue
+                capacity = self._capacity(per_minute)
+                rate = per_minute / 60
+                level = min(capacity, level + elapsed * rate)
+                # Requests larger than the bucket only wait for a full bucket
+                needed = min(needed, capacity)
+                if level < needed:
+                    wait_seconds = max(wait_seconds, (needed - level) / rate)
+                levels.append(level - needed)
+
+            if wait_seconds > 0:
+                return False, wait_seconds
+
+            connection.execute(
+                "UPDATE buckets SET requests = ?, tokens = ?, updated_at = ? WHERE name = ?",
+                (levels[0], levels[1], now, self.name),
+            )
+            return True, 0.0
+
+    def _record(self, waited_seconds: float) -> None:
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "UPDATE wait_stats SET acquired = acquired + 1, waited = waited + ?, wait_seconds = wait_seconds + ? WHERE name = ?",
+                (1 if waited_seconds > 0 else 0, waited_seconds, self.name),
+            )
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        tokens = requested_tokens.get()
+        start = time.monotonic()
+        while True:
+            acquired, wait_seconds = self._try_acquire(tokens)
+            if acquired:
+                waited_seconds = time.monotonic() - start
+                self._record(waited_seconds)
+                report_event(LLM_RATE_LIMIT_WAIT_EVENT, {"seconds": waited_seconds})
+                return True
+            if not blocking:
+                return False
+            time.sleep(min(wait_seconds, self.max_poll_seconds))
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        tokens = requested_tokens.get()
+        start = time.monotonic()
+        while True:
+            # SQLite calls wait for the locks of other processes, they run off the event loop
+            acquired, wait_seconds = await asyncio.to_thread(self._try_acquire, tokens)
+            if acquired:
+                waited_seconds = time.monotonic() - start
+                await asyncio.to_thread(self._record, waited_seconds)
+                await areport_event(
+                    LLM_RATE_LIMIT_WAIT_EVENT, {"seconds": waited_seconds}
+                )
+                return True
+            if not blocking:
+                return False
+            await asyncio.sleep(min(wait_seconds, self.max_poll_seconds))
+
+    def stats(self) -> Dict[str, float]:
+        """Returns acquisitions, how many of them waited and the total queued seconds, shared by every process."""
+        acquired, waited, wait_seconds = (
+            self._connection()
+            .execute(
+                "SELECT acquired, waited, wait_seconds FROM wait_stats WHERE name = ?",
+                (self.name,),
+            )
+            .fetchone()
+        )
+        return {
+            "acquired": acquired,
+            "waited": waited,
+            "wait_seconds": wait_seconds,
+        }
+
+
+# Limiters of this process, one per database and name, so that every model instance shares the buckets.
+# The buckets are the same whatever the rates, a limiter asked again with other rates takes them.
+_rate_limiters: Dict[Tuple[str, str], SQLiteTokenBucketRateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(
+    database_path: str,
+    name: str,
+    requests_per_minute: Optional[float] = None,
+    tokens_per_minute: Optional[float] = None,
+) -> SQLiteTokenBucketRateLimiter:
+    with _rate_limiters_lock:
+        key = (os.path.abspath(database_path), name)
+        if key not in _rate_limiters:
+            _rate_limiters[key] = SQLiteTokenBucketRateLimiter(
+                database_path,
+                name,
+                requests_per_minute=requests_per_minute,
+                tokens_per_minute=tokens_per_minute,
+            )
+        limiter = _rate_limiters[key]
+        if (limiter.requests_per_minute, limiter.tokens_per_minute) != (
+            requests_per_minute,
+            tokens_per_minute,
+        ):
+            logging.info(
+                f"Rate limits of {name} changed to {requests_per_minute} requests "
+                f"and {tokens_per_minute} tokens per minute"
+            )
+            limiter.requests_per_minute = requests_per_minute
+            limiter.tokens_per_minute = tokens_per_minute
+        return limiter
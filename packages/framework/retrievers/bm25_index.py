@@ -0,0 +1,92 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, List
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """A small in-memory Okapi BM25 index, fully local and offline.
+
+    Documents can be added and replaced after the index is built, only their own terms
+    are re-indexed.
+
+    Example:
+        .. code-block:: python
+
+            index = BM25Index(["residual networks", "batch normalization"])
+            index.rank("deep residual learning")  # -> [0, 1]
+            index.add("residual connections")  # -> 2
+    """
+
+    def __init__(self, documents: List[str] = (), k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_frequencies: List[Counter] = []
+        self.lengths: List[int] = []
+        self.total_length = 0
+        # Positions of the documents containing each term, with the term frequency
+        self.postings: Dict[str, Dict[int, int]] = {}
+        for document in documents:
+            self.add(document)
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    @property
+    def average_length(self) -> float:
+        return self.total_length / len(self.lengths) if self.lengths else 0
+
+    def idf(self, term: str) -> float:
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.lengths) - df + 0.5) / (df + 0.5))
+
+    def _index(self, position: int, document: str) -> None:
+        tf = Counter(tokenize(document))
+        for term, frequency in tf.items():
+            self.postings.setdefault(term, {})[position] = frequency
+        self.term_frequencies[position] = tf
+        self.lengths[position] = sum(tf.values())
+        self.total_length += self.lengths[position]
+
+    def add(self, document: str) -> int:
+        """Adds a document and returns its position."""
+        position = len(self.lengths)
+        self.term_frequencies.append(Counter())
+        self.lengths.append(0)
+        self._index(position, document)
+        return position
+
+    def replace(self, position: int, document: str) -> None:
+        for term in self.term_frequencies[position]:
+            del self.postings[term][position]
+            if not self.postings[term]:
+                del self.postings[term]
+        self.total_length -= self.lengths[position]
+        self._index(position, document)
+
+    def scores(self, query: str) -> List[float]:
+        # Only the documents containing a query term are scored
+        scores = [0.0] * len(self.lengths)
+        average_length = self.average_length or 1
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for position, frequency in postings.items():
+                norm = self.k1 * (
+                    1 - self.b + self.b * self.lengths[position] / average_length
+                )
+                scores[position] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return scores
+
+    def rank(self, query: str) -> List[int]:
+        """Returns document positions sorted by decreasing relevance to the query."""
+        scores = self.scores(query)
+        return sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
@@ -0,0 +1,138 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class ChunkStore:
+    """A content-addressed store of chunk texts, resolved by chunk id.
+
+    Texts are stored once per content hash and chunk ids point to their hash, so
+    graph states, checkpoints and `Send` payloads only need to carry chunk ids.
+    Texts live in memory; when a spill directory is given, the least recently
+    added texts are written to disk once the in-memory size exceeds
+    `max_memory_bytes`. References are always written to the spill directory,
+    and texts put with `durable=True` are written at once, so a store opened on
+    the same directory resolves the chunks of a previous process (e.g. when
+    resuming a checkpointed run).
+
+    Example:
+        .. code-block:: python
+
+            store = ChunkStore(spill_directory=".chunks", max_memory_bytes=64 * 1024 * 1024)
+            store.put("chunk-1", "## Introduction ...")
+            store.get("chunk-1")  # -> "## Introduction ..."
+    """
+
+    def __init__(
+        self,
+        spill_directory: Optional[str] = None,
+        max_memory_bytes: Optional[int] = None,
+    ):
+        """
+        Args:
+            spill_directory (Optional[str]): Directory holding spilled texts and references, created if missing.
+            max_memory_bytes (Optional[int]): Spill texts above this in-memory size, None keeps everything in memory.
+        """
+        self.spill_directory = spill_directory
+        self.max_memory_bytes = max_memory_bytes
+        self._blobs: "OrderedDict[str, str]" = OrderedDict()
+        self._refs: Dict[str, str] = {}
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        if spill_directory:
+            os.makedirs(os.path.join(spill_directory, "blobs"), exist_ok=True)
+            os.makedirs(os.path.join(spill_directory, "refs"), exist_ok=True)
+
+    @staticmethod
+    def digest(content: str) -> str:
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def _path(self, kind: str, name: str) -> str:
+        return os.path.join(self.spill_directory, kind, name)
+
+    def _write(self, path: str, text: str) -> None:
+        # Write then rename so readers never see a partial file
+        temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            file.write(text)
+        os.replace(temporary_path, path)
+
+    def _read(self, path: str) -> Optional[str]:
+        try:
+            with open(path, encoding="utf-8") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, chunk_id: str, content: str, durable: bool = False) -> str:
+        """Stores the content of a chunk and returns its content hash.
+
+        With `durable`, the text is also written to the spill directory right away
+        and stays in memory for reads, so it outlives the process.
+        """
+        digest = self.digest(content)
+        with self._lock:
+            self._refs[chunk_id] = digest
+            if self.spill_directory:
+                self._write(self._path("refs", chunk_id), digest)
+
+            spilled = self._is_spilled(digest)
+            if durable and self.spill_directory and not spilled:
+                self._write(self._path("blobs", digest), content)
+            if digest not in self._blobs and not spilled:
+                self._blobs[digest] = content
+                self._memory_bytes += len(content)
+                self._spill()
+        return digest
+
+    def _is_spilled(self, digest: str) -> bool:
+        return bool(self.spill_directory) and os.path.exists(
+            self._path("blobs", digest)
+        )
+
+    def _spill(self) -> None:
+        if not self.spill_directory or self.max_memory_bytes is None:
+            return
+        # Oldest texts leave memory first, chunks are consumed in insertion order
+        while self._blobs and self._memory_bytes > self.max_memory_bytes:
+            digest, content = self._blobs.popitem(last=False)
+            # Durable texts are on disk already
+            if not self._is_spilled(digest):
+                self._write(self._path("blobs", digest), content)
+            self._memory_bytes -= len(content)
+
+    def get(self, chunk_id: str) -> str:
+        """Returns the content of a chunk, raises KeyError for unknown chunk ids."""
+        with self._lock:
+            digest = self._refs.get(chunk_id)
+            if digest is None and self.spill_directory:
+                digest = self._read(self._path("refs", chunk_id))
+                if digest is not None:
+                    self._refs[chunk_id] = digest
+            if digest is None:
+                raise KeyError(chunk_id)
+
+            content = self._blobs.get(digest)
+        if content is None and self.spill_directory:
+            content = self._read(self._path("blobs", digest))
+        if content is None:
+            raise KeyError(chunk_id)
+        return content
+
+    def __contains__(self, chunk_id: str) -> bool:
+        try:
+            self.get(chunk_id)
+            return True
+        except KeyError:
+            return False
+
+    def __len__(self) -> int:
+        return len(self._refs)
+
+    @property
+    def memory_bytes(self) -> int:
+        """Size of the texts currently held in memory, in characters."""
+        return self._memory_bytes
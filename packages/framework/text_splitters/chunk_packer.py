@@ -0,0 +1,65 @@
+from typing import List, Optional
+
+from packages.framework.utils.estimate_tokens import estimate_tokens
+
+
+def group_chunks(
+    chunks: List[str],
+    token_budget: Optional[int],
+    min_tokens: int = 0,
+    separator: str = "\n\n",
+) -> List[List[str]]:
+    """
+    Groups adjacent chunks into groups close to a token budget, in linear time.
+
+    Chunks are never cut, a group is closed before the chunk that would take it past the
+    budget. Groups smaller than min_tokens are merged with the next chunk even past the
+    budget, and a small last group is merged with the previous one.
+
+    Args:
+        chunks (List[str]): Chunks in paper order, usually markdown sections
+        token_budget (Optional[int]): Target tokens per group (see estimate_tokens), None to only merge small chunks
+        min_tokens (int): Minimum tokens per group
+        separator (str): Text joining the chunks of a group
+
+    Returns:
+        List[List[str]]: The groups of chunks, in paper order
+    """
+    separator_tokens = estimate_tokens(separator)
+    groups: List[List[str]] = []
+    group: List[str] = []
+    group_tokens = 0
+
+    for chunk in chunks:
+        tokens = estimate_tokens(chunk)
+        if group and group_tokens >= min_tokens:
+            if (
+                token_budget is None
+                or group_tokens + separator_tokens + tokens > token_budget
+            ):
+                groups.append(group)
+                group, group_tokens = [], 0
+
+        if group:
+            group_tokens += separator_tokens
+        group.append(chunk)
+        group_tokens += tokens
+
+    if group:
+        if groups and group_tokens < min_tokens:
+            groups[-1].extend(group)
+        else:
+            groups.append(group)
+
+    return groups
+
+
+def pack_chunks(
+    chunks: List[str],
+    token_budget: Optional[int],
+    min_tokens: int = 0,
+    separator: str = "\n\n",
+) -> List[str]:
+    """Groups adjacent chunks close to a token budget (see group_chunks) and joins each group."""
+    groups = group_chunks(chunks, token_budget, min_tokens, separator)
+    return [separator.join(group) for group in groups]
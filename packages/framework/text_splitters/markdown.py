@@ -1,19 +1,203 @@
-from langchain.text_splitter import MarkdownTextSplitter
+import bisect
 import re
+import sys
+from typing import Iterator, List, Optional, Tuple
+from typing_extensions import TypedDict
+
+# Lines that change the splitter state: headers, code fences and LaTeX display math delimiters
+EVENT_LINE = (
+    r"(?P<line>(?P<header>(?P<level>#{1,6}) .+)"
+    r"|(?P<fence> {0,3}(?P<fence_marker>`{3,}|~{3,}).*)"
+    r"|(?P<math>[ \t]*\$\$.*))$"
+)
+FIRST_EVENT_LINE_PATTERN = re.compile(EVENT_LINE, flags=re.MULTILINE)
+# Searching from the line break is much faster than a multiline ^ tried at every position
+EVENT_LINE_PATTERN = re.compile(r"\n" + EVENT_LINE, flags=re.MULTILINE)
+FENCE_LINE_PATTERN = re.compile(
+    r"\n(?P<line> {0,3}(?P<fence_marker>`{3,}|~{3,})[ \t]*)$", flags=re.MULTILINE
+)
+MATH_END_PATTERN = re.compile(r"\$\$[ \t]*$", flags=re.MULTILINE)
+# TeX display math cannot hold a blank line, a $$ block not closed before one is not math,
+# it stops at that blank line or at the first header line before it
+BLANK_LINE_PATTERN = re.compile(r"\n[ \t]*\n")
+HEADER_LINE_PATTERN = re.compile(r"\n#{1,6} ")
+NON_SPACE_PATTERN = re.compile(r"\S")
+
+
+class MarkdownChunk(TypedDict):
+    text: str
+    start: int  # Offset of the chunk in the markdown, text == markdown[start:end]
+    end: int
+    headers: List[str]  # Header lines from the top level down to the section of the chunk
 
 
 def split_markdown_by_headers(content: str):
-    pattern = r"^(#{1,6} .+)$"
-    matches = list(re.finditer(pattern, content, flags=re.MULTILINE))
+    # Whole sections as (header, section) pairs, headers inside fenced blocks are not section breaks
+    return [
+        (chunk["headers"][-1], chunk["text"])
+        for chunk in iter_markdown_chunks(content, chunk_size=sys.maxsize)
+    ]
+
+
+def _strip_bounds(text: str, start: int, end: int) -> Tuple[int, int]:
+    # Bounds of text[start:end].strip() without copying the slice
+    match = NON_SPACE_PATTERN.search(text, start, end)
+    if match is None:
+        return start, start
+    start = match.start()
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def _block_break(
+    text: str, start: int, limit: int, blocks: List[Tuple[int, int]]
+) -> int:
+    # Latest blank line or fenced block boundary in (start, limit] that is not inside a fenced block
+    block_starts = [block_start for block_start, _ in blocks]
+    best = -1
+    first = max(bisect.bisect_right(block_starts, start) - 1, 0)
+    for block_start, block_end in blocks[first:]:
+        if block_start > limit:
+            break
+        for boundary in (block_start, block_end):
+            if start < boundary <= limit:
+                best = max(best, boundary)
+
+    position = text.rfind("\n\n", start, limit)
+    while position > start:
+        index = bisect.bisect_right(block_starts, position) - 1
+        if index < 0 or blocks[index][1] <= position:
+            return max(best, position)
+        position = text.rfind("\n\n", start, blocks[index][0])
+    return best
+
 
-    sections = []
-    for i, match in enumerate(matches):
-        start = match.start()
-        end = matches[i + 1].start() if i + 1 < len(matches) else len(content)
-        header = match.group(0)
-        body = content[start:end].strip()
-        sections.append((header, body))
-    return sections
+def _split_section(
+    text: str,
+    start: int,
+    end: int,
+    chunk_size: int,
+    chunk_overlap: int,
+    blocks: List[Tuple[int, int]],
+) -> Iterator[Tuple[int, int]]:
+    # Cuts an oversized section at blank lines, then line breaks, then spaces, keeping fenced blocks whole when they fit
+    start, end = _strip_bounds(text, start, end)
+    previous_cut = start
+    while end - start > chunk_size:
+        limit = start + chunk_size
+        # With an overlap the window starts before the previous cut, the next cut is past it
+        # so that the chunk is not a suffix of the previous one
+        floor = max(start, _strip_bounds(text, previous_cut, end)[0])
+        cut = _block_break(text, floor, limit, blocks)
+        if cut <= floor:
+            cut = text.rfind("\n", floor + 1, limit)
+        if cut <= floor:
+            cut = text.rfind(" ", floor + 1, limit)
+        if cut <= floor:
+            cut = limit
+        previous_cut = cut
+
+        chunk_start, chunk_end = _strip_bounds(text, start, cut)
+        if chunk_end > chunk_start:
+            yield chunk_start, chunk_end
+
+        next_start = cut
+        if chunk_overlap:
+            # The overlap starts at a word boundary and always moves the chunk forward
+            next_start = max(cut - chunk_overlap, chunk_start + 1)
+            space = text.find(" ", next_start, cut)
+            next_start = space if space != -1 else cut
+        start, _ = _strip_bounds(text, next_start, end)
+
+    if end > start:
+        yield start, end
+
+
+def iter_markdown_chunks(
+    input_text: str, chunk_size: int = 10000, chunk_overlap: int = 0
+) -> Iterator[MarkdownChunk]:
+    """
+    Splits markdown content into chunks in a single pass, yielding them as they are found.
+
+    Sections start at headers, headers inside code fences or $$ math blocks are not section
+    breaks. Sections longer than chunk_size are cut at blank lines, then line breaks, outside
+    of fenced blocks when possible. Text before the first header is not part of any section.
+
+    Args:
+        input_text (str): Markdown content as string
+        chunk_size (int): Maximum size of each chunk
+        chunk_overlap (int): Number of characters to overlap between the chunks of a section
+
+    Yields:
+        MarkdownChunk: Text, offsets and header hierarchy of each chunk
+    """
+    headers: List[Tuple[int, str]] = []  # (level, header line) of the current section
+    section_start: Optional[int] = None
+    section_headers: List[str] = []
+    blocks: List[Tuple[int, int]] = []  # Fenced and math blocks of the current section
+
+    def section_chunks(end: int) -> Iterator[MarkdownChunk]:
+        for start, chunk_end in _split_section(
+            input_text, section_start, end, chunk_size, chunk_overlap, blocks
+        ):
+            yield MarkdownChunk(
+                text=input_text[start:chunk_end],
+                start=start,
+                end=chunk_end,
+                headers=section_headers,
+            )
+
+    match = FIRST_EVENT_LINE_PATTERN.match(input_text)
+    if match is None:
+        match = EVENT_LINE_PATTERN.search(input_text)
+    while match is not None:
+        line_start, position = match.start("line"), match.end()
+
+        if match.group("fence"):
+            # A fence is closed by a bare fence of the same character, at least as long, or by the end
+            marker = match.group("fence_marker")
+            position = len(input_text)
+            for closing in FENCE_LINE_PATTERN.finditer(input_text, match.end()):
+                closing_marker = closing.group("fence_marker")
+                if closing_marker[0] == marker[0] and len(closing_marker) >= len(
+                    marker
+                ):
+                    position = closing.end()
+                    break
+            blocks.append((line_start, position))
+
+        elif match.group("math"):
+            # $$ alone or a block that is not closed on the same line, it ends at the next line ending
+            # with $$, or before the next blank line or header when it is not closed
+            stripped = match.group("line").strip()
+            if stripped == "$$" or not stripped[2:].endswith("$$"):
+                closing = MATH_END_PATTERN.search(input_text, match.end())
+                blank = BLANK_LINE_PATTERN.search(input_text, match.end())
+                stop = blank.start() if blank else len(input_text)
+                if closing and closing.start() < stop:
+                    position = closing.end()
+                else:
+                    header = HEADER_LINE_PATTERN.search(input_text, match.end(), stop)
+                    position = header.start() if header else stop
+                blocks.append((line_start, position))
+
+        else:
+            if section_start is not None:
+                yield from section_chunks(line_start)
+
+            level = len(match.group("level"))
+            while headers and headers[-1][0] >= level:
+                headers.pop()
+            headers.append((level, match.group("header")))
+            section_start = line_start
+            section_headers = [header for _, header in headers]
+            blocks = []
+
+        match = EVENT_LINE_PATTERN.search(input_text, position)
+
+    if section_start is not None:
+        yield from section_chunks(len(input_text))
 
 
 def markdown_text_split(
@@ -30,15 +214,7 @@ def markdown_text_split(
     Returns:
         List[str]: List of all chunks created
     """
-    sections = split_markdown_by_headers(input_text)
-    splitter = MarkdownTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-
-    all_chunks = []
-    for _, section_content in sections:
-        if len(section_content) <= chunk_size:
-            all_chunks.append(section_content)
-        else:
-            chunks = splitter.split_text(section_content)
-            all_chunks.extend(chunks)
-
-    return all_chunks
+    return [
+        chunk["text"]
+        for chunk in iter_markdown_chunks(input_text, chunk_size, chunk_overlap)
+    ]
@@ -0,0 +1,20 @@
+import hashlib
+import re
+import unicodedata
+import uuid
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    # Same text with different unicode forms or whitespace hashes the same
+    return WHITESPACE_PATTERN.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def content_fingerprint(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode()).hexdigest()
+
+
+def content_uuid(text: str, namespace: uuid.UUID) -> str:
+    # Stable UUID (version 5) of the normalised text, formatted like uuid4 ids
+    return str(uuid.uuid5(namespace, normalize_text(text)))
@@ -0,0 +1,9 @@
+import math
+
+# Average number of characters per token for English text on Gemini/GPT tokenizers
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    # Offline approximation, good enough for budgets and benchmarks
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
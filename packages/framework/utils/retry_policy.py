@@ -0,0 +1,321 @@
+import asyncio
+import contextvars
+from functools import wraps
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple, Type, Union
+
+from packages.framework.callbacks.run_profiler import (
+    RETRY_EVENT,
+    areport_event,
+    report_event,
+)
+
+# Status codes worth retrying, used when exceptions expose an HTTP or gRPC-like code
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the endpoint while its circuit breaker is open."""
+
+
+def default_retry_on(exception: Exception) -> bool:
+    # Timeouts and connection problems are transient
+    if isinstance(exception, (TimeoutError, ConnectionError)):
+        return True
+    if isinstance(exception, CircuitOpenError):
+        return False
+
+    # Quota and server errors (google.api_core, httpx, openai...) expose a status code
+    for attribute in ("code", "status_code", "http_status"):
+        code = getattr(exception, attribute, None)
+        code = code() if callable(code) else code
+        code = getattr(code, "value", code)
+        if isinstance(code, tuple):
+            code = code[0]
+        if isinstance(code, int):
+            return code in RETRYABLE_STATUS_CODES
+    return False
+
+
+class CircuitBreaker:
+    """Stops calling an endpoint after consecutive retryable failures.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls fail fast
+    with CircuitOpenError for `reset_seconds`. Then a single trial call is let through,
+    its success closes the circuit and its failure opens it again. A trial ending without
+    an answer of the endpoint (cancelled, interrupted) lets the next call try again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> bool:
+        """Raises CircuitOpenError while the circuit is open, returns whether the call is the trial."""
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            if (
+                time.monotonic() - self._opened_at >= self.reset_seconds
+                and not self._trial_in_flight
+            ):
+                self._trial_in_flight = True
+                return True
+            raise CircuitOpenError(f"Circuit of {self.name} is open")
+
+    def end_trial(self) -> None:
+        # Called once the trial call is over, whatever its outcome, so the trial is never left in flight
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logging.warning(f"Opening the circuit of {self.name}")
+                self._opened_at = time.monotonic()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+
+# Breakers of this process, one per endpoint name
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+_circuit_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(
+    name: str, failure_threshold: int = 5, reset_seconds: float = 30.0
+) -> CircuitBreaker:
+    with _circuit_breakers_lock:
+        if name not in _circuit_breakers:
+            _circuit_breakers[name] = CircuitBreaker(
+                name, failure_threshold, reset_seconds
+            )
+        return _circuit_breakers[name]
+
+
+def run_with_timeout(func: Callable, timeout: Optional[float], *args, **kwargs) -> Any:
+    if timeout is None:
+        return func(*args, **kwargs)
+
+    # Run the attempt in a worker thread, works from any thread unlike signal.alarm.
+    # A timed out attempt cannot be killed, it keeps running in its daemon thread while the retry
+    # starts, and its result is dropped: only set an attempt timeout on idempotent calls.
+    outcome: Dict[str, Any] = {}
+    context = contextvars.copy_context()
+
+    def target():
+        try:
+            outcome["result"] = context.run(func, *args, **kwargs)
+        except BaseException as e:
+            outcome["error"] = e
+
+    worker = threading.Thread(target=target, daemon=True)
+    worker.start()
+    worker.join(timeout)
+    if worker.is_alive():
+        raise TimeoutError(f"Attempt timed out after {timeout} seconds")
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+
+class RetryPolicy:
+    """A retry and timeout policy usable from any thread and from asyncio.
+
+    Failed attempts classified as retryable by `retry_on` are retried with jittered
+    exponential backoff, each attempt bounded by `attempt_timeout` and the whole call
+    by `deadline`. Non-retryable errors and the last error are raised as they are.
+    When `circuit_breaker` is set, failures are counted per endpoint and calls fail
+    fast while the endpoint's circuit is open.
+
+    A sync attempt past `attempt_timeout` is not stopped, it keeps running in the
+    background while the next attempt starts. Only set `attempt_timeout` on idempotent
+    calls, e.g. not on nodes whose side effects must happen once.
+
+    Example:
+        .. code-block:: python
+
+            policy = RetryPolicy(max_attempts=4, deadline=120, circuit_breaker="gemini-1.5-flash-002")
+            result = policy.call(chain.invoke, {})
+            node = policy.wrap(finding_creator)
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        initial_interval: float = 0.5,
+        backoff_factor: float = 2.0,
+        max_interval: float = 30.0,
+        jitter: bool = True,
+        attempt_timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        retry_on: Union[
+            Type[Exception], Tuple[Type[Exception], ...], Callable[[Exception], bool]
+        ] = default_retry_on,
+        circuit_breaker: Optional[Union[str, CircuitBreaker]] = None,
+    ):
+        """
+        Args:
+            max_attempts (int): Attempts in total, the first one included.
+            initial_interval (float): Seconds to wait before the first retry.
+            backoff_factor (float): Multiplier of the wait after every retry.
+            max_interval (float): Longest wait between two attempts.
+            jitter (bool): Randomise waits (full jitter) so concurrent callers do not retry together.
+            attempt_timeout (Optional[float]): Seconds allowed to each attempt, idempotent calls only (see above).
+            deadline (Optional[float]): Seconds allowed to the whole call, retries and waits included.
+            retry_on: Exception types to retry, or a function classifying exceptions.
+            circuit_breaker (Optional[Union[str, CircuitBreaker]]): Breaker or endpoint name to share one.
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.initial_interval = initial_interval
+        self.backoff_factor = backoff_factor
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.attempt_timeout = attempt_timeout
+        self.deadline = deadline
+        self.retry_on = retry_on
+        self.circuit_breaker = (
+            get_circuit_breaker(circuit_breaker)
+            if isinstance(circuit_breaker, str)
+            else circuit_breaker
+        )
+
+    def should_retry(self, exception: Exception) -> bool:
+        if isinstance(self.retry_on, type) or isinstance(self.retry_on, tuple):
+            return isinstance(exception, self.retry_on)
+        return self.retry_on(exception)
+
+    def backoff(self, attempt: int) -> float:
+        interval = min(
+            self.max_interval, self.initial_interval * self.backoff_factor**attempt
+        )
+        return random.uniform(0, interval) if self.jitter else interval
+
+    def _timeout(self, started_at: float) -> Optional[float]:
+        # Time left for the next attempt
+        timeouts = [self.attempt_timeout] if self.attempt_timeout is not None else []
+        if self.deadline is not None:
+            timeouts.append(self.deadline - (time.monotonic() - started_at))
+        return min(timeouts) if timeouts else None
+
+    def _before_attempt(self) -> bool:
+        # Whether the attempt is the trial call of the circuit breaker
+        if self.circuit_breaker is None:
+            return False
+        return self.circuit_breaker.before_call()
+
+    def _after_attempt(self, trial: bool) -> None:
+        if trial:
+            self.circuit_breaker.end_trial()
+
+    def _next_wait(
+        self, attempt: int, exception: Exception, started_at: float, trial: bool
+    ) -> Optional[float]:
+        """Returns the seconds to wait before retrying, None when the error must be raised."""
+        retryable = self.should_retry(exception)
+        if self.circuit_breaker is not None:
+            if retryable:
+                self.circuit_breaker.record_failure()
+            elif trial:
+                # The endpoint answered the trial, the error is the caller's
+                self.circuit_breaker.record_success()
+        if not retryable or attempt + 1 >= self.max_attempts:
+            return None
+
+        wait = self.backoff(attempt)
+        if self.deadline is not None and (
+            time.monotonic() - started_at + wait >= self.deadline
+        ):
+            return None
+
+        logging.warning(
+            f"Attempt {attempt + 1} failed: {str(exception)}. Retrying in {wait:.2f}s..."
+        )
+        return wait
+
+    def call(self, func: Callable, *args, **kwargs) -> Any:
+        started_at = time.monotonic()
+        for attempt in range(self.max_attempts):
+            trial = self._before_attempt()
+            try:
+                timeout = self._timeout(started_at)
+                if timeout is not None and timeout <= 0:
+                    raise TimeoutError(f"Deadline of {self.deadline} seconds exceeded")
+                result = run_with_timeout(func, timeout, *args, **kwargs)
+            except Exception as e:
+                wait = self._next_wait(attempt, e, started_at, trial)
+                if wait is None:
+                    raise
+                error = e
+            else:
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.record_success()
+                return result
+            finally:
+                # Also reached on KeyboardInterrupt and the like
+                self._after_attempt(trial)
+
+            report_event(RETRY_EVENT, {"attempt": attempt + 1, "error": str(error)})
+            time.sleep(wait)
+
+    async def acall(self, afunc: Callable, *args, **kwargs) -> Any:
+        started_at = time.monotonic()
+        for attempt in range(self.max_attempts):
+            trial = self._before_attempt()
+            try:
+                timeout = self._timeout(started_at)
+                if timeout is not None and timeout <= 0:
+                    raise TimeoutError(f"Deadline of {self.deadline} seconds exceeded")
+                result = await asyncio.wait_for(afunc(*args, **kwargs), timeout)
+            except Exception as e:
+                wait = self._next_wait(attempt, e, started_at, trial)
+                if wait is None:
+                    raise
+                error = e
+            else:
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.record_success()
+                return result
+            finally:
+                # Also reached on CancelledError
+                self._after_attempt(trial)
+
+            await areport_event(
+                RETRY_EVENT, {"attempt": attempt + 1, "error": str(error)}
+            )
+            await asyncio.sleep(wait)
+
+    def wrap(self, func: Callable) -> Callable:
+        """Applies the policy to every call of a sync or async function, keeping its signature."""
+        if asyncio.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return await self.acall(func, *args, **kwargs)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return self.call(func, *args, **kwargs)
+
+        return wrapper
@@ -1,4 +1,16 @@
-from packages.workflows.paper_scanner.v0 import run_paper_scanner_v0
+from packages.workflows.paper_scanner.v0 import (
+    arun_paper_scanner_v0,
+    resume_paper_scanner_v0,
+    run_paper_scanner_v0,
+)
+from packages.workflows.paper_scanner.v0.batch import (
+    arun_paper_scanner_batch_v0,
+    run_paper_scanner_batch_v0,
+)
+from packages.workflows.paper_scanner.v0.streaming import (
+    astream_paper_scanner_v0,
+    stream_paper_scanner_v0,
+)
 
 # VERSIONING EXPORTS HERE
 # -----------------------
@@ -14,7 +26,61 @@ paper_scanner = {
 paper_scanner["available_versions"] = list(paper_scanner.keys())
 
 
+# Async counterparts, to be awaited from an event loop
+paper_scanner_async = {
+    "v0": arun_paper_scanner_v0,
+    "latest": "v0",  # Remember to update respective latest also
+}
+paper_scanner_async["available_versions"] = list(paper_scanner_async.keys())
+
+
+# Resume entry points for runs started with a run_id
+paper_scanner_resume = {
+    "v0": resume_paper_scanner_v0,
+    "latest": "v0",  # Remember to update respective latest also
+}
+paper_scanner_resume["available_versions"] = list(paper_scanner_resume.keys())
+
+
+# Batch runners, they take many papers and yield results as papers complete
+paper_scanner_batch = {
+    "v0": run_paper_scanner_batch_v0,
+    "latest": "v0",  # Remember to update respective latest also
+}
+paper_scanner_batch["available_versions"] = list(paper_scanner_batch.keys())
+
+paper_scanner_batch_async = {
+    "v0": arun_paper_scanner_batch_v0,
+    "latest": "v0",  # Remember to update respective latest also
+}
+paper_scanner_batch_async["available_versions"] = list(
+    paper_scanner_batch_async.keys()
+)
+
+
+# Streaming runners, they yield typed events while the paper is processed
+paper_scanner_stream = {
+    "v0": stream_paper_scanner_v0,
+    "latest": "v0",  # Remember to update respective latest also
+}
+paper_scanner_stream["available_versions"] = list(paper_scanner_stream.keys())
+
+paper_scanner_stream_async = {
+    "v0": astream_paper_scanner_v0,
+    "latest": "v0",  # Remember to update respective latest also
+}
+paper_scanner_stream_async["available_versions"] = list(
+    paper_scanner_stream_async.keys()
+)
+
+
 # Export everything
 __all__ = [
     "paper_scanner",
+    "paper_scanner_async",
+    "paper_scanner_batch",
+    "paper_scanner_batch_async",
+    "paper_scanner_resume",
+    "paper_scanner_stream",
+    "paper_scanner_stream_async",
 ]
@@ -1,39 +1,74 @@
+import asyncio
 from io import BytesIO
 import logging
-from packages.workflows.paper_scanner.v0.agent import paper_summarization_agent
+from typing import Optional
+from packages.workflows.paper_scanner.v0.agent import (
+    build_paper_summarization_agent,
+    paper_summarization_agent,
+    paper_summarization_windowed_agent,
+)
 from packages.framework.document_loaders.marker_loader import marker_load
 from packages.framework.text_splitters.markdown import markdown_text_split
 from packages.workflows.paper_scanner.v0.utils.call_marker_api import call_marker_api
+from packages.workflows.paper_scanner.v0.utils.marker_pool import (
+    MARKER_PAGES_PER_RANGE,
+    get_marker_pool,
+)
+from packages.workflows.paper_scanner.v0.utils.hybrid_pdf import (
+    PDF_LOADER,
+    TEXT_LAYER_MAX_MATH_DENSITY,
+    TEXT_LAYER_MIN_QUALITY,
+)
+from packages.workflows.paper_scanner.v0.agent.schemas.configuration import (
+    DEFAULT_CONFIGURATION,
+    ScannerConfiguration,
+)
+from packages.workflows.paper_scanner.v0.utils.checkpointer import (
+    sqlite_checkpointer,
+)
+from packages.workflows.paper_scanner.v0.utils.chunk_content import (
+    load_chunks_content,
+)
+from packages.framework.stores.chunk_store import ChunkStore
+from packages.framework.callbacks.run_profiler import RunProfiler
+from packages.framework.utils.content_hash import content_fingerprint
 
 # WORKFLOW FUNCTION THAT INGESTS A PDF OR MARKDOWN PAPER, EXECUTES THE PAPER SCANNER AGENT, AND RETURNS THE RESULTS
 # --------------------------------------------------------------------------------------------------------------
 
 
-def run_paper_scanner_v0(
+def load_markdown_paper(
     pdf_paper: BytesIO = None,
     markdown_paper: str = None,
     use_local_marker: bool = False,
-) -> dict:
-    """
-    Processes a research paper and extracts insights using a chat model and graph-based processing.
-
-    Args:
-        pdf_paper (BytesIO): PDF data of the paper as a BytesIO buffer.
-        markdown_paper (str): Markdown content of the paper.
-        use_local_marker (bool): Whether to use the local marker for PDF processing.
-        **marker_options: Additional options to pass to the Marker API.
-
-    Returns:
-        dict: Processed results containing insights, metadata, and summaries.
-    """
+) -> str:
     if not pdf_paper and not markdown_paper:
         raise ValueError("Either a PDF or markdown paper must be provided")
 
     markdown_content = markdown_paper
     if not markdown_content:
-        if use_local_marker:
-            # Process the PDF buffer using local marker
-            pdf_data = marker_load(pdf_buffer=pdf_paper)
+        if PDF_LOADER == "hybrid":
+            # Imported here, the text layer loaders are only needed to load PDFs
+            from packages.framework.document_loaders.hybrid_loader import hybrid_load
+            from packages.workflows.paper_scanner.v0.utils.hybrid_pdf import (
+                get_page_ranges_converter,
+            )
+
+            # The text layer first, marker only reads the pages it does not render well
+            pdf_data = hybrid_load(
+                pdf_buffer=pdf_paper,
+                convert_ranges=get_page_ranges_converter(use_local_marker),
+                min_text_quality=TEXT_LAYER_MIN_QUALITY,
+                max_math_density=TEXT_LAYER_MAX_MATH_DENSITY,
+            )
+            markdown_content = pdf_data.get("markdown", "")
+        elif use_local_marker:
+            # Process the PDF buffer using local marker, the models stay loaded between papers
+            pdf_data = marker_load(
+                pdf_buffer=pdf_paper,
+                pool=get_marker_pool(),
+                pages_per_range=MARKER_PAGES_PER_RANGE,
+            )
             markdown_content = pdf_data.get("markdown", "")
         else:
 
@@ -41,17 +76,203 @@ def run_paper_scanner_v0(
             api_response = call_marker_api(pdf_file=pdf_paper)
             markdown_content = api_response.get("markdown", "")
 
+    return markdown_content
+
+
+def create_agent_config(
+    window_size: Optional[int] = None,
+    run_id: Optional[str] = None,
+    options: Optional[ScannerConfiguration] = None,
+) -> dict:
+    # Every run is profiled, see finalize_result
+    config = {
+        "recursion_limit": 200,
+        "configurable": {**(options or {})},
+        "callbacks": [RunProfiler()],
+    }
+    if window_size:
+        config["max_concurrency"] = window_size
+        config["configurable"]["window_size"] = window_size
+    if run_id:
+        # Checkpoints are stored under the run id
+        config["configurable"]["thread_id"] = run_id
+    return config
+
+
+def get_run_profiler(config: Optional[dict]) -> Optional[RunProfiler]:
+    for callback in (config or {}).get("callbacks") or []:
+        if isinstance(callback, RunProfiler):
+            return callback
+    return None
+
+
+def finalize_result(
+    result: dict,
+    options: Optional[ScannerConfiguration] = None,
+    config: Optional[dict] = None,
+) -> dict:
+    # Chunks kept in a chunk store only carry their ids in the state, put their texts back for the callers
+    chunk_store = (options or {}).get("chunk_store")
+    if chunk_store is not None and result.get("processed_chunks"):
+        result["processed_chunks"] = load_chunks_content(
+            result["processed_chunks"], chunk_store
+        )
+    # The state keeps findings in a findings collection, callers get a list of findings
+    if result.get("findings") is not None:
+        result["findings"] = list(result["findings"])
+    # Per-node latency, LLM queue and call time, tokens, retries and parse failures of the run
+    profiler = get_run_profiler(config)
+    if profiler is not None:
+        result["profile"] = profiler.profile()
+    return result
+
+
+def prepare_agent_run(
+    markdown_content: str,
+    window_size: Optional[int] = None,
+    options: Optional[ScannerConfiguration] = None,
+    run_id: Optional[str] = None,
+):
     # Split the markdown into sections and chunks
     logging.info("Splitting the markdown content into sections and chunks...")
     chunks = markdown_text_split(
         input_text=markdown_content, chunk_size=10000, chunk_overlap=0
     )
 
+    agent = (
+        paper_summarization_windowed_agent if window_size else paper_summarization_agent
+    )
+    agent_input = {
+        "chunks": chunks,
+        "paper_fingerprint": content_fingerprint(markdown_content),
+    }
+    return agent, agent_input, create_agent_config(window_size, run_id, options)
+
+
+def run_paper_scanner_v0(
+    pdf_paper: BytesIO = None,
+    markdown_paper: str = None,
+    use_local_marker: bool = False,
+    window_size: Optional[int] = None,
+    run_id: Optional[str] = None,
+    checkpoint_path: Optional[str] = None,
+    options: Optional[ScannerConfiguration] = None,
+) -> dict:
+    """
+    Processes a research paper and extracts insights using a chat model and graph-based processing.
+
+    Args:
+        pdf_paper (BytesIO): PDF data of the paper as a BytesIO buffer.
+        markdown_paper (str): Markdown content of the paper.
+        use_local_marker (bool): Whether to use the local marker for PDF processing.
+        window_size (Optional[int]): When set, chunks are discovered concurrently in windows of this size.
+        run_id (Optional[str]): When set, every step is checkpointed under this id so the run can be resumed.
+        checkpoint_path (Optional[str]): SQLite file holding the checkpoints (see sqlite_checkpointer).
+        options (Optional[ScannerConfiguration]): Runtime options of the agent nodes.
+
+    Returns:
+        dict: Processed results containing insights, metadata, and summaries. Chunk ids and the
+              paper_fingerprint are content hashes, stable across runs over the same paper.
+    """
+    markdown_content = load_markdown_paper(pdf_paper, markdown_paper, use_local_marker)
+    agent, agent_input, agent_config = prepare_agent_run(
+        markdown_content, window_size, options, run_id
+    )
+
     # Call the paper summarization agent
     logging.info("Calling the paper summarization agent...")
-    result = paper_summarization_agent.invoke(
-        {"chunks": chunks}, {"recursion_limit": 200}
+    if run_id:
+        with sqlite_checkpointer(checkpoint_path) as checkpointer:
+            agent = build_paper_summarization_agent(
+                windowed=bool(window_size), checkpointer=checkpointer
+            )
+            result = agent.invoke(agent_input, agent_config)
+    else:
+        result = agent.invoke(agent_input, agent_config)
+
+    logging.info("Processing complete.")
+    return finalize_result(result, options, agent_config)
+
+
+def resume_paper_scanner_v0(
+    run_id: str,
+    checkpoint_path: Optional[str] = None,
+    chunk_store: Optional[ChunkStore] = None,
+) -> dict:
+    """
+    Resumes a checkpointed run from its last completed step, finished chunks are not processed again.
+
+    Args:
+        run_id (str): Id given to run_paper_scanner_v0 when the run was started.
+        checkpoint_path (Optional[str]): SQLite file holding the checkpoints (see sqlite_checkpointer).
+        chunk_store (Optional[ChunkStore]): Required when the run used a chunk store with a spill
+                                            directory, open it on the same directory.
+
+    Returns:
+        dict: Processed results containing insights, metadata, and summaries.
+
+    Raises:
+        ValueError: If no checkpoint exists for the given run id.
+    """
+    with sqlite_checkpointer(checkpoint_path) as checkpointer:
+        checkpoint = checkpointer.get_tuple({"configurable": {"thread_id": run_id}})
+        if checkpoint is None:
+            raise ValueError(f"No checkpoint found for run {run_id}")
+
+        # Configurable values of the original run are stored in the checkpoint metadata
+        window_size = checkpoint.metadata.get("window_size")
+        options = {
+            key: checkpoint.metadata[key]
+            for key in DEFAULT_CONFIGURATION
+            if key in checkpoint.metadata
+        }
+        if chunk_store is not None:
+            options["chunk_store"] = chunk_store
+        agent = build_paper_summarization_agent(
+            windowed=bool(window_size), checkpointer=checkpointer
+        )
+
+        logging.info(f"Resuming run {run_id} from step {checkpoint.metadata['step']}...")
+        agent_config = create_agent_config(window_size, run_id, options)
+        result = agent.invoke(None, agent_config)
+
+    logging.info("Processing complete.")
+    return finalize_result(result, options, agent_config)
+
+
+async def arun_paper_scanner_v0(
+    pdf_paper: BytesIO = None,
+    markdown_paper: str = None,
+    use_local_marker: bool = False,
+    window_size: Optional[int] = None,
+    options: Optional[ScannerConfiguration] = None,
+) -> dict:
+    """
+    Async version of run_paper_scanner_v0, graph nodes await the LLM instead of blocking a thread.
+
+    Args:
+        pdf_paper (BytesIO): PDF data of the paper as a BytesIO buffer.
+        markdown_paper (str): Markdown content of the paper.
+        use_local_marker (bool): Whether to use the local marker for PDF processing.
+        window_size (Optional[int]): When set, chunks are discovered concurrently in windows of this size.
+        options (Optional[ScannerConfiguration]): Runtime options of the agent nodes.
+
+    Returns:
+        dict: Processed results containing insights, metadata, and summaries.
+    """
+    # PDF loading is blocking (local models or API polling), keep it off the event loop
+    markdown_content = markdown_paper
+    if not markdown_content:
+        markdown_content = await asyncio.to_thread(
+            load_markdown_paper, pdf_paper, markdown_paper, use_local_marker
+        )
+    agent, agent_input, agent_config = prepare_agent_run(
+        markdown_content, window_size, options
     )
 
+    # Call the paper summarization agent
+    logging.info("Calling the paper summarization agent...")
+    result = await agent.ainvoke(agent_input, agent_config)
+
     logging.info("Processing complete.")
-    return result
+    return finalize_result(result, options, agent_config)
@@ -1,24 +1,42 @@
+from typing import Dict, Optional
+from langchain_core.runnables import RunnableLambda
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import StateGraph, START, END
 
+from packages.framework.utils.retry_policy import RetryPolicy
 from packages.workflows.paper_scanner.v0.agent.nodes.chunk.loading import (
     chunks_initializer,
     next_chunk_preparer,
+    next_window_preparer,
     should_continue,
+    window_dispatcher,
 )
 from packages.workflows.paper_scanner.v0.agent.nodes.chunk.processing import (
+    achunk_processor,
+    awindow_chunk_processor,
     chunk_processor,
     post_processing_router,
+    window_chunk_processor,
+    window_post_processing_router,
+    window_reconciler,
+)
+from packages.workflows.paper_scanner.v0.agent.nodes.finding.batch import (
+    afindings_batch_processor,
+    findings_batch_processor,
 )
 from packages.workflows.paper_scanner.v0.agent.nodes.finding.consolidation import (
+    afindings_consolidator,
     findings_consolidator,
 )
 from packages.workflows.paper_scanner.v0.agent.nodes.finding.creation import (
+    afinding_creator,
     finding_creator,
 )
 from packages.workflows.paper_scanner.v0.agent.nodes.finding.processing_sink import (
     processing_sink,
 )
 from packages.workflows.paper_scanner.v0.agent.nodes.finding.update import (
+    afinding_updater,
     finding_updater,
 )
 from packages.workflows.paper_scanner.v0.agent.nodes.metadata.update import (
@@ -28,43 +46,132 @@ from packages.workflows.paper_scanner.v0.agent.schemas.states import (
     OverallState,
     InputState,
 )
+from packages.workflows.paper_scanner.v0.agent.schemas.configuration import (
+    ScannerConfiguration,
+)
 
 
 # AGENT GRAPH DEFINITION AND EXPORT
 # ---------------------------------
 
 
-# Define the graph
-builder = StateGraph(OverallState, input=InputState)
-
-# Add nodes
-builder.add_node("chunks_initializer", chunks_initializer)
-builder.add_node("next_chunk_preparer", next_chunk_preparer)
-builder.add_node("chunk_processor", chunk_processor)
-builder.add_node("finding_updater", finding_updater)
-builder.add_node("finding_creator", finding_creator)
-builder.add_node("metadata_updater", metadata_updater)
-builder.add_node("processing_sink", processing_sink)
-builder.add_node("findings_consolidator", findings_consolidator)
-
-# Add edges
-builder.add_edge(START, "chunks_initializer")
-builder.add_edge("chunks_initializer", "next_chunk_preparer")
-builder.add_conditional_edges(
-    "next_chunk_preparer",
-    should_continue,
-    {True: "chunk_processor", False: "findings_consolidator"},
-)
-builder.add_conditional_edges(
-    "chunk_processor",
-    post_processing_router,
-    ["finding_updater", "finding_creator", "metadata_updater"],
-)
-builder.add_edge("finding_updater", "processing_sink")
-builder.add_edge("finding_creator", "processing_sink")
-builder.add_edge("metadata_updater", "processing_sink")
-builder.add_edge("processing_sink", "next_chunk_preparer")
-builder.add_edge("findings_consolidator", END)
-
-# Compile the graph
-paper_summarization_agent = builder.compile()
+# LLM nodes expose both implementations, LangGraph runs the async one under ainvoke/astream
+def with_async(
+    func, afunc, retry_policy: Optional[RetryPolicy] = None
+) -> RunnableLambda:
+    if retry_policy is not None:
+        return RunnableLambda(
+            retry_policy.wrap(func),
+            afunc=retry_policy.wrap(afunc),
+            name=func.__name__,
+        )
+    return RunnableLambda(func, afunc=afunc, name=func.__name__)
+
+
+def build_paper_summarization_agent(
+    windowed: bool = False,
+    checkpointer: Optional[BaseCheckpointSaver] = None,
+    retry_policies: Optional[Dict[str, RetryPolicy]] = None,
+):
+    """
+    Builds and compiles the paper summarization graph.
+
+    Args:
+        windowed (bool): Whether to discover chunks in concurrent windows of
+                         `window_size` chunks (see ScannerConfiguration) instead of one by one.
+        checkpointer (Optional[BaseCheckpointSaver]): Persists every super-step so runs can be resumed.
+        retry_policies (Optional[Dict[str, RetryPolicy]]): Retry policy of each node, by node name.
+            A sync node attempt past attempt_timeout keeps running while it is retried, leave it
+            unset on nodes that must not run twice.
+
+    Returns:
+        CompiledStateGraph: The compiled agent.
+    """
+    # Define the graph
+    builder = StateGraph(
+        OverallState, input=InputState, config_schema=ScannerConfiguration
+    )
+    retry_policies = retry_policies or {}
+
+    def add_node(name, func, afunc=None):
+        retry_policy = retry_policies.get(name)
+        if afunc is not None:
+            builder.add_node(name, with_async(func, afunc, retry_policy))
+        elif retry_policy is not None:
+            builder.add_node(name, retry_policy.wrap(func))
+        else:
+            builder.add_node(name, func)
+
+    # Add nodes shared by both variants
+    add_node("chunks_initializer", chunks_initializer)
+    add_node("finding_updater", finding_updater, afinding_updater)
+    add_node("finding_creator", finding_creator, afinding_creator)
+    add_node(
+        "findings_batch_processor", findings_batch_processor, afindings_batch_processor
+    )
+    add_node("processing_sink", processing_sink)
+    add_node("findings_consolidator", findings_consolidator, afindings_consolidator)
+
+    builder.add_edge(START, "chunks_initializer")
+    builder.add_edge("finding_updater", "processing_sink")
+    builder.add_edge("finding_creator", "processing_sink")
+    builder.add_edge("findings_batch_processor", "processing_sink")
+    builder.add_edge("findings_consolidator", END)
+
+    if windowed:
+        # Windowed discovery: K chunks against the same findings snapshot, then reconcile
+        add_node("next_window_preparer", next_window_preparer)
+        add_node(
+            "window_chunk_processor", window_chunk_processor, awindow_chunk_processor
+        )
+        add_node("window_reconciler", window_reconciler)
+
+        builder.add_edge("chunks_initializer", "next_window_preparer")
+        builder.add_conditional_edges(
+            "next_window_preparer",
+            window_dispatcher,
+            ["window_chunk_processor", "findings_consolidator"],
+        )
+        builder.add_edge("window_chunk_processor", "window_reconciler")
+        builder.add_conditional_edges(
+            "window_reconciler",
+            window_post_processing_router,
+            [
+                "finding_updater",
+                "finding_creator",
+                "findings_batch_processor",
+                "processing_sink",
+            ],
+        )
+        builder.add_edge("processing_sink", "next_window_preparer")
+    else:
+        # Sequential discovery: one chunk at a time
+        add_node("next_chunk_preparer", next_chunk_preparer)
+        add_node("chunk_processor", chunk_processor, achunk_processor)
+        add_node("metadata_updater", metadata_updater)
+
+        builder.add_edge("chunks_initializer", "next_chunk_preparer")
+        builder.add_conditional_edges(
+            "next_chunk_preparer",
+            should_continue,
+            {True: "chunk_processor", False: "findings_consolidator"},
+        )
+        builder.add_conditional_edges(
+            "chunk_processor",
+            post_processing_router,
+            [
+                "finding_updater",
+                "finding_creator",
+                "findings_batch_processor",
+                "metadata_updater",
+            ],
+        )
+        builder.add_edge("metadata_updater", "processing_sink")
+        builder.add_edge("processing_sink", "next_chunk_preparer")
+
+    # Compile the graph
+    return builder.compile(checkpointer=checkpointer)
+
+
+paper_summarization_agent = build_paper_summarization_agent()
+paper_summarization_windowed_agent = build_paper_summarization_agent(windowed=True)
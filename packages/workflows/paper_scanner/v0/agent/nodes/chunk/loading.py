@@ -1,4 +1,10 @@
-from uuid import uuid4
+from typing import Dict, List
+from uuid import UUID
+from langchain_core.runnables import RunnableConfig
+from langgraph.types import Send
+
+from packages.framework.text_splitters.chunk_packer import group_chunks
+from packages.framework.utils.content_hash import content_fingerprint, content_uuid
 
 from packages.workflows.paper_scanner.v0.agent.schemas.states import (
     ChunkInfo,
@@ -7,35 +13,80 @@ from packages.workflows.paper_scanner.v0.agent.schemas.states import (
     OverallState,
     InputState,
 )
+from packages.workflows.paper_scanner.v0.agent.schemas.configuration import (
+    get_configuration,
+)
+from packages.workflows.paper_scanner.v0.utils.chunk_content import (
+    chunk_reference,
+    store_chunk,
+)
+from packages.workflows.paper_scanner.v0.utils.section_filter import label_sections
+
+
+# Fixed namespace, chunk ids of the same text are the same across runs and machines
+CHUNK_ID_NAMESPACE = UUID("6f1c0a52-3b8e-4f57-9a0c-2d5e8b7c4a19")
+
+
+def create_chunk_ids(chunks: List[str]) -> List[str]:
+    chunk_ids = []
+    occurrences: Dict[str, int] = {}
+    for chunk in chunks:
+        chunk_id = content_uuid(chunk, CHUNK_ID_NAMESPACE)
+        # Repeated texts in the same paper keep distinct ids
+        occurrence = occurrences.get(chunk_id, 0)
+        occurrences[chunk_id] = occurrence + 1
+        if occurrence:
+            chunk_id = content_uuid(f"{chunk}\x00{occurrence}", CHUNK_ID_NAMESPACE)
+        chunk_ids.append(chunk_id)
+    return chunk_ids
 
 
 # This node is the first one and initializes the state for the chunk processing agent
-def chunks_initializer(state: InputState):
+def chunks_initializer(state: InputState, config: RunnableConfig = None):
     chunks = state["chunks"]
-    min_chunk_length = 500  # Minimum character length for a chunk
-
-    # First pass: Merge short chunks
-    merged_chunks = []
-    if chunks:
-        current_chunk = chunks[
-            -1
-        ]  # Start with the last chunk since we're processing in reverse
-
-        for next_chunk in reversed(chunks[:-1]):  # Process remaining chunks in reverse
-            if len(current_chunk) < min_chunk_length:
-                # Merge with next chunk
-                current_chunk = next_chunk + "\n\n" + current_chunk
-            else:
-                merged_chunks.insert(0, current_chunk)
-                current_chunk = next_chunk
-
-        # Don't forget to add the last processed chunk
-        merged_chunks.insert(0, current_chunk)
-
-    # Create ChunkInfo objects after merging
+    configuration = get_configuration(config)
+
+    # References, acknowledgments, table-only sections... are not worth a discovery call
+    labeled_sections = label_sections(
+        chunks,
+        action=configuration["low_value_sections"],
+        max_citation_density=configuration["max_citation_density"],
+        max_table_density=configuration["max_table_density"],
+    )
+    sections = [section for section, processed in labeled_sections if processed]
+
+    # Pack adjacent sections into chunks close to the token budget, fewer discovery calls
+    groups = group_chunks(
+        sections,
+        token_budget=configuration["chunk_token_budget"] or None,
+        min_tokens=configuration["min_chunk_tokens"],
+    )
+
+    # Skipped sections stay at their place in the paper, after the chunk packing the sections before them
+    group_of_section = [position for position, group in enumerate(groups) for _ in group]
+    skipped_after: Dict[int, List[str]] = {}
+    num_sections = 0
+    for section, processed in labeled_sections:
+        if processed:
+            num_sections += 1
+        else:
+            group = group_of_section[num_sections - 1] if num_sections else -1
+            skipped_after.setdefault(group, []).append(section)
+
+    ordered_chunks = [(chunk, ChunkStatus.SKIPPED) for chunk in skipped_after.get(-1, [])]
+    for position, group in enumerate(groups):
+        ordered_chunks.append(("\n\n".join(group), ChunkStatus.PENDING))
+        ordered_chunks.extend(
+            (chunk, ChunkStatus.SKIPPED) for chunk in skipped_after.get(position, [])
+        )
+
+    # Create ChunkInfo objects after merging, texts move to the chunk store when one is configured.
+    # Skipped chunks are queued with the others for provenance, the preparers move them to the
+    # processed chunks without discovering them.
+    chunk_ids = create_chunk_ids([chunk for chunk, _ in ordered_chunks])
     chunks_queue = [
-        ChunkInfo(chunk_id=str(uuid4()), content=chunk, status=ChunkStatus.PENDING)
-        for chunk in merged_chunks
+        store_chunk(ChunkInfo(chunk_id=chunk_id, content=chunk, status=status), config)
+        for chunk_id, (chunk, status) in zip(chunk_ids, ordered_chunks)
     ]
 
     agent_state = OverallState()
@@ -45,21 +96,45 @@ def chunks_initializer(state: InputState):
     agent_state["current_chunk"] = None
     agent_state["chunks_queue"] = chunks_queue
     agent_state["processed_chunks"] = []
+    agent_state["paper_fingerprint"] = state.get(
+        "paper_fingerprint"
+    ) or content_fingerprint("\n\n".join(chunks))
 
     return agent_state
 
 
+# Skipped chunks at the head of the queue go to the processed chunks, at their place in the paper
+def move_skipped_chunks(
+    chunks_queue: List[ChunkInfo], processed_chunks: List[ChunkInfo]
+) -> List[ChunkInfo]:
+    position = 0
+    while (
+        position < len(chunks_queue)
+        and chunks_queue[position]["status"] == ChunkStatus.SKIPPED
+    ):
+        position += 1
+    processed_chunks.extend(chunks_queue[:position])
+    return chunks_queue[position:]
+
+
 # This node prepares the next chunk to be processed by the agent (executes first on each iteration)
-def next_chunk_preparer(state: OverallState):
+def next_chunk_preparer(state: OverallState, config: RunnableConfig = None):
     if state.get("current_chunk", None):
         # Add current chunk to the processed chunks, update its status to PROCESSED
         state["current_chunk"]["status"] = ChunkStatus.PROCESSED
-        state["processed_chunks"].append(state["current_chunk"])
+        processed_chunk = state["current_chunk"]
+        if get_configuration(config)["chunk_store"] is not None:
+            # The analysis was consumed by the routers, keep only the id and status
+            processed_chunk = chunk_reference(processed_chunk)
+        state["processed_chunks"].append(processed_chunk)
         # Set the current chunk to None
         state["current_chunk"] = None
 
     # Set the state["current_chunk"] to the first entry of the state["chunks_queue"]
     # Remove it from the queue
+    state["chunks_queue"] = move_skipped_chunks(
+        state["chunks_queue"], state["processed_chunks"]
+    )
     state["current_chunk"] = (
         state["chunks_queue"].pop(0) if len(state["chunks_queue"]) else None
     )
@@ -75,3 +150,47 @@ def should_continue(state: OverallState):
         return True
     else:
         return False
+
+
+# WINDOWED AGENT NODES
+# --------------------
+
+
+# This node prepares the next window of chunks to be discovered concurrently (windowed agent)
+def next_window_preparer(state: OverallState, config: RunnableConfig):
+    window_size = max(1, get_configuration(config)["window_size"])
+
+    # Mark the previous window as processed
+    processed_chunks = list(state.get("processed_chunks", []))
+    for chunk in state.get("current_window", []):
+        chunk["status"] = ChunkStatus.PROCESSED
+        processed_chunks.append(chunk)
+
+    # Pop the next window from the queue, it ends before a skipped chunk to keep the paper order
+    chunks_queue = move_skipped_chunks(state["chunks_queue"], processed_chunks)
+    window = []
+    for chunk in chunks_queue[:window_size]:
+        if chunk["status"] == ChunkStatus.SKIPPED:
+            break
+        window.append(chunk)
+
+    return {
+        "current_window": window,
+        "chunks_queue": chunks_queue[len(window) :],
+        "processed_chunks": processed_chunks,
+        "window_analyses": None,  # Reset the analyses of the previous window
+    }
+
+
+# Fans out every chunk of the window against the same findings snapshot, or finishes when the queue is empty
+def window_dispatcher(state: OverallState):
+    if not state["current_window"]:
+        return "findings_consolidator"
+
+    return [
+        Send(
+            "window_chunk_processor",
+            {"current_chunk": {**chunk}, "findings": state["findings"]},
+        )
+        for chunk in state["current_window"]
+    ]
@@ -1,18 +1,81 @@
+import logging
+from typing import Dict, List, Optional
+from langchain_core.runnables import RunnableConfig
+from packages.framework.utils.estimate_tokens import estimate_tokens
 from packages.workflows.paper_scanner.v0.agent.schemas.format_instructions import (
     ChunkProcessorAnalysis,
 )
 from packages.workflows.paper_scanner.v0.agent.prompt_templates import (
     discovery_prompt,
 )
-from packages.workflows.paper_scanner.v0.agent.schemas.states import OverallState
-from packages.workflows.paper_scanner.v0.utils.call_llm import call_llm
+from packages.workflows.paper_scanner.v0.agent.schemas.states import (
+    ChunkInfo,
+    Finding,
+    FindingsCollection,
+    OverallState,
+    PaperMetadata,
+    as_findings_collection,
+    merge_metadata,
+    windowChunkProcessorState,
+)
+from packages.workflows.paper_scanner.v0.agent.schemas.configuration import (
+    get_configuration,
+)
+from packages.workflows.paper_scanner.v0.agent.nodes.metadata.update import (
+    metadata_updater,
+)
+from packages.workflows.paper_scanner.v0.utils.call_llm import acall_llm, call_llm
+from packages.workflows.paper_scanner.v0.utils.chunk_content import (
+    chunk_reference,
+    get_chunks_content,
+)
 from langgraph.types import Send
 
 
-# This node processes the chunk using the LLM and routes to the appropriate nodes to create and update findings and update metadata
-def chunk_processor(state: OverallState):
-    # Take the current_chunk
-    current_chunk = state["current_chunk"]
+def format_finding_for_discovery(finding: Finding) -> str:
+    return f"Id: {finding['id']}\nTitle: {finding['title']}\nSummary: {finding['summary']}\n\n"
+
+
+# Keeps the existing findings most related to the chunk, so the discovery prompt does not grow with the paper
+def select_relevant_findings(
+    findings: List[Finding],
+    text: str,
+    top_k: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+) -> List[Finding]:
+    if top_k is None and max_tokens is None:
+        return list(findings)
+
+    # The collection of the state keeps its search index across chunks
+    findings = as_findings_collection(findings)
+    ranked = findings.rank(text)
+    if top_k is not None:
+        ranked = ranked[:top_k]
+
+    selected = []
+    used_tokens = 0
+    for position in ranked:
+        finding_tokens = estimate_tokens(format_finding_for_discovery(findings[position]))
+        if max_tokens is not None and used_tokens + finding_tokens > max_tokens:
+            break
+        selected.append(position)
+        used_tokens += finding_tokens
+
+    # Keep the order in which findings were discovered
+    return [findings[position] for position in sorted(selected)]
+
+
+def create_discovery_parameters(
+    state: OverallState, config: Optional[RunnableConfig] = None
+):
+    configuration = get_configuration(config)
+    text = get_chunks_content(state["current_chunk"], config)
+    findings = select_relevant_findings(
+        state["findings"],
+        text,
+        top_k=configuration["findings_context_top_k"],
+        max_tokens=configuration["findings_context_max_tokens"],
+    )
 
     # Format existing findings with respetive id, title, summary into a text
     ### Id: <id>
@@ -20,21 +83,36 @@ def chunk_processor(state: OverallState):
     ### Summary: <summary>
     ### ...
     existing_findings = "".join(
-        [
-            f"Id: {finding['id']}\nTitle: {finding['title']}\nSummary: {finding['summary']}\n\n"
-            for finding in state["findings"]
-        ]
+        [format_finding_for_discovery(finding) for finding in findings]
     )
-    if len(state["findings"]) == 0:
+    if len(findings) == 0:
         existing_findings = "No existing findings yet"
 
+    return {
+        "text": text,
+        "existing_findings": existing_findings,
+    }
+
+
+# This node processes the chunk using the LLM and routes to the appropriate nodes to create and update findings and update metadata
+def chunk_processor(state: OverallState, config: RunnableConfig = None):
     # Process the chunk using the LLM
     analysis_result: ChunkProcessorAnalysis = call_llm(
         prompt_template=discovery_prompt,
-        input_parameters={
-            "text": current_chunk["content"],
-            "existing_findings": existing_findings,
-        },
+        input_parameters=create_discovery_parameters(state, config),
+        pydantic_object=ChunkProcessorAnalysis,
+    )
+
+    state["current_chunk"]["analysis"] = analysis_result
+
+    return state
+
+
+# Async version of chunk_processor
+async def achunk_processor(state: OverallState, config: RunnableConfig = None):
+    analysis_result: ChunkProcessorAnalysis = await acall_llm(
+        prompt_template=discovery_prompt,
+        input_parameters=create_discovery_parameters(state, config),
         pydantic_object=ChunkProcessorAnalysis,
     )
 
@@ -44,13 +122,62 @@ def chunk_processor(state: OverallState):
 
 
 def search_finding_by_id(state: OverallState, finding_id: str):
-    for finding in state["findings"]:
-        if finding["id"] == finding_id:
-            return finding
-    return None
+    findings = state["findings"]
+    if isinstance(findings, FindingsCollection):
+        return findings.get(finding_id)
+    # Indexing a plain list costs more than scanning it once
+    return next((finding for finding in findings if finding["id"] == finding_id), None)
+
+
+# Groups the creator and updater branches sent with the same chunks into one findings_batch_processor branch,
+# so the text of the chunks is sent once for all their findings
+def batch_finding_branches(branches: list) -> list:
+    batches: Dict[tuple, dict] = {}
+    batched_branches: Dict[tuple, List[Send]] = {}
+    other_branches = []
+
+    for branch in branches:
+        if not isinstance(branch, Send) or branch.node not in (
+            "finding_creator",
+            "finding_updater",
+        ):
+            other_branches.append(branch)
+            continue
+
+        arg = branch.arg
+        key = tuple(arg.get("source_chunks_ids") or [arg["chunk"]["chunk_id"]])
+        batch = batches.setdefault(
+            key,
+            {
+                "chunk": arg["chunk"],
+                "new_findings": [],
+                "findings_updates": [],
+                "source_chunks_ids": arg.get("source_chunks_ids"),
+            },
+        )
+        if branch.node == "finding_creator":
+            batch["new_findings"].append(
+                {"title": arg["title"], "description": arg["description"]}
+            )
+        else:
+            batch["findings_updates"].append(
+                {"finding": arg["finding"], "what_to_update": arg["what_to_update"]}
+            )
+        batched_branches.setdefault(key, []).append(branch)
+
+    # A single finding gains nothing from the batched prompt
+    finding_branches = [
+        (
+            Send("findings_batch_processor", batch)
+            if len(batched_branches[key]) > 1
+            else batched_branches[key][0]
+        )
+        for key, batch in batches.items()
+    ]
+    return finding_branches + other_branches
 
 
-def post_processing_router(state: OverallState):
+def post_processing_router(state: OverallState, config: RunnableConfig = None):
     # Take the current_chunk
     current_chunk_analysis = state["current_chunk"]["analysis"]
 
@@ -64,7 +191,7 @@ def post_processing_router(state: OverallState):
             Send(
                 "finding_updater",
                 {
-                    "chunk": state["current_chunk"],
+                    "chunk": chunk_reference(state["current_chunk"]),
                     "finding": existing_finding,
                     "what_to_update": finding["what_to_update"],
                 },
@@ -76,7 +203,7 @@ def post_processing_router(state: OverallState):
             Send(
                 "finding_creator",
                 {
-                    "chunk": state["current_chunk"],
+                    "chunk": chunk_reference(state["current_chunk"]),
                     "title": finding["title"],
                     "description": finding["description"],
                 },
@@ -88,7 +215,143 @@ def post_processing_router(state: OverallState):
     if any(metadata.values()):
         branches.append(Send("metadata_updater", metadata))
 
+    if get_configuration(config)["batch_finding_changes"]:
+        branches = batch_finding_branches(branches)
+
     if len(branches) == 0:
         branches.append(Send("processing_sink", state))
 
     return branches
+
+
+# WINDOWED AGENT NODES
+# --------------------
+
+
+# This node processes one chunk of the window against the findings snapshot taken when the window was prepared
+def window_chunk_processor(
+    state: windowChunkProcessorState, config: RunnableConfig = None
+):
+    analysed_state = chunk_processor(state, config)
+
+    return {"window_analyses": [analysed_state["current_chunk"]]}
+
+
+# Async version of window_chunk_processor
+async def awindow_chunk_processor(
+    state: windowChunkProcessorState, config: RunnableConfig = None
+):
+    analysed_state = await achunk_processor(state, config)
+
+    return {"window_analyses": [analysed_state["current_chunk"]]}
+
+
+def sort_window_analyses(state: OverallState) -> List[ChunkInfo]:
+    # Analyses arrive in completion order, restore the order of the window
+    window_order = {
+        chunk["chunk_id"]: position
+        for position, chunk in enumerate(state["current_window"])
+    }
+    return sorted(
+        state["window_analyses"],
+        key=lambda chunk: window_order.get(chunk["chunk_id"], len(window_order)),
+    )
+
+
+# This node joins the window and reconciles the metadata found by its chunks (first value found wins)
+def window_reconciler(state: OverallState):
+    metadata: PaperMetadata = {}
+    for chunk in sort_window_analyses(state):
+        chunk_metadata = chunk["analysis"]["metadata"]
+        if any(chunk_metadata.values()):
+            metadata = merge_metadata(
+                metadata, metadata_updater(chunk_metadata)["metadata"]
+            )
+
+    return {"metadata": metadata} if metadata else {}
+
+
+def combine_chunks(chunks: List[ChunkInfo]) -> ChunkInfo:
+    if len(chunks) == 1:
+        return chunk_reference(chunks[0])
+
+    # Several chunks of the window point to the same finding, send their text together
+    # (stored chunks are joined by the receiving node from source_chunks_ids)
+    stored = any(chunk.get("content") is None for chunk in chunks)
+    return ChunkInfo(
+        chunk_id=chunks[0]["chunk_id"],
+        content=(
+            None if stored else "\n\n".join(chunk["content"] for chunk in chunks)
+        ),
+        status=chunks[0]["status"],
+    )
+
+
+# Reconciles the findings of the whole window, so that one finding is created or updated at most once per window
+def window_post_processing_router(state: OverallState, config: RunnableConfig = None):
+    updates: Dict[str, dict] = {}
+    new_findings: Dict[str, dict] = {}
+
+    for chunk in sort_window_analyses(state):
+        chunk_analysis = chunk["analysis"]["findings"]
+
+        # Group updates of the same existing finding
+        for finding in chunk_analysis["findings_updates"]:
+            if search_finding_by_id(state, finding["id"]) is None:
+                logging.warning(f"Finding with id {finding['id']} not found")
+                continue
+            entry = updates.setdefault(
+                finding["id"], {"chunks": [], "what_to_update": []}
+            )
+            if chunk not in entry["chunks"]:
+                entry["chunks"].append(chunk)
+            if finding["what_to_update"] not in entry["what_to_update"]:
+                entry["what_to_update"].append(finding["what_to_update"])
+
+        # Deduplicate new findings discovered by several chunks from the same snapshot
+        for finding in chunk_analysis["new_findings"]:
+            entry = new_findings.setdefault(
+                finding["title"].strip().lower(),
+                {
+                    "title": finding["title"],
+                    "description": finding["description"],
+                    "chunks": [],
+                },
+            )
+            if chunk not in entry["chunks"]:
+                entry["chunks"].append(chunk)
+
+    branches = []
+    for finding_id, entry in updates.items():
+        branches.append(
+            Send(
+                "finding_updater",
+                {
+                    "chunk": combine_chunks(entry["chunks"]),
+                    "finding": search_finding_by_id(state, finding_id),
+                    "what_to_update": "\n".join(entry["what_to_update"]),
+                    "source_chunks_ids": [c["chunk_id"] for c in entry["chunks"]],
+                },
+            )
+        )
+
+    for entry in new_findings.values():
+        branches.append(
+            Send(
+                "finding_creator",
+                {
+                    "chunk": combine_chunks(entry["chunks"]),
+                    "title": entry["title"],
+                    "description": entry["description"],
+                    "source_chunks_ids": [c["chunk_id"] for c in entry["chunks"]],
+                },
+            )
+        )
+
+    if get_configuration(config)["batch_finding_changes"]:
+        branches = batch_finding_branches(branches)
+
+    if len(branches) == 0:
+        branches.append("processing_sink")
+
+    return branches
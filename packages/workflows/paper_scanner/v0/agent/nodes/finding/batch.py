@@ -0,0 +1,157 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+from langchain_core.runnables import RunnableConfig
+from packages.workflows.paper_scanner.v0.utils.call_llm import acall_llm, call_llm
+from packages.workflows.paper_scanner.v0.utils.chunk_content import (
+    get_chunks_content,
+)
+
+from packages.workflows.paper_scanner.v0.agent.schemas.states import (
+    OverallState,
+    findingCreatorState,
+    findingsBatchState,
+    findingUpdaterState,
+)
+from packages.workflows.paper_scanner.v0.agent.schemas.format_instructions import (
+    FindingsBatch,
+)
+from packages.workflows.paper_scanner.v0.agent.nodes.finding.creation import (
+    afinding_creator,
+    create_finding_state,
+    finding_creator,
+)
+from packages.workflows.paper_scanner.v0.agent.nodes.finding.update import (
+    afinding_updater,
+    finding_updater,
+    update_finding_state,
+)
+
+from packages.workflows.paper_scanner.v0.agent.prompt_templates import (
+    findings_batch_prompt,
+)
+
+
+# Splits the batch into the states the per-finding creator and updater nodes take
+def split_batch_state(
+    state: findingsBatchState,
+) -> Tuple[Dict[str, findingCreatorState], Dict[str, findingUpdaterState]]:
+    shared = {
+        "chunk": state["chunk"],
+        "source_chunks_ids": state.get("source_chunks_ids"),
+    }
+    creations = {
+        f"new-{index}": {**shared, **new_finding}
+        for index, new_finding in enumerate(state["new_findings"])
+    }
+    updates = {
+        f"update-{index}": {**shared, **finding_update}
+        for index, finding_update in enumerate(state["findings_updates"])
+    }
+    return creations, updates
+
+
+def create_findings_batch_parameters(
+    state: findingsBatchState, config: Optional[RunnableConfig] = None
+):
+    creations, updates = split_batch_state(state)
+
+    new_findings_as_text = "".join(
+        f"Key: {key}\nTitle: {creation['title']}\nSubject: {creation['description']}\n\n"
+        for key, creation in creations.items()
+    )
+    findings_updates_as_text = "".join(
+        f"Key: {key}\nCurrent finding: Title: {update['finding']['title']}\n"
+        f"Summary: {update['finding']['summary']}\nMethodology: {update['finding']['methodology']}\n"
+        f"What to update: {update['what_to_update']}\n\n"
+        for key, update in updates.items()
+    )
+
+    return {
+        "new_findings": new_findings_as_text or "No new findings",
+        "findings_updates": findings_updates_as_text or "No findings updates",
+        "text": get_chunks_content(
+            state["chunk"], config, state.get("source_chunks_ids")
+        ),
+    }
+
+
+# Applies the batched results, returns the keys missing from the LLM answer
+def apply_findings_batch(
+    state: findingsBatchState, batch_result: Optional[FindingsBatch]
+) -> Tuple[List, List[str], List[str]]:
+    creations, updates = split_batch_state(state)
+    results_by_key = {}
+    if batch_result is not None:
+        for result in batch_result["new_findings"] + batch_result["findings_updates"]:
+            results_by_key.setdefault(result["key"], result)
+
+    findings = []
+    for key, creation in creations.items():
+        if key in results_by_key:
+            findings += create_finding_state(creation, results_by_key[key])["findings"]
+    for key, update in updates.items():
+        if key in results_by_key:
+            findings += update_finding_state(update, results_by_key[key])["findings"]
+
+    missing_creations = [key for key in creations if key not in results_by_key]
+    missing_updates = [key for key in updates if key not in results_by_key]
+    if missing_creations or missing_updates:
+        logging.warning(
+            f"Batched findings call missed {missing_creations + missing_updates}, falling back to per-finding calls"
+        )
+    return findings, missing_creations, missing_updates
+
+
+# This node creates and updates every finding of a chunk in a single LLM call, so the chunk text is sent once.
+# Findings the batched call fails to return are created or updated one by one.
+def findings_batch_processor(state: findingsBatchState, config: RunnableConfig = None):
+    try:
+        batch_result: FindingsBatch = call_llm(
+            prompt_template=findings_batch_prompt,
+            input_parameters=create_findings_batch_parameters(state, config),
+            pydantic_object=FindingsBatch,
+        )
+    except Exception as e:
+        logging.warning(f"Batched findings call failed: {str(e)}")
+        batch_result = None
+
+    findings, missing_creations, missing_updates = apply_findings_batch(
+        state, batch_result
+    )
+
+    creations, updates = split_batch_state(state)
+    for key in missing_creations:
+        findings += finding_creator(creations[key], config)["findings"]
+    for key in missing_updates:
+        findings += finding_updater(updates[key], config)["findings"]
+
+    newState: OverallState = {"findings": findings}
+    return newState
+
+
+# Async version of findings_batch_processor
+async def afindings_batch_processor(
+    state: findingsBatchState, config: RunnableConfig = None
+):
+    try:
+        batch_result: FindingsBatch = await acall_llm(
+            prompt_template=findings_batch_prompt,
+            input_parameters=create_findings_batch_parameters(state, config),
+            pydantic_object=FindingsBatch,
+        )
+    except Exception as e:
+        logging.warning(f"Batched findings call failed: {str(e)}")
+        batch_result = None
+
+    findings, missing_creations, missing_updates = apply_findings_batch(
+        state, batch_result
+    )
+
+    creations, updates = split_batch_state(state)
+    for key in missing_creations:
+        findings += (await afinding_creator(creations[key], config))["findings"]
+    for key in missing_updates:
+        findings += (await afinding_updater(updates[key], config))["findings"]
+
+    newState: OverallState = {"findings": findings}
+    return newState
@@ -1,49 +1,170 @@
-from uuid import uuid4
+import logging
+from typing import Dict, List, Optional
+from uuid import UUID
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from packages.workflows.paper_scanner.v0.agent.schemas.format_instructions import (
     FindingsConsolidator,
 )
-from packages.workflows.paper_scanner.v0.utils.call_llm import call_llm
+from packages.framework.utils.content_hash import content_uuid
+from packages.workflows.paper_scanner.v0.utils.call_llm import acall_llm, call_llm
 
 from packages.workflows.paper_scanner.v0.agent.schemas.states import (
+    Finding,
     OverallState,
 )
+from packages.workflows.paper_scanner.v0.agent.schemas.configuration import (
+    get_configuration,
+)
 
 from packages.workflows.paper_scanner.v0.agent.prompt_templates import (
     findings_consolidator_prompt,
 )
 
 
-# This node executes at the very end of the process to consolidate all findings into a cleaner set of findings
-def findings_consolidator(state: OverallState):
-    findings = state["findings"]
+# Fixed namespace, consolidated findings of the same content get the same id across runs
+CONSOLIDATED_FINDING_ID_NAMESPACE = UUID("5cc4ba02-b352-41ec-8c9a-5aa439803c57")
 
-    # If there are no findings, return the state as is
-    if len(findings) == 0:
-        return state
 
+def create_consolidation_parameters(findings: List[Finding]):
     findings_as_text = "".join(
         [
             f"Title: {finding['title']}\nSummary: {finding['summary']}\nMethodology: {finding['methodology']}\n\n"
             for finding in findings
         ]
     )
+    return {"findings": findings_as_text}
+
 
-    # Consolidate findings
+def consolidate_group(findings: List[Finding]) -> List[Finding]:
     consolidation_result = call_llm(
         prompt_template=findings_consolidator_prompt,
-        input_parameters={
-            "findings": findings_as_text,
-        },
+        input_parameters=create_consolidation_parameters(findings),
+        pydantic_object=FindingsConsolidator,
+    )
+    return consolidation_result["findings"]
+
+
+async def aconsolidate_group(findings: List[Finding]) -> List[Finding]:
+    consolidation_result = await acall_llm(
+        prompt_template=findings_consolidator_prompt,
+        input_parameters=create_consolidation_parameters(findings),
         pydantic_object=FindingsConsolidator,
     )
+    return consolidation_result["findings"]
+
+
+def partition_findings(
+    findings: List[Finding], group_size: int
+) -> List[List[Finding]]:
+    # Balanced groups of consecutive findings (neighbouring findings come from neighbouring chunks)
+    num_groups = -(-len(findings) // group_size)
+    base_size, remainder = divmod(len(findings), num_groups)
+    groups, start = [], 0
+    for group_index in range(num_groups):
+        end = start + base_size + (1 if group_index < remainder else 0)
+        groups.append(findings[start:end])
+        start = end
+    return groups
+
+
+def needs_reduction(findings: List[Finding], group_size: Optional[int]) -> bool:
+    return group_size is not None and len(findings) > max(group_size, 1)
+
+
+def log_reduction_level(level: int, findings: List[Finding], groups: list) -> None:
+    logging.info(
+        f"Consolidation level {level}: {len(findings)} findings in {len(groups)} groups"
+    )
+
+
+# Consolidates groups in parallel and merges the partial results level by level until they fit in one call
+def tree_reduce_findings(
+    findings: List[Finding], group_size: Optional[int], max_concurrency: int
+) -> List[Finding]:
+    level = 0
+    while needs_reduction(findings, group_size):
+        groups = partition_findings(findings, group_size)
+        log_reduction_level(level, findings, groups)
+        partial_results = RunnableLambda(consolidate_group).batch(
+            groups, config={"max_concurrency": max_concurrency}
+        )
+        reduced = [finding for partial in partial_results for finding in partial]
+        if len(reduced) >= len(findings):
+            # The LLM did not merge anything at this level, its groups are already consolidated
+            return reduced
+        findings = reduced
+        level += 1
 
-    # Append an id to each finding
+    return consolidate_group(findings)
+
+
+# Async version of tree_reduce_findings
+async def atree_reduce_findings(
+    findings: List[Finding], group_size: Optional[int], max_concurrency: int
+) -> List[Finding]:
+    level = 0
+    while needs_reduction(findings, group_size):
+        groups = partition_findings(findings, group_size)
+        log_reduction_level(level, findings, groups)
+        partial_results = await RunnableLambda(aconsolidate_group).abatch(
+            groups, config={"max_concurrency": max_concurrency}
+        )
+        reduced = [finding for partial in partial_results for finding in partial]
+        if len(reduced) >= len(findings):
+            return reduced
+        findings = reduced
+        level += 1
+
+    return await aconsolidate_group(findings)
+
+
+def consolidate_findings_state(state: OverallState, consolidated: List[Finding]):
+    # Append an id to each finding, derived from its content like the chunk ids
     consolidated_findings = []
-    for finding in consolidation_result["findings"]:
-        finding["id"] = str(uuid4())
+    occurrences: Dict[str, int] = {}
+    for finding in consolidated:
+        text = f"{finding['title']}\n{finding['summary']}\n{finding['methodology']}"
+        occurrence = occurrences.get(text, 0)
+        occurrences[text] = occurrence + 1
+        if occurrence:
+            # Repeated findings keep distinct ids
+            text = f"{text}\x00{occurrence}"
+        finding["id"] = content_uuid(text, CONSOLIDATED_FINDING_ID_NAMESPACE)
         consolidated_findings.append(finding)
 
     # Update state with consolidated findings
     state["consolidated_findings"] = consolidated_findings
 
     return state
+
+
+# This node executes at the very end of the process to consolidate all findings into a cleaner set of findings
+def findings_consolidator(state: OverallState, config: RunnableConfig = None):
+    # If there are no findings, return the state as is
+    if len(state["findings"]) == 0:
+        return state
+
+    # Consolidate findings, in a single call when they fit in one group
+    configuration = get_configuration(config)
+    consolidated = tree_reduce_findings(
+        list(state["findings"]),
+        configuration["consolidation_group_size"],
+        configuration["consolidation_max_concurrency"],
+    )
+
+    return consolidate_findings_state(state, consolidated)
+
+
+# Async version of findings_consolidator
+async def afindings_consolidator(state: OverallState, config: RunnableConfig = None):
+    if len(state["findings"]) == 0:
+        return state
+
+    configuration = get_configuration(config)
+    consolidated = await atree_reduce_findings(
+        list(state["findings"]),
+        configuration["consolidation_group_size"],
+        configuration["consolidation_max_concurrency"],
+    )
+
+    return consolidate_findings_state(state, consolidated)
@@ -1,5 +1,10 @@
+from typing import Optional
 from uuid import uuid4
-from packages.workflows.paper_scanner.v0.utils.call_llm import call_llm
+from langchain_core.runnables import RunnableConfig
+from packages.workflows.paper_scanner.v0.utils.call_llm import acall_llm, call_llm
+from packages.workflows.paper_scanner.v0.utils.chunk_content import (
+    get_chunks_content,
+)
 
 from packages.workflows.paper_scanner.v0.agent.schemas.states import (
     Finding,
@@ -15,23 +20,22 @@ from packages.workflows.paper_scanner.v0.agent.prompt_templates import (
 )
 
 
-def finding_creator(state: findingCreatorState):
-    chunk_text = state["chunk"]["content"]
-    chunk_id = state["chunk"]["chunk_id"]
-    funding_description = state["description"]
-    funding_title = state["title"]
+def create_finding_creation_parameters(
+    state: findingCreatorState, config: Optional[RunnableConfig] = None
+):
+    return {
+        "text": get_chunks_content(
+            state["chunk"], config, state.get("source_chunks_ids")
+        ),
+        "description": state["description"],
+        "title": state["title"],
+    }
 
-    # Create a new finding calling the LLM
-    new_finding_data: NewFinding = call_llm(
-        prompt_template=finding_creation_prompt,
-        input_parameters={
-            "text": chunk_text,
-            "description": funding_description,
-            "title": funding_title,
-        },
-        pydantic_object=NewFinding,
-        
-    )
+
+def create_finding_state(
+    state: findingCreatorState, new_finding_data: NewFinding
+) -> OverallState:
+    chunk_id = state["chunk"]["chunk_id"]
 
     # Create a new finding object
     new_finding: Finding = {
@@ -39,10 +43,32 @@ def finding_creator(state: findingCreatorState):
         "title": new_finding_data["title"],
         "summary": new_finding_data["summary"],
         "methodology": new_finding_data["methodology"],
-        "source_chunks_ids": [chunk_id],
+        "source_chunks_ids": state.get("source_chunks_ids") or [chunk_id],
     }
 
     # Add the new finding to the state
     newState: OverallState = {"findings": [new_finding]}
 
     return newState
+
+
+def finding_creator(state: findingCreatorState, config: RunnableConfig = None):
+    # Create a new finding calling the LLM
+    new_finding_data: NewFinding = call_llm(
+        prompt_template=finding_creation_prompt,
+        input_parameters=create_finding_creation_parameters(state, config),
+        pydantic_object=NewFinding,
+    )
+
+    return create_finding_state(state, new_finding_data)
+
+
+# Async version of finding_creator
+async def afinding_creator(state: findingCreatorState, config: RunnableConfig = None):
+    new_finding_data: NewFinding = await acall_llm(
+        prompt_template=finding_creation_prompt,
+        input_parameters=create_finding_creation_parameters(state, config),
+        pydantic_object=NewFinding,
+    )
+
+    return create_finding_state(state, new_finding_data)
@@ -1,4 +1,9 @@
-from packages.workflows.paper_scanner.v0.utils.call_llm import call_llm
+from typing import Optional
+from langchain_core.runnables import RunnableConfig
+from packages.workflows.paper_scanner.v0.utils.call_llm import acall_llm, call_llm
+from packages.workflows.paper_scanner.v0.utils.chunk_content import (
+    get_chunks_content,
+)
 
 from packages.workflows.paper_scanner.v0.agent.schemas.format_instructions import (
     FindingUpdate,
@@ -14,35 +19,58 @@ from packages.workflows.paper_scanner.v0.agent.prompt_templates import (
 )
 
 
-def finding_updater(state: findingUpdaterState):
-    chunk_text = state["chunk"]["content"]
-    chunk_id = state["chunk"]["chunk_id"]
+def create_finding_update_parameters(
+    state: findingUpdaterState, config: Optional[RunnableConfig] = None
+):
     finding = state["finding"]
-    what_to_update = state["what_to_update"]
 
     finding_data_as_text = f"Title: {finding['title']}\nSummary: {finding['summary']}\nMethodology: {finding['methodology']}"
 
-    finding_update_data: FindingUpdate = call_llm(
-        prompt_template=finding_update_prompt,
-        input_parameters={
-            "finding": finding_data_as_text,
-            "text": chunk_text,
-            "what_to_update": what_to_update,
-        },
-        pydantic_object=FindingUpdate,
-        
-    )
+    return {
+        "finding": finding_data_as_text,
+        "text": get_chunks_content(
+            state["chunk"], config, state.get("source_chunks_ids")
+        ),
+        "what_to_update": state["what_to_update"],
+    }
+
+
+def update_finding_state(
+    state: findingUpdaterState, finding_update_data: FindingUpdate
+) -> OverallState:
+    chunk_id = state["chunk"]["chunk_id"]
 
     # Create a new finding object with the updated data
     new_finding: Finding = {
-        **finding,
+        **state["finding"],
         "title": finding_update_data["title"],
         "summary": finding_update_data["summary"],
         "methodology": finding_update_data["methodology"],
-        "source_chunks_ids": [chunk_id],
+        "source_chunks_ids": state.get("source_chunks_ids") or [chunk_id],
     }
 
     # Add the new finding to the state
     newState: OverallState = {"findings": [new_finding]}
 
     return newState
+
+
+def finding_updater(state: findingUpdaterState, config: RunnableConfig = None):
+    finding_update_data: FindingUpdate = call_llm(
+        prompt_template=finding_update_prompt,
+        input_parameters=create_finding_update_parameters(state, config),
+        pydantic_object=FindingUpdate,
+    )
+
+    return update_finding_state(state, finding_update_data)
+
+
+# Async version of finding_updater
+async def afinding_updater(state: findingUpdaterState, config: RunnableConfig = None):
+    finding_update_data: FindingUpdate = await acall_llm(
+        prompt_template=finding_update_prompt,
+        input_parameters=create_finding_update_parameters(state, config),
+        pydantic_object=FindingUpdate,
+    )
+
+    return update_finding_state(state, finding_update_data)
@@ -84,6 +84,35 @@ What to update:
 """
 )
 
+findings_batch_prompt = PromptTemplate.from_template(
+    """
+You are an expert research analyzer. Create the requested new findings and update the requested existing findings from the given text.
+
+guidelines:
+- Return exactly one result per requested key, using the same key.
+- Avoid returning latex or code snippets, istead, provide explanatory plain text.
+- New findings summary and methodology should be clear, concise and tightly related to the title and subject of the finding.
+- Update existing findings with new information only where suitable.
+
+New findings to create:
+```
+{new_findings}
+```
+
+Existing findings to update:
+```
+{findings_updates}
+```
+
+Text:
+```
+{text}
+```
+
+{format_instructions}
+"""
+)
+
 findings_consolidator_prompt = PromptTemplate.from_template(
     """
 You are a highly skilled research assistant tasked with consolidating academic findings. The goal is to identify and synthesize the key research contributions and scholarly insights, focusing exclusively on novel academic discoveries, methodological advances, and theoretical developments.
@@ -0,0 +1,53 @@
+from typing import Optional
+from typing_extensions import TypedDict
+from langchain_core.runnables import RunnableConfig
+from packages.framework.stores.chunk_store import ChunkStore
+
+# HERE LIES THE RUNTIME CONFIGURATION SCHEMA FOR THE AGENT
+# Values are read from config["configurable"] so they are not stored in the graph state
+# ----------------------------
+
+
+class ScannerConfiguration(TypedDict, total=False):
+    window_size: int  # Number of chunks discovered concurrently by the windowed agent
+    chunk_token_budget: int  # Adjacent sections are packed into chunks of about this many tokens, 0 to only merge short sections
+    min_chunk_tokens: int  # Sections shorter than this are always merged with their neighbours
+    low_value_sections: str  # "keep" (default), "skip" or "downsize" (keep their prose only) references, acknowledgments, table-only appendices...
+    max_citation_density: float  # Sections with a larger share of citation lines are low-value
+    max_table_density: float  # Appendix sections with a larger share of table rows are low-value
+    findings_context_top_k: Optional[int]  # Existing findings shown to the discovery prompt, None for all
+    findings_context_max_tokens: Optional[int]  # Token cap of the existing findings context, None for no cap
+    consolidation_group_size: Optional[int]  # Max findings per consolidation call before tree-reducing, None for one call
+    consolidation_max_concurrency: int  # Consolidation calls running in parallel at each tree level
+    batch_finding_changes: bool  # Create and update all findings of a chunk in one LLM call
+    chunk_store: Optional[ChunkStore]  # When set, the state carries chunk ids and nodes read chunk texts from the store
+
+
+DEFAULT_CONFIGURATION: ScannerConfiguration = {
+    "window_size": 4,
+    "chunk_token_budget": 2500,  # About the 10000 characters of a split section
+    "min_chunk_tokens": 125,
+    "low_value_sections": "keep",
+    "max_citation_density": 0.5,
+    "max_table_density": 0.6,
+    "findings_context_top_k": None,
+    "findings_context_max_tokens": None,
+    "consolidation_group_size": 30,
+    "consolidation_max_concurrency": 4,
+    "batch_finding_changes": False,
+    "chunk_store": None,
+}
+
+
+def get_configuration(config: Optional[RunnableConfig]) -> ScannerConfiguration:
+    configurable = (config or {}).get("configurable", {}) or {}
+
+    # Fall back to the defaults for every missing or empty value
+    return {
+        key: (
+            configurable.get(key)
+            if configurable.get(key) is not None
+            else default_value
+        )
+        for key, default_value in DEFAULT_CONFIGURATION.items()
+    }
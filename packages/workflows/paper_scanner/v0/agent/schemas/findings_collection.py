@@ -0,0 +1,237 @@
+from bisect import bisect_right
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional
+from typing import NamedTuple, Sequence, Tuple
+
+from packages.framework.retrievers.bm25_index import BM25Index
+
+if TYPE_CHECKING:
+    from packages.workflows.paper_scanner.v0.agent.schemas.states import Finding
+
+# HERE LIES THE FINDINGS COLLECTION OF THE STATE
+# Findings are kept as compact immutable records, in discovery order with an index by id. A collection
+# is a version of a log shared with the collections it was derived from, an upsert adds a version to
+# the log instead of copying the findings, so the reducer applies each update in O(1) and the previous
+# channel value still reads its own findings. The log also keeps a search index, updated with the
+# findings changed since the previous search
+# ----------------------------
+
+
+class FindingRecord(NamedTuple):
+    id: str
+    title: Optional[str]
+    summary: Optional[str]
+    methodology: Optional[str]
+    keywords: Tuple[str, ...]
+    source_chunks_ids: Tuple[str, ...]
+
+    @classmethod
+    def from_finding(cls, finding: "Finding") -> "FindingRecord":
+        return cls(
+            finding["id"],
+            finding.get("title"),
+            finding.get("summary"),
+            finding.get("methodology"),
+            # Ensure the finding has keywords even if empty
+            tuple(finding.get("keywords") or ()),
+            tuple(finding.get("source_chunks_ids") or ()),
+        )
+
+    def merge(self, finding: "Finding") -> "FindingRecord":
+        # Update only for non-null values, keywords and source chunks keep their first-seen order
+        return FindingRecord(
+            self.id,
+            finding.get("title") or self.title,
+            finding.get("summary") or self.summary,
+            finding.get("methodology") or self.methodology,
+            (
+                merge_unique(self.keywords, finding["keywords"])
+                if "keywords" in finding
+                else self.keywords
+            ),
+            merge_unique(
+                self.source_chunks_ids, finding.get("source_chunks_ids") or ()
+            ),
+        )
+
+    def as_finding(self) -> "Finding":
+        return {
+            "id": self.id,
+            "title": self.title,
+            "summary": self.summary,
+            "methodology": self.methodology,
+            "keywords": list(self.keywords),
+            "source_chunks_ids": list(self.source_chunks_ids),
+        }
+
+
+def merge_unique(
+    existing_values: Tuple[str, ...], new_values: Iterable[str]
+) -> Tuple[str, ...]:
+    if all(value in existing_values for value in new_values):
+        return existing_values
+    return tuple(dict.fromkeys([*existing_values, *new_values]))
+
+
+class _FindingsLog:
+    # Records of every version of a collection, shared by the collections derived from each other
+    __slots__ = ("ids", "history", "version", "index", "stale")
+
+    def __init__(self):
+        self.ids: List[str] = []  # In discovery order, a version sees the ids before its length
+        # Position of each finding, the versions at which it changed and its record from then on
+        self.history: Dict[str, Tuple[int, List[int], List[FindingRecord]]] = {}
+        self.version = 0
+        # Search index over the latest records, built on the first search
+        self.index: Optional[BM25Index] = None
+        self.stale: Dict[str, None] = {}  # Findings changed since the index was updated
+
+    def record(self, finding_id: str, version: int) -> Optional[FindingRecord]:
+        history = self.history.get(finding_id)
+        if history is None:
+            return None
+        _, versions, records = history
+        # The latest version reads the last record, older ones search their own
+        if versions[-1] <= version:
+            return records[-1]
+        position = bisect_right(versions, version) - 1
+        return records[position] if position >= 0 else None
+
+    def search_index(self) -> BM25Index:
+        if self.index is None:
+            self.index = BM25Index()
+            self.stale = dict.fromkeys(self.ids)
+        # Only the findings added or updated since the last search are indexed
+        for finding_id in self.stale:
+            position, _, records = self.history[finding_id]
+            text = f"{records[-1].title} {records[-1].summary}"
+            if position < len(self.index):
+                self.index.replace(position, text)
+            else:
+                self.index.add(text)
+        self.stale.clear()
+        return self.index
+
+
+class FindingsCollection(Sequence):
+    """
+    Findings of a run in discovery order, with an index by id and O(1) upserts.
+
+    The collection is immutable: upserted returns a new collection sharing the records
+    of this one. Reading it gives finding dicts built from the records, changing them
+    does not change the collection.
+
+    Example:
+        .. code-block:: python
+
+            findings = FindingsCollection([{"id": "a", "title": "Title", ...}])
+            updated = findings.upserted([{"id": "a", "source_chunks_ids": ["chunk-1"]}])
+            updated.get("a")["source_chunks_ids"]  # findings.get("a") is unchanged
+    """
+
+    __slots__ = ("_log", "_version", "_length")
+
+    def __init__(self, findings: Iterable["Finding"] = ()):
+        self._log = _FindingsLog()
+        self._version = 0
+        self._length = 0
+        self._apply(findings)
+
+    def _apply(self, findings: Iterable["Finding"]) -> None:
+        # Only the latest version of a log is extended
+        log = self._log
+        version = log.version + 1
+        for finding in findings:
+            finding_id = finding["id"]
+            if log.index is not None:
+                log.stale[finding_id] = None
+            history = log.history.get(finding_id)
+            if history is None:
+                record = FindingRecord.from_finding(finding)
+                log.history[finding_id] = (len(log.ids), [version], [record])
+                log.ids.append(finding_id)
+                continue
+
+            _, versions, records = history
+            record = records[-1].merge(finding)
+            if versions[-1] == version:
+                # Updated twice in the same upsert
+                records[-1] = record
+            else:
+                versions.append(version)
+                records.append(record)
+        log.version = version
+        self._version = version
+        self._length = len(log.ids)
+
+    def upserted(self, findings: Iterable["Finding"]) -> "FindingsCollection":
+        """Returns a new collection with the findings added, or merged into the findings of the same id."""
+        collection = FindingsCollection.__new__(FindingsCollection)
+        if self._version == self._log.version:
+            collection._log = self._log
+            collection._version = self._version
+            collection._length = self._length
+        else:
+            # A newer version was derived from this one already, the findings are copied once
+            collection._log = _FindingsLog()
+            collection._version = 0
+            collection._length = 0
+            collection._apply(self)
+        collection._apply(findings)
+        return collection
+
+    def get(self, finding_id: str) -> Optional["Finding"]:
+        record = self._log.record(finding_id, self._version)
+        return record.as_finding() if record is not None else None
+
+    def rank(self, query: str) -> List[int]:
+        """Returns the positions of the findings sorted by decreasing relevance to the query."""
+        # BM25 over the title and summary, the index is shared with the other versions and
+        # kept up to date with the latest one
+        index = self._log.search_index()
+        return [position for position in index.rank(query) if position < self._length]
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator["Finding"]:
+        log, version = self._log, self._version
+        for finding_id in islice(log.ids, self._length):
+            yield log.record(finding_id, version).as_finding()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("findings collection index out of range")
+        return self._log.record(self._log.ids[index], self._version).as_finding()
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (FindingsCollection, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"FindingsCollection({list(self)!r})"
+
+    # Collections are never changed, copies of the state share them
+    def __copy__(self) -> "FindingsCollection":
+        return self
+
+    def __reduce__(self):
+        return (FindingsCollection, (list(self),))
+
+    # The checkpoint serializer stores objects with an _asdict method by their keyword arguments
+    def _asdict(self) -> Dict[str, Any]:
+        return {"findings": list(self)}
+
+
+def as_findings_collection(
+    findings: Optional[Sequence["Finding"]],
+) -> FindingsCollection:
+    # States given by the callers hold findings as plain lists, they are indexed once
+    if isinstance(findings, FindingsCollection):
+        return findings
+    return FindingsCollection(findings or [])
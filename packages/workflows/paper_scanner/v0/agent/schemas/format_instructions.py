@@ -83,6 +83,24 @@ class FindingUpdate(BaseModel):
     )
 
 
+# Findings batch processor
+class BatchedNewFinding(NewFinding):
+    key: str = Field(description="Key of the requested new finding")
+
+
+class BatchedFindingUpdate(FindingUpdate):
+    key: str = Field(description="Key of the requested finding update")
+
+
+class FindingsBatch(BaseModel):
+    new_findings: List[BatchedNewFinding] = Field(
+        description="One created finding per requested new finding. Leave empty if none requested"
+    )
+    findings_updates: List[BatchedFindingUpdate] = Field(
+        description="One update per requested finding update. Leave empty if none requested"
+    )
+
+
 # Findings consolidator
 class ConsilidatedFinding(BaseModel):
     title: str = Field(description="Title of the finding")
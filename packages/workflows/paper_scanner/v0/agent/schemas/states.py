@@ -6,6 +6,11 @@ import operator
 from packages.workflows.paper_scanner.v0.agent.schemas.format_instructions import (
     ChunkProcessorAnalysis,
 )
+from packages.workflows.paper_scanner.v0.agent.schemas.findings_collection import (
+    FindingsCollection,
+    as_findings_collection,
+    merge_unique,
+)
 
 # HERE LIES THE STATES SCHEMAS
 # Subdivide file into different files when it gets too long
@@ -16,11 +21,12 @@ class ChunkStatus(str, Enum):
     PENDING = "pending"
     PROCESSED = "processed"
     FAILED = "failed"
+    SKIPPED = "skipped"  # Low-value section, never sent to the LLM (see section_filter)
 
 
 class ChunkInfo(TypedDict):
     chunk_id: str
-    content: str
+    content: Optional[str]  # None when the text lives in the chunk store
     status: ChunkStatus
     analysis: Optional[ChunkProcessorAnalysis] = None
 
@@ -49,64 +55,70 @@ class Finding(TypedDict):
 
 
 # Below method is used to append new findings to the existing findings list and update the existing findings if the finding already exists.
+# The update is applied to a new version of the collection: the channel value is not changed and not copied.
 def merge_findings(
     existing_findings: List[Finding], new_findings: List[Finding]
-) -> List[Finding]:
-    # Create a dictionary for efficient lookup of existing findings by ID
-    findings_dict: Dict[str, Finding] = {f["id"]: f for f in existing_findings}
-
-    for finding in new_findings:
-        if finding["id"] in findings_dict:
-            # Update the existing finding only for non-null values
-            existing = findings_dict[finding["id"]]
-            update_dict = {}
-
-            if finding.get("title"):
-                update_dict["title"] = finding["title"]
-            if finding.get("summary"):
-                update_dict["summary"] = finding["summary"]
-            if finding.get("methodology"):
-                update_dict["methodology"] = finding["methodology"]
-
-            existing.update(update_dict)
-
-            # Merge keywords if they exist in both findings
-            if "keywords" in finding and "keywords" in existing:
-                existing["keywords"] = list(
-                    set(existing["keywords"] + finding["keywords"])
-                )
-            # If keywords only exist in the new finding, add them
-            elif "keywords" in finding:
-                existing["keywords"] = finding["keywords"]
-
-            # Merge source_chunks_ids
-            existing["source_chunks_ids"] = list(
-                set(existing["source_chunks_ids"] + finding["source_chunks_ids"])
-            )
-        else:
-            # Add new finding
-            # Ensure the finding has a keywords field even if empty
-            if "keywords" not in finding:
-                finding["keywords"] = []
-            findings_dict[finding["id"]] = finding
-
-    # Return the updated list of findings
-    return list(findings_dict.values())
+) -> FindingsCollection:
+    # Nodes returning the whole state send the current findings back
+    if new_findings is existing_findings:
+        return as_findings_collection(existing_findings)
+
+    return as_findings_collection(existing_findings).upserted(new_findings)
 
 
 class InputState(TypedDict):
     chunks: List[str] = Field(description="List of chunks to process")
+    paper_fingerprint: Optional[str] = Field(
+        default=None,
+        description="Hash of the normalised paper markdown, computed from the chunks when missing",
+    )
 
 
 class findingCreatorState(TypedDict):
     chunk: ChunkInfo = Field(description="Current chunk being processed")
     description: str = Field(description="Description of the new finding")
+    source_chunks_ids: Optional[List[str]] = Field(
+        default=None, description="Source chunks, defaults to the given chunk id"
+    )
+
+
+class windowChunkProcessorState(TypedDict):
+    current_chunk: ChunkInfo = Field(description="Chunk of the window being processed")
+    findings: List[Finding] = Field(
+        description="Snapshot of the findings shared by every chunk of the window"
+    )
 
 
 class findingUpdaterState(TypedDict):
     chunk: ChunkInfo = Field(description="Current chunk being processed")
     finding: Finding = Field(description="Finding to update")
     what_to_update: str = Field(description="What to update in the finding")
+    source_chunks_ids: Optional[List[str]] = Field(
+        default=None, description="Source chunks, defaults to the given chunk id"
+    )
+
+
+class findingsBatchState(TypedDict):
+    chunk: ChunkInfo = Field(description="Chunk the findings come from")
+    new_findings: List[Dict[str, str]] = Field(
+        description="Title and description of every new finding of the chunk"
+    )
+    findings_updates: List[Dict] = Field(
+        description="Finding and what to update for every update of the chunk"
+    )
+    source_chunks_ids: Optional[List[str]] = Field(
+        default=None, description="Source chunks, defaults to the given chunk id"
+    )
+
+
+# Below method collects the analysed chunks of the current window, a None value resets the collection for the next window.
+def merge_window_analyses(
+    existing_analyses: Optional[List[ChunkInfo]],
+    new_analyses: Optional[List[ChunkInfo]],
+) -> List[ChunkInfo]:
+    if new_analyses is None:
+        return []
+    return (existing_analyses or []) + new_analyses
 
 
 def merge_metadata(
@@ -145,6 +157,9 @@ def merge_metadata(
 
 
 class OverallState(TypedDict):
+    paper_fingerprint: str = Field(
+        description="Hash of the normalised paper markdown, stable across runs"
+    )
     metadata: Annotated[PaperMetadata, merge_metadata] = Field(
         description="Metadata of the academic paper"
     )
@@ -159,3 +174,11 @@ class OverallState(TypedDict):
         default=None, description="Current chunk being processed"
     )
     processed_chunks: List[ChunkInfo] = Field(description="List of processed chunks")
+    current_window: List[ChunkInfo] = Field(
+        default_factory=list,
+        description="Chunks being processed concurrently (windowed agent only)",
+    )
+    window_analyses: Annotated[List[ChunkInfo], merge_window_analyses] = Field(
+        default_factory=list,
+        description="Analysed chunks of the current window (windowed agent only)",
+    )
@@ -0,0 +1,144 @@
+import asyncio
+import contextvars
+from io import BytesIO
+import logging
+from typing import AsyncIterator, Iterable, Iterator, Optional, Union
+from typing_extensions import TypedDict
+
+from packages.workflows.paper_scanner.v0 import arun_paper_scanner_v0
+from packages.workflows.paper_scanner.v0.agent.schemas.configuration import (
+    ScannerConfiguration,
+)
+from packages.workflows.paper_scanner.v0.utils.call_llm import llm_calls_limiter
+
+# WORKFLOW FUNCTIONS THAT RUN THE PAPER SCANNER OVER MANY PAPERS CONCURRENTLY
+# Papers are PDF bytes/BytesIO or markdown strings, results are yielded as papers complete
+# --------------------------------------------------------------------------------------------------------------
+
+Paper = Union[bytes, BytesIO, str]
+
+
+class PaperScanResult(TypedDict):
+    index: int  # Position of the paper in the submitted papers
+    result: Optional[dict]  # Result of run_paper_scanner_v0, None on failure
+    error: Optional[str]  # Error message when the paper failed
+
+
+async def scan_paper(
+    index: int,
+    paper: Paper,
+    use_local_marker: bool,
+    window_size: Optional[int],
+    options: Optional[ScannerConfiguration],
+) -> PaperScanResult:
+    try:
+        if isinstance(paper, str):
+            result = await arun_paper_scanner_v0(
+                markdown_paper=paper, window_size=window_size, options=options
+            )
+        else:
+            result = await arun_paper_scanner_v0(
+                pdf_paper=paper,
+                use_local_marker=use_local_marker,
+                window_size=window_size,
+                options=options,
+            )
+        return PaperScanResult(index=index, result=result, error=None)
+    except Exception as e:
+        logging.error(f"Paper {index} failed: {str(e)}")
+        return PaperScanResult(index=index, result=None, error=str(e))
+
+
+async def arun_paper_scanner_batch_v0(
+    papers: Iterable[Paper],
+    max_papers_in_flight: int = 4,
+    max_llm_calls_in_flight: int = 16,
+    use_local_marker: bool = False,
+    window_size: Optional[int] = None,
+    options: Optional[ScannerConfiguration] = None,
+) -> AsyncIterator[PaperScanResult]:
+    """
+    Scans many papers concurrently and yields each result as soon as its paper completes.
+
+    Args:
+        papers (Iterable[Paper]): List or iterator of papers, consumed lazily as slots free up.
+        max_papers_in_flight (int): Maximum number of papers processed at the same time.
+        max_llm_calls_in_flight (int): Maximum number of LLM calls in flight, shared by all papers.
+        use_local_marker (bool): Whether to use the local marker for PDF processing.
+        window_size (Optional[int]): When set, chunks of each paper are discovered in concurrent windows.
+        options (Optional[ScannerConfiguration]): Runtime options of the agent nodes.
+
+    Yields:
+        PaperScanResult: The result or error of each paper, in completion order.
+    """
+    # Every paper task runs in its own copy of a context carrying the shared LLM budget
+    batch_context = contextvars.copy_context()
+    batch_context.run(
+        llm_calls_limiter.set, asyncio.Semaphore(max_llm_calls_in_flight)
+    )
+
+    papers_iterator = enumerate(papers)
+    in_flight = set()
+
+    def submit_next_paper() -> bool:
+        try:
+            index, paper = next(papers_iterator)
+        except StopIteration:
+            return False
+        in_flight.add(
+            asyncio.create_task(
+                scan_paper(index, paper, use_local_marker, window_size, options),
+                context=batch_context.copy(),
+            )
+        )
+        return True
+
+    for _ in range(max(1, max_papers_in_flight)):
+        if not submit_next_paper():
+            break
+
+    try:
+        while in_flight:
+            done, _ = await asyncio.wait(
+                in_flight, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                in_flight.remove(task)
+                submit_next_paper()
+                yield task.result()
+    finally:
+        # Cancel remaining papers if the consumer stops early, and wait for them to unwind
+        for task in in_flight:
+            task.cancel()
+        await asyncio.gather(*in_flight, return_exceptions=True)
+
+
+def run_paper_scanner_batch_v0(
+    papers: Iterable[Paper],
+    max_papers_in_flight: int = 4,
+    max_llm_calls_in_flight: int = 16,
+    use_local_marker: bool = False,
+    window_size: Optional[int] = None,
+    options: Optional[ScannerConfiguration] = None,
+) -> Iterator[PaperScanResult]:
+    """
+    Blocking version of arun_paper_scanner_batch_v0, it drives the batch on its own event loop.
+    """
+    loop = asyncio.new_event_loop()
+    batch = arun_paper_scanner_batch_v0(
+        papers,
+        max_papers_in_flight=max_papers_in_flight,
+        max_llm_calls_in_flight=max_llm_calls_in_flight,
+        use_local_marker=use_local_marker,
+        window_size=window_size,
+        options=options,
+    )
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(batch.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        loop.run_until_complete(batch.aclose())
+        loop.close()
@@ -0,0 +1,210 @@
+from enum import Enum
+from io import BytesIO
+import asyncio
+import logging
+from typing import AsyncIterator, Iterator, List, Optional, Set
+from typing_extensions import TypedDict
+
+from packages.workflows.paper_scanner.v0 import (
+    finalize_result,
+    load_markdown_paper,
+    prepare_agent_run,
+)
+from packages.workflows.paper_scanner.v0.agent.schemas.configuration import (
+    ScannerConfiguration,
+)
+from packages.workflows.paper_scanner.v0.agent.schemas.states import (
+    Finding,
+    PaperMetadata,
+)
+
+# WORKFLOW FUNCTIONS THAT RUN THE PAPER SCANNER AND YIELD TYPED EVENTS AS THE AGENT PROGRESSES
+# Events are built from the node updates streamed by the agent, the last event carries the full result
+# --------------------------------------------------------------------------------------------------------------
+
+
+class ScannerEventType(str, Enum):
+    CHUNK_STARTED = "chunk_started"
+    CHUNK_FINISHED = "chunk_finished"
+    FINDING_CREATED = "finding_created"
+    FINDING_UPDATED = "finding_updated"
+    METADATA_UPDATED = "metadata_updated"
+    CONSOLIDATION_DONE = "consolidation_done"
+    RUN_FINISHED = "run_finished"
+
+
+class ScannerEvent(TypedDict, total=False):
+    type: ScannerEventType
+    chunk_id: str  # CHUNK_STARTED and CHUNK_FINISHED
+    finding: Finding  # FINDING_CREATED and FINDING_UPDATED
+    metadata: PaperMetadata  # METADATA_UPDATED
+    consolidated_findings: List[Finding]  # CONSOLIDATION_DONE
+    result: dict  # RUN_FINISHED, same value returned by run_paper_scanner_v0
+
+
+def finish_chunks(in_progress: List[str]) -> List[ScannerEvent]:
+    events = [
+        ScannerEvent(type=ScannerEventType.CHUNK_FINISHED, chunk_id=chunk_id)
+        for chunk_id in in_progress
+    ]
+    in_progress.clear()
+    return events
+
+
+# Translates the update of one node into events, in_progress holds the ids of the chunks being processed
+# and finding_ids the ids of the findings already streamed
+def events_from_update(
+    node: str,
+    update: Optional[dict],
+    in_progress: List[str],
+    finding_ids: Optional[Set[str]] = None,
+) -> List[ScannerEvent]:
+    if not isinstance(update, dict):
+        return []
+
+    events: List[ScannerEvent] = []
+    finding_ids = set() if finding_ids is None else finding_ids
+
+    if node == "next_chunk_preparer":
+        # The previous chunk is done once the next one is prepared
+        events += finish_chunks(in_progress)
+        if update.get("current_chunk"):
+            in_progress.append(update["current_chunk"]["chunk_id"])
+
+    elif node == "next_window_preparer":
+        events += finish_chunks(in_progress)
+        in_progress.extend(chunk["chunk_id"] for chunk in update["current_window"])
+
+    elif node in ("finding_creator", "finding_updater", "findings_batch_processor"):
+        for finding in update.get("findings", []):
+            # The batch processor creates and updates findings, new ids are creations
+            created = (
+                node == "finding_creator"
+                if node != "findings_batch_processor"
+                else finding["id"] not in finding_ids
+            )
+            finding_ids.add(finding["id"])
+            events.append(
+                ScannerEvent(
+                    type=(
+                        ScannerEventType.FINDING_CREATED
+                        if created
+                        else ScannerEventType.FINDING_UPDATED
+                    ),
+                    finding=finding,
+                )
+            )
+
+    elif node in ("metadata_updater", "window_reconciler"):
+        if update.get("metadata"):
+            events.append(
+                ScannerEvent(
+                    type=ScannerEventType.METADATA_UPDATED, metadata=update["metadata"]
+                )
+            )
+
+    elif node == "findings_consolidator":
+        events += finish_chunks(in_progress)
+        events.append(
+            ScannerEvent(
+                type=ScannerEventType.CONSOLIDATION_DONE,
+                consolidated_findings=update.get("consolidated_findings", []),
+            )
+        )
+
+    # Chunk started events go after the finished ones of the previous step
+    if node in ("next_chunk_preparer", "next_window_preparer"):
+        events += [
+            ScannerEvent(type=ScannerEventType.CHUNK_STARTED, chunk_id=chunk_id)
+            for chunk_id in in_progress
+        ]
+
+    return events
+
+
+def stream_paper_scanner_v0(
+    pdf_paper: BytesIO = None,
+    markdown_paper: str = None,
+    use_local_marker: bool = False,
+    window_size: Optional[int] = None,
+    options: Optional[ScannerConfiguration] = None,
+) -> Iterator[ScannerEvent]:
+    """
+    Processes a research paper like run_paper_scanner_v0, yielding events while the agent runs.
+
+    Args:
+        pdf_paper (BytesIO): PDF data of the paper as a BytesIO buffer.
+        markdown_paper (str): Markdown content of the paper.
+        use_local_marker (bool): Whether to use the local marker for PDF processing.
+        window_size (Optional[int]): When set, chunks are discovered concurrently in windows of this size.
+        options (Optional[ScannerConfiguration]): Runtime options of the agent nodes.
+
+    Yields:
+        ScannerEvent: Chunk, finding, metadata and consolidation events, then a RUN_FINISHED event with the result.
+    """
+    markdown_content = load_markdown_paper(pdf_paper, markdown_paper, use_local_marker)
+    agent, agent_input, agent_config = prepare_agent_run(
+        markdown_content, window_size, options
+    )
+
+    logging.info("Streaming the paper summarization agent...")
+    in_progress: List[str] = []
+    finding_ids: Set[str] = set()
+    state = None
+    for mode, chunk in agent.stream(
+        agent_input, agent_config, stream_mode=["updates", "values"]
+    ):
+        if mode == "values":
+            state = chunk
+            continue
+        for node, update in chunk.items():
+            yield from events_from_update(node, update, in_progress, finding_ids)
+
+    logging.info("Processing complete.")
+    yield ScannerEvent(
+        type=ScannerEventType.RUN_FINISHED,
+        result=finalize_result(state, options, agent_config),
+    )
+
+
+async def astream_paper_scanner_v0(
+    pdf_paper: BytesIO = None,
+    markdown_paper: str = None,
+    use_local_marker: bool = False,
+    window_size: Optional[int] = None,
+    options: Optional[ScannerConfiguration] = None,
+) -> AsyncIterator[ScannerEvent]:
+    """
+    Async version of stream_paper_scanner_v0, graph nodes await the LLM instead of blocking a thread.
+    """
+    # PDF loading is blocking (local models or API polling), keep it off the event loop
+    markdown_content = markdown_paper
+    if not markdown_content:
+        markdown_content = await asyncio.to_thread(
+            load_markdown_paper, pdf_paper, markdown_paper, use_local_marker
+        )
+    agent, agent_input, agent_config = prepare_agent_run(
+        markdown_content, window_size, options
+    )
+
+    logging.info("Streaming the paper summarization agent...")
+    in_progress: List[str] = []
+    finding_ids: Set[str] = set()
+    state = None
+    async for mode, chunk in agent.astream(
+        agent_input, agent_config, stream_mode=["updates", "values"]
+    ):
+        if mode == "values":
+            state = chunk
+            continue
+        for node, update in chunk.items():
+            for event in events_from_update(
+                node, update, in_progress, finding_ids
+            ):
+                yield event
+
+    logging.info("Processing complete.")
+    yield ScannerEvent(
+        type=ScannerEventType.RUN_FINISHED,
+        result=finalize_result(state, options, agent_config),
+    )
@@ -1,23 +1,123 @@
+import asyncio
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+import os
+import time
 from typing import Dict, Optional
 from langchain.prompts import ChatPromptTemplate
 from langchain.output_parsers import PydanticOutputParser
 from packages.framework.utils.create_with_partial import create_with_partial
 from packages.framework.utils.parse_and_convert import parse_and_convert
-from langchain.prompts import ChatPromptTemplate
 from packages.framework.chat_model.get_chat_model import get_chat_model
+from packages.framework.caches.sqlite_llm_cache import SQLiteLLMCache
+from packages.framework.callbacks.run_profiler import LLM_SLOT_WAIT_EVENT, areport_event
+from packages.framework.rate_limiters.sqlite_token_bucket import (
+    DEFAULT_RATE_LIMIT_PATH,
+    rate_limited_tokens,
+)
+from packages.framework.utils.estimate_tokens import estimate_tokens
 
 # HERE LIES A HELPER METHOD TO INTERACT WITH THE LLM
 # --------------------------------------------------
 
 
-GEMINI_FLASH_1_5 = get_chat_model("gemini-1.5-flash-002")
+# Optional persistent response cache, reruns over the same paper reuse previous answers
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH")
 
+# Optional rate limits per model, shared by every scan running on this host
+LLM_REQUESTS_PER_MINUTE = os.getenv("LLM_REQUESTS_PER_MINUTE")
+LLM_TOKENS_PER_MINUTE = os.getenv("LLM_TOKENS_PER_MINUTE")
+# Relative paths are resolved once, processes started from other directories need an absolute path
+LLM_RATE_LIMIT_PATH = os.path.abspath(
+    os.path.expanduser(os.getenv("LLM_RATE_LIMIT_PATH") or DEFAULT_RATE_LIMIT_PATH)
+)
 
-def call_llm(
+# Model of the nodes, "fake-synthetic", "fake-record" or "fake-replay" run offline (see FakeChatModel)
+LLM_MODEL_NAME = os.getenv("LLM_MODEL_NAME", "gemini-1.5-flash-002")
+LLM_CASSETTE_PATH = os.getenv("LLM_CASSETTE_PATH")
+LLM_FAKE_LATENCY = os.getenv("LLM_FAKE_LATENCY", "constant")
+LLM_FAKE_LATENCY_SECONDS = float(os.getenv("LLM_FAKE_LATENCY_SECONDS", 0))
+
+
+def get_fake_model_props() -> dict:
+    if not LLM_MODEL_NAME.startswith("fake-"):
+        return {}
+    return {
+        "cassette_path": LLM_CASSETTE_PATH,
+        "latency": LLM_FAKE_LATENCY,
+        "latency_seconds": LLM_FAKE_LATENCY_SECONDS,
+        # Answers are recorded from the default model
+        "recorded_model": (
+            "gemini-1.5-flash-002" if LLM_MODEL_NAME == "fake-record" else None
+        ),
+    }
+
+
+# The default model is built on the first LLM call, importing the workflows stays fast and offline
+@lru_cache(maxsize=None)
+def get_default_llm():
+    cache = (
+        SQLiteLLMCache(
+            LLM_CACHE_PATH,
+            max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", 1024 * 1024 * 1024)),
+            max_age_seconds=float(
+                os.getenv("LLM_CACHE_MAX_AGE_SECONDS", 30 * 24 * 3600)
+            ),
+        )
+        if LLM_CACHE_PATH
+        else None
+    )
+    return get_chat_model(
+        LLM_MODEL_NAME,
+        cache=cache,
+        requests_per_minute=(
+            float(LLM_REQUESTS_PER_MINUTE) if LLM_REQUESTS_PER_MINUTE else None
+        ),
+        tokens_per_minute=(
+            float(LLM_TOKENS_PER_MINUTE) if LLM_TOKENS_PER_MINUTE else None
+        ),
+        rate_limit_path=LLM_RATE_LIMIT_PATH,
+        **get_fake_model_props(),
+    )
+
+
+# Keeps GEMINI_FLASH_1_5 and LLM_RESPONSE_CACHE importable, they are resolved on first access
+def __getattr__(name: str):
+    if name == "GEMINI_FLASH_1_5":
+        return get_default_llm()
+    if name == "LLM_RESPONSE_CACHE":
+        return get_default_llm().cache
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Optional cap on async LLM calls in flight, set by the batch runner and shared by every paper of the batch
+llm_calls_limiter: ContextVar[Optional[asyncio.Semaphore]] = ContextVar(
+    "llm_calls_limiter", default=None
+)
+
+
+@asynccontextmanager
+async def llm_call_slot():
+    limiter = llm_calls_limiter.get()
+    if limiter is None:
+        yield
+        return
+
+    # Time spent waiting for a slot is reported as LLM queue time (see RunProfiler)
+    start = time.perf_counter()
+    async with limiter:
+        await areport_event(
+            LLM_SLOT_WAIT_EVENT, {"seconds": time.perf_counter() - start}
+        )
+        yield
+
+
+def create_llm_chain(
     prompt_template: ChatPromptTemplate,
     input_parameters: Optional[Dict[str, str]],
     pydantic_object,
-    llm=GEMINI_FLASH_1_5,
+    llm,
 ):
     params = input_parameters or {}
     parser = (
@@ -35,6 +135,48 @@ def call_llm(
         | parser
         | parse_and_convert
     )
+    return chain
+
+
+def estimate_prompt_tokens(
+    prompt_template: ChatPromptTemplate, input_parameters: Optional[Dict[str, str]]
+) -> int:
+    # Tokens counted by the model rate limiter, format instructions are not included
+    params = input_parameters or {}
+    return estimate_tokens(getattr(prompt_template, "template", "")) + sum(
+        estimate_tokens(str(value)) for value in params.values()
+    )
+
+
+def call_llm(
+    prompt_template: ChatPromptTemplate,
+    input_parameters: Optional[Dict[str, str]],
+    pydantic_object,
+    llm=None,
+):
+    chain = create_llm_chain(
+        prompt_template, input_parameters, pydantic_object, llm or get_default_llm()
+    )
+
+    with rate_limited_tokens(estimate_prompt_tokens(prompt_template, input_parameters)):
+        result = chain.invoke({})
+    return result
+
+
+# Async version of call_llm, it does not block the event loop while waiting for the LLM
+async def acall_llm(
+    prompt_template: ChatPromptTemplate,
+    input_parameters: Optional[Dict[str, str]],
+    pydantic_object,
+    llm=None,
+):
+    chain = create_llm_chain(
+        prompt_template, input_parameters, pydantic_object, llm or get_default_llm()
+    )
 
-    result = chain.invoke({})
+    async with llm_call_slot():
+        with rate_limited_tokens(
+            estimate_prompt_tokens(prompt_template, input_parameters)
+        ):
+            result = await chain.ainvoke({})
     return result
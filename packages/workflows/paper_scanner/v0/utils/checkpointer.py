@@ -0,0 +1,27 @@
+from contextlib import contextmanager
+import os
+import sqlite3
+from typing import Iterator, Optional
+
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+# HERE LIES A HELPER TO PERSIST AGENT CHECKPOINTS IN A LOCAL SQLITE FILE
+# Every super-step of a run is stored under its run id (LangGraph thread id), so a failed run can be resumed
+# ----------------------------
+
+DEFAULT_CHECKPOINT_PATH = os.getenv(
+    "PAPER_SCANNER_CHECKPOINT_PATH", ".checkpoints/paper_scanner.sqlite"
+)
+
+
+@contextmanager
+def sqlite_checkpointer(checkpoint_path: Optional[str] = None) -> Iterator[SqliteSaver]:
+    path = checkpoint_path or DEFAULT_CHECKPOINT_PATH
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    # Parallel branches write from several threads, SqliteSaver serialises access with its own lock
+    connection = sqlite3.connect(path, check_same_thread=False)
+    try:
+        yield SqliteSaver(connection)
+    finally:
+        connection.close()
@@ -0,0 +1,59 @@
+from typing import List, Optional
+from langchain_core.runnables import RunnableConfig
+
+from packages.workflows.paper_scanner.v0.agent.schemas.states import ChunkInfo
+from packages.workflows.paper_scanner.v0.agent.schemas.configuration import (
+    get_configuration,
+)
+
+# HERE LIES HELPERS TO MOVE CHUNK TEXTS BETWEEN THE GRAPH STATE AND THE OPTIONAL CHUNK STORE
+# Without a chunk store (see ScannerConfiguration) chunks keep their content in the state as before
+# ----------------------------
+
+
+def store_chunk(chunk: ChunkInfo, config: Optional[RunnableConfig]) -> ChunkInfo:
+    chunk_store = get_configuration(config)["chunk_store"]
+    if chunk_store is None:
+        return chunk
+
+    # Checkpointed runs (run_id) can be resumed by another process, texts are written to the spill
+    # directory at once. A store without one only resumes runs of this process.
+    checkpointed = bool(((config or {}).get("configurable") or {}).get("thread_id"))
+
+    # Keep only the id and status in the state
+    chunk_store.put(chunk["chunk_id"], chunk["content"], durable=checkpointed)
+    return ChunkInfo(chunk_id=chunk["chunk_id"], content=None, status=chunk["status"])
+
+
+def get_chunks_content(
+    chunk: ChunkInfo,
+    config: Optional[RunnableConfig],
+    chunk_ids: Optional[List[str]] = None,
+) -> str:
+    if chunk.get("content") is not None:
+        return chunk["content"]
+
+    # Several chunk ids are resolved together when a window sends them as one chunk
+    chunk_store = get_configuration(config)["chunk_store"]
+    if chunk_store is None:
+        raise ValueError(f"Chunk {chunk['chunk_id']} has no content and no chunk store is configured")
+    return "\n\n".join(
+        chunk_store.get(chunk_id) for chunk_id in (chunk_ids or [chunk["chunk_id"]])
+    )
+
+
+# Chunk payload of a Send, the parsed analysis is only needed by the routers
+def chunk_reference(chunk: ChunkInfo) -> ChunkInfo:
+    return ChunkInfo(
+        chunk_id=chunk["chunk_id"], content=chunk.get("content"), status=chunk["status"]
+    )
+
+
+def load_chunks_content(chunks: List[ChunkInfo], chunk_store) -> List[ChunkInfo]:
+    # Puts the texts back into the chunks of a finished run
+    if chunk_store is None:
+        return chunks
+    return [
+        {**chunk, "content": chunk.get("content") or chunk_store.get(chunk["chunk_id"])}
+        for chunk in chunks
+    ]
@@ -0,0 +1,58 @@
+from io import BytesIO
+import os
+from typing import TYPE_CHECKING, Any, Dict, List
+
+from packages.framework.document_loaders.marker_loader import (
+    PdfBuffer,
+    marker_load_ranges,
+)
+from packages.framework.document_loaders.marker_loader.stitching import (
+    extract_pdf_pages,
+    split_paginated_render,
+)
+from packages.workflows.paper_scanner.v0.utils.call_marker_api import call_marker_api
+from packages.workflows.paper_scanner.v0.utils.marker_pool import get_marker_pool
+
+if TYPE_CHECKING:
+    # The hybrid loader is imported when a PDF is loaded, see load_markdown_paper
+    from packages.framework.document_loaders.hybrid_loader import PageRangesConverter
+
+# HERE LIES THE CONFIGURATION OF THE HYBRID PDF LOADING
+# --------------------------------------------------
+
+
+# marker converts every page, hybrid reads the PDF text layer and only sends the pages it does not
+# render well to marker, locally or through the Marker API
+PDF_LOADER = os.getenv("PDF_LOADER", "marker")
+# Optional thresholds of the text layer pages, see hybrid_load
+TEXT_LAYER_MIN_QUALITY = (
+    float(os.getenv("TEXT_LAYER_MIN_QUALITY"))
+    if os.getenv("TEXT_LAYER_MIN_QUALITY")
+    else None
+)
+TEXT_LAYER_MAX_MATH_DENSITY = (
+    float(os.getenv("TEXT_LAYER_MAX_MATH_DENSITY"))
+    if os.getenv("TEXT_LAYER_MAX_MATH_DENSITY")
+    else None
+)
+
+
+def call_marker_api_ranges(
+    pdf_buffer: PdfBuffer, page_ranges: List[List[int]]
+) -> List[Dict[str, Any]]:
+    # The API converts whole PDFs, the pages of every range are sent as one PDF, in a single job,
+    # and its paginated markdown is split back into the ranges
+    pages = [page for page_range in page_ranges for page in page_range]
+    render = call_marker_api(
+        pdf_file=BytesIO(extract_pdf_pages(pdf_buffer, pages)), paginate=True
+    )
+    return split_paginated_render(render, page_ranges)
+
+
+def get_page_ranges_converter(use_local_marker: bool) -> "PageRangesConverter":
+    if use_local_marker:
+        # The pool, and its models, only start once a page needs marker
+        return lambda pdf_buffer, page_ranges: marker_load_ranges(
+            pdf_buffer, page_ranges, pool=get_marker_pool()
+        )
+    return call_marker_api_ranges
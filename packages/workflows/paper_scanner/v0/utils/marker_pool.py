@@ -0,0 +1,44 @@
+import atexit
+from functools import lru_cache
+import os
+
+from packages.framework.document_loaders.marker_loader.worker_pool import (
+    MarkerWorkerPool,
+)
+
+# HERE LIES THE MARKER WORKER POOL OF THE LOCAL PDF CONVERSIONS
+# --------------------------------------------------
+
+
+# Worker processes keeping the marker models loaded, each one holds its own copy of the models
+MARKER_WORKERS = int(os.getenv("MARKER_WORKERS", 1))
+# Optional limits after which a worker is replaced by a fresh one
+MARKER_WORKER_MAX_RSS_MB = os.getenv("MARKER_WORKER_MAX_RSS_MB")
+MARKER_WORKER_MAX_DOCUMENTS = os.getenv("MARKER_WORKER_MAX_DOCUMENTS")
+# Torch threads of each worker, split the cores between the workers converting page ranges
+MARKER_THREADS_PER_WORKER = os.getenv("MARKER_THREADS_PER_WORKER")
+# Pages of the ranges converted in parallel then stitched, empty to convert a PDF in one piece
+MARKER_PAGES_PER_RANGE = (
+    int(os.getenv("MARKER_PAGES_PER_RANGE"))
+    if os.getenv("MARKER_PAGES_PER_RANGE")
+    else None
+)
+
+
+# The pool is started on the first local conversion and lives until the process exits
+@lru_cache(maxsize=None)
+def get_marker_pool() -> MarkerWorkerPool:
+    pool = MarkerWorkerPool(
+        num_workers=MARKER_WORKERS,
+        max_worker_rss_mb=(
+            float(MARKER_WORKER_MAX_RSS_MB) if MARKER_WORKER_MAX_RSS_MB else None
+        ),
+        max_documents_per_worker=(
+            int(MARKER_WORKER_MAX_DOCUMENTS) if MARKER_WORKER_MAX_DOCUMENTS else None
+        ),
+        threads_per_worker=(
+            int(MARKER_THREADS_PER_WORKER) if MARKER_THREADS_PER_WORKER else None
+        ),
+    )
+    atexit.register(pool.close)
+    return pool
@@ -0,0 +1,224 @@
+import logging
+import re
+from typing import List, Literal, Optional, Tuple
+from typing_extensions import TypedDict
+
+# HERE LIES A LOCAL CLASSIFIER OF THE PAPER SECTIONS THAT DO NOT YIELD FINDINGS
+# References, acknowledgments, author bios or table-only appendices are skipped or downsized before
+# they reach the discovery prompt, thresholds are set in ScannerConfiguration
+# ----------------------------
+
+# Header names of low-value sections, matched against the header text without numbering
+LOW_VALUE_HEADER_PATTERN = re.compile(
+    r"^(?:references?|bibliography|works cited|literature cited"
+    r"|acknowledge?ments?|funding|author contributions?"
+    r"|about the authors?|author biograph(?:y|ies)|biograph(?:y|ies)"
+    r"|conflicts? of interests?|competing interests?|declaration of interests?"
+    r"|data availability(?: statement)?|code availability|ethics statement)$"
+)
+# Appendix headers, the only sections where table density alone makes a section low-value
+APPENDIX_HEADER_PATTERN = re.compile(
+    r"^(?:appendix|appendices|supplementary|supplemental|supporting information)\b"
+)
+# Appendix numbering of LaTeX papers, e.g. "A.", "B)" or "C.2"
+APPENDIX_NUMBERING_PATTERN = re.compile(r"^(?:[A-Z][.)]|[A-Z](?:\.\d+)+)\s")
+# Section numbers, e.g. "7", "7.1", "VII." or "A."
+HEADER_NUMBERING_PATTERN = re.compile(
+    r"^(?:[0-9ivxlcIVXLC]+[.)]?|[A-Z][.)])(?:[.\d]*)\s+"
+)
+# Numbered reference entries, e.g. "[12] ..." or "- [12] ..."
+CITATION_ENTRY_PATTERN = re.compile(r"^\s*(?:[-*]\s*)?\[\d+\]")
+# Author-led reference entries, e.g. "Smith, J. A. (2019). ..." or "12. Smith, J., ... Nature, 2019."
+# Prose starts like them too ("Vaswani, A. et al. introduced..."), they need the year of a reference
+AUTHOR_ENTRY_PATTERN = re.compile(
+    r"^\s*(?:[-*]\s*)?(?:\d+\.\s+)?[A-Z][\w'\-]+,\s+(?:[A-Z]\.\s*)+"
+)
+REFERENCE_YEAR_PATTERN = re.compile(
+    r"\((?:19|20)\d\d[a-z]?\)|, (?:19|20)\d\d[a-z]?\.(?:\s|$)"
+)
+# Persistent identifiers and venue markers of reference entries, inline citations of prose do not count
+# Matched against the lowercased line, word boundaries and IGNORECASE make the search 15x slower
+CITATION_MARKERS_PATTERN = re.compile(r"(?:doi:|doi\.org/|arxiv:|in proceedings|pp\. \d)")
+TABLE_ROW_PATTERN = re.compile(r"^\s*\|")
+
+# Density rules need a few lines, a short paragraph with a citation is still content
+MIN_DENSITY_LINES = 3
+
+SectionLabel = Literal["content", "low_value"]
+LowValueAction = Literal["skip", "downsize", "keep"]
+
+
+class SectionClassification(TypedDict):
+    label: SectionLabel
+    reason: Optional[str]  # "header", "citations" or "tables" for low-value sections
+    citation_density: float  # Share of the body lines that are citations
+    table_density: float  # Share of the body lines that are table rows
+
+
+def section_header(section: str) -> Optional[str]:
+    first_line = section.lstrip().split("\n", 1)[0]
+    if not first_line.startswith("#"):
+        return None
+    return first_line.lstrip("#").strip()
+
+
+def normalize_header(header: str) -> str:
+    header = re.sub(r"[*_`:]", "", header).strip()
+    header = HEADER_NUMBERING_PATTERN.sub("", header)
+    return header.strip().lower()
+
+
+def is_appendix_header(header: str) -> bool:
+    return bool(
+        APPENDIX_HEADER_PATTERN.match(normalize_header(header))
+        or APPENDIX_NUMBERING_PATTERN.match(re.sub(r"[*_`]", "", header).strip())
+    )
+
+
+def is_citation_line(line: str) -> bool:
+    return bool(
+        CITATION_ENTRY_PATTERN.match(line)
+        or (AUTHOR_ENTRY_PATTERN.match(line) and REFERENCE_YEAR_PATTERN.search(line))
+        or CITATION_MARKERS_PATTERN.search(line.lower())
+    )
+
+
+def body_lines(section: str) -> List[str]:
+    lines = [line for line in section.split("\n") if line.strip()]
+    if lines and lines[0].lstrip().startswith("#"):
+        lines = lines[1:]
+    return lines
+
+
+def classify_section(
+    section: str,
+    max_citation_density: float = 0.5,
+    max_table_density: float = 0.6,
+) -> SectionClassification:
+    """
+    Classifies a markdown section as content or low-value from its header and line densities.
+
+    Args:
+        section (str): Markdown section, starting with its header line
+        max_citation_density (float): Sections with a larger share of citation lines are low-value
+        max_table_density (float): Appendix sections with a larger share of table rows are low-value,
+            results tables of the paper body are content
+
+    Returns:
+        SectionClassification: Label, reason and densities of the section
+    """
+    lines = body_lines(section)
+    citation_lines = sum(1 for line in lines if is_citation_line(line))
+    table_lines = sum(1 for line in lines if TABLE_ROW_PATTERN.match(line))
+    citation_density = citation_lines / len(lines) if lines else 0.0
+    table_density = table_lines / len(lines) if lines else 0.0
+
+    reason = None
+    header = section_header(section)
+    if header and LOW_VALUE_HEADER_PATTERN.match(normalize_header(header)):
+        reason = "header"
+    elif len(lines) >= MIN_DENSITY_LINES and citation_density > max_citation_density:
+        reason = "citations"
+    elif (
+        header
+        and is_appendix_header(header)
+        and len(lines) >= MIN_DENSITY_LINES
+        and table_density > max_table_density
+    ):
+        reason = "tables"
+
+    return SectionClassification(
+        label="low_value" if reason else "content",
+        reason=reason,
+        citation_density=citation_density,
+        table_density=table_density,
+    )
+
+
+def downsize_section(section: str) -> str:
+    # Keeps the header and the prose, citation lines and table rows are dropped
+    lines = section.split("\n")
+    header = lines[0] if lines and lines[0].lstrip().startswith("#") else None
+    prose = [
+        line
+        for line in (lines[1:] if header is not None else lines)
+        if line.strip()
+        and not is_citation_line(line)
+        and not TABLE_ROW_PATTERN.match(line)
+    ]
+    if not prose:
+        return ""
+    return "\n".join(([header] if header is not None else []) + prose)
+
+
+def label_sections(
+    sections: List[str],
+    action: LowValueAction = "skip",
+    max_citation_density: float = 0.5,
+    max_table_density: float = 0.6,
+) -> List[Tuple[str, bool]]:
+    """
+    Labels the sections to process and the low-value ones to skip, in paper order.
+
+    With the "downsize" action, sections low-value by their citations or tables only keep their
+    prose, and are skipped when nothing is left. Sections low-value by their header are always
+    skipped, with the following chunks of the same section (chunks without a header line). With
+    "keep", every section is processed.
+
+    Returns:
+        List[Tuple[str, bool]]: Each section, downsized if needed, and whether it is processed
+    """
+    if action == "keep":
+        return [(section, True) for section in sections]
+
+    labeled_sections = []
+    previous_reason = None
+    for section in sections:
+        # An oversized section is split into chunks, only the first one has the header
+        if previous_reason == "header" and section_header(section) is None:
+            labeled_sections.append((section, False))
+            continue
+
+        classification = classify_section(
+            section, max_citation_density, max_table_density
+        )
+        previous_reason = classification["reason"]
+        if classification["label"] == "content":
+            labeled_sections.append((section, True))
+            continue
+
+        downsized = (
+            downsize_section(section)
+            if action == "downsize" and classification["reason"] != "header"
+            else ""
+        )
+        if downsized:
+            labeled_sections.append((downsized, True))
+        else:
+            labeled_sections.append((section, False))
+        logging.info(
+            f"Low-value section ({classification['reason']}) "
+            f"{'downsized' if downsized else 'skipped'}: {section_header(section)}"
+        )
+    return labeled_sections
+
+
+def filter_sections(
+    sections: List[str],
+    action: LowValueAction = "skip",
+    max_citation_density: float = 0.5,
+    max_table_density: float = 0.6,
+) -> Tuple[List[str], List[str]]:
+    """
+    Splits sections into the ones to process and the low-value ones to skip, see label_sections.
+
+    Returns:
+        Tuple[List[str], List[str]]: Sections to process and skipped sections
+    """
+    labeled_sections = label_sections(
+        sections, action, max_citation_density, max_table_density
+    )
+    return (
+        [section for section, processed in labeled_sections if processed],
+        [section for section, processed in labeled_sections if not processed],
+    )
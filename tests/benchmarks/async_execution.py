@@ -0,0 +1,56 @@
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+import asyncio
+import logging
+import time
+
+from packages.workflows.paper_scanner.v0 import arun_paper_scanner_v0
+from tests.utils.fake_call_llm import patch_call_llm
+
+# HERE LIES A BENCHMARK OF THE ASYNC EXECUTION PATH
+# One event loop drives several papers concurrently, with a fake LLM of fixed latency
+# Run with: poetry run pytest -s tests/benchmarks/async_execution.py
+
+NUM_PAPERS = 8
+NUM_SECTIONS = 6
+LLM_LATENCY = 0.05
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def create_markdown_paper(paper_index: int):
+    return "\n\n".join(
+        f"# Section {i}\n\n" + f"Paper {paper_index} section {i}. " * 40
+        for i in range(NUM_SECTIONS)
+    )
+
+
+def test_async_papers_share_event_loop(monkeypatch):
+    patch_call_llm(monkeypatch, latency=LLM_LATENCY)
+    papers = [create_markdown_paper(i) for i in range(NUM_PAPERS)]
+
+    async def run_one():
+        return await arun_paper_scanner_v0(markdown_paper=papers[0])
+
+    async def run_all():
+        return await asyncio.gather(
+            *[arun_paper_scanner_v0(markdown_paper=paper) for paper in papers]
+        )
+
+    start = time.perf_counter()
+    single_result = asyncio.run(run_one())
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = asyncio.run(run_all())
+    all_time = time.perf_counter() - start
+
+    logger.info(f"1 paper: {single_time:.2f}s, {NUM_PAPERS} papers: {all_time:.2f}s")
+
+    assert len(results) == NUM_PAPERS
+    assert all(len(r["findings"]) == len(single_result["findings"]) for r in results)
+    # Papers overlap on the event loop instead of running one after the other
+    assert all_time < single_time * NUM_PAPERS / 2
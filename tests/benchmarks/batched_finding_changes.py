@@ -0,0 +1,122 @@
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+import importlib
+import logging
+import re
+
+from langchain.output_parsers import PydanticOutputParser
+
+from packages.framework.utils.estimate_tokens import estimate_tokens
+from packages.workflows.paper_scanner.v0 import run_paper_scanner_v0
+from packages.workflows.paper_scanner.v0.agent.schemas.format_instructions import (
+    ChunkProcessorAnalysis,
+    FindingsBatch,
+    FindingsConsolidator,
+)
+from tests.utils.fake_call_llm import NODE_MODULES, create_fake_output
+
+# HERE LIES A BENCHMARK OF THE INPUT TOKENS SPENT CREATING AND UPDATING FINDINGS, ONE CALL PER FINDING VS ONE CALL PER CHUNK
+# It runs offline with a fake LLM that discovers 4 new findings and updates 2 existing ones per chunk
+# Run with: poetry run pytest -s tests/benchmarks/batched_finding_changes.py
+
+NUM_SECTIONS = 12
+NEW_FINDINGS_PER_CHUNK = 4
+UPDATES_PER_CHUNK = 2
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def create_markdown_paper():
+    return "\n\n".join(
+        f"# Section {i}\n\n"
+        + f"This section reports the results of experiment {i}. " * 150
+        for i in range(NUM_SECTIONS)
+    )
+
+
+def create_discovery_output(input_parameters):
+    output = create_fake_output(input_parameters, ChunkProcessorAnalysis)
+    section = re.search(r"# Section (\d+)", input_parameters["text"]).group(1)
+    existing_ids = re.findall(r"Id: (\S+)", input_parameters["existing_findings"])
+    output["findings"]["new_findings"] = [
+        {
+            "title": f"Finding {section}.{i}",
+            "description": f"Result {i} of section {section}",
+        }
+        for i in range(NEW_FINDINGS_PER_CHUNK)
+    ]
+    output["findings"]["findings_updates"] = [
+        {"id": finding_id, "what_to_update": "Add the new results"}
+        for finding_id in existing_ids[:UPDATES_PER_CHUNK]
+    ]
+    return output
+
+
+def measure_finding_tokens(monkeypatch, options=None, fail_batches=False):
+    calls = {"finding_calls": 0, "finding_tokens": 0}
+
+    def measuring_call_llm(prompt_template, input_parameters, pydantic_object, llm=None):
+        if pydantic_object is ChunkProcessorAnalysis:
+            return create_discovery_output(input_parameters)
+        if pydantic_object is FindingsConsolidator:
+            return create_fake_output(input_parameters, pydantic_object)
+
+        if pydantic_object is FindingsBatch and fail_batches:
+            raise ValueError("Unparseable batched answer")
+
+        # Input tokens of the rendered prompt, format instructions included
+        format_instructions = PydanticOutputParser(
+            pydantic_object=pydantic_object
+        ).get_format_instructions()
+        prompt = prompt_template.format(
+            **input_parameters, format_instructions=format_instructions
+        )
+        calls["finding_calls"] += 1
+        calls["finding_tokens"] += estimate_tokens(prompt)
+        return create_fake_output(input_parameters, pydantic_object)
+
+    for module in NODE_MODULES:
+        node_module = importlib.import_module(module)
+        monkeypatch.setattr(node_module, "call_llm", measuring_call_llm)
+
+    result = run_paper_scanner_v0(
+        markdown_paper=create_markdown_paper(), options=options
+    )
+    return calls, result
+
+
+def test_batched_finding_changes_tokens(monkeypatch):
+    per_finding, per_finding_result = measure_finding_tokens(monkeypatch)
+    batched, batched_result = measure_finding_tokens(
+        monkeypatch, {"batch_finding_changes": True}
+    )
+
+    for label, calls in [
+        ("one call per finding", per_finding),
+        ("one call per chunk", batched),
+    ]:
+        logger.info(
+            f"{label}: {calls['finding_calls']} calls, "
+            f"{calls['finding_tokens']} input tokens"
+        )
+    saved = 1 - batched["finding_tokens"] / per_finding["finding_tokens"]
+    logger.info(f"input tokens saved: {saved:.0%}")
+
+    # Same findings, one call per chunk
+    assert len(batched_result["findings"]) == len(per_finding_result["findings"])
+    assert batched["finding_calls"] == NUM_SECTIONS
+    assert batched["finding_tokens"] < per_finding["finding_tokens"] / 2
+
+
+def test_batched_finding_changes_fallback(monkeypatch):
+    per_finding, per_finding_result = measure_finding_tokens(monkeypatch)
+    fallback, fallback_result = measure_finding_tokens(
+        monkeypatch, {"batch_finding_changes": True}, fail_batches=True
+    )
+
+    # Failed batches are replaced by the per-finding calls
+    assert len(fallback_result["findings"]) == len(per_finding_result["findings"])
+    assert fallback["finding_calls"] == per_finding["finding_calls"]
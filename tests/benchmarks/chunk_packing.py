@@ -0,0 +1,119 @@
+import logging
+import os
+import random
+
+import pytest
+
+from packages.framework.text_splitters.chunk_packer import pack_chunks
+from packages.framework.text_splitters.markdown import markdown_text_split
+from packages.workflows.paper_scanner.v0 import create_agent_config
+from packages.workflows.paper_scanner.v0.agent.nodes.chunk.loading import (
+    chunks_initializer,
+)
+from tests.utils.benchmark_baseline import best_time
+
+# HERE LIES A BENCHMARK OF THE TOKEN BUDGET CHUNK PACKER AGAINST THE PREVIOUS 500 CHARACTERS MERGE
+# It counts the discovery calls (one per chunk) on the reference papers converted to markdown, when
+# present, and on a synthetic paper shaped like them, then times both merges on a very long paper
+# Run with: poetry run pytest -s tests/benchmarks/chunk_packing.py
+
+REFERENCE_PAPER_PATHS = [
+    "tests/framework/tools/pdf_pre_processing/results/alexnet.md",
+    "tests/framework/tools/pdf_pre_processing/results/deep_residual_learning.md",
+]
+LONG_PAPER_SECTIONS = 20000
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# The merge before the packer, short chunks are glued to the previous one walking backwards
+def legacy_merge_chunks(chunks, min_chunk_length=500):
+    merged_chunks = []
+    if chunks:
+        current_chunk = chunks[-1]
+        for next_chunk in reversed(chunks[:-1]):
+            if len(current_chunk) < min_chunk_length:
+                current_chunk = next_chunk + "\n\n" + current_chunk
+            else:
+                merged_chunks.insert(0, current_chunk)
+                current_chunk = next_chunk
+        merged_chunks.insert(0, current_chunk)
+    return merged_chunks
+
+
+def create_synthetic_paper(seed: int = 0) -> str:
+    # Title, abstract, numbered sections with short subsections, captions and references, like marker outputs
+    rng = random.Random(seed)
+    words = ["network", "layer", "training", "error", "dataset", "residual", "image"]
+
+    def paragraphs(low: int, high: int) -> str:
+        return "\n\n".join(
+            " ".join(rng.choice(words) for _ in range(rng.randint(40, 160)))
+            for _ in range(rng.randint(low, high))
+        )
+
+    sections = [
+        "# A Synthetic Paper\n\nAuthor One, Author Two",
+        "## Abstract\n\n" + paragraphs(1, 1),
+    ]
+    for i in range(1, 7):
+        sections.append(f"## {i} Section\n\n" + paragraphs(1, 3))
+        for j in range(rng.randint(0, 4)):
+            sections.append(f"### {i}.{j + 1} Subsection\n\n" + paragraphs(1, 4))
+            if rng.random() < 0.4:
+                sections.append(f"#### Figure {i}.{j + 1}\n\nCaption of the figure.")
+    references = "\n".join(f"- [{i}] Reference." for i in range(40))
+    sections.append(f"## References\n\n{references}")
+    return "\n\n".join(sections)
+
+
+def count_discovery_calls(markdown: str, chunk_token_budget: int) -> int:
+    chunks = markdown_text_split(markdown, chunk_size=10000, chunk_overlap=0)
+    config = create_agent_config(options={"chunk_token_budget": chunk_token_budget})
+    return len(chunks_initializer({"chunks": chunks}, config)["chunks_queue"])
+
+
+def reference_papers():
+    papers = {"synthetic": create_synthetic_paper()}
+    for path in REFERENCE_PAPER_PATHS:
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                papers[os.path.basename(path)] = file.read()
+    return papers
+
+
+@pytest.mark.parametrize("name, markdown", reference_papers().items())
+def test_saved_discovery_calls(name, markdown):
+    # Chunk token budget 0 only merges sections shorter than the minimum, like the previous merge
+    unpacked_calls = count_discovery_calls(markdown, chunk_token_budget=0)
+    legacy_calls = len(legacy_merge_chunks(markdown_text_split(markdown, 10000, 0)))
+    packed_calls = count_discovery_calls(markdown, chunk_token_budget=2500)
+
+    logger.info(
+        f"{name}: {legacy_calls} discovery calls with the 500 characters merge, "
+        f"{packed_calls} packed, {legacy_calls - packed_calls} saved"
+    )
+    assert packed_calls <= unpacked_calls
+    assert packed_calls < legacy_calls
+
+
+def test_packing_is_linear():
+    sections = [
+        f"## Section {i}\n\n" + "word " * (i % 7 * 30)
+        for i in range(LONG_PAPER_SECTIONS)
+    ]
+
+    legacy_seconds = best_time(lambda: legacy_merge_chunks(sections), repeats=1)
+    packing_seconds = best_time(lambda: pack_chunks(sections, 2500, 125))
+    small_packing_seconds = best_time(
+        lambda: pack_chunks(sections[: LONG_PAPER_SECTIONS // 10], 2500, 125)
+    )
+
+    logger.info(
+        f"{LONG_PAPER_SECTIONS} sections: legacy merge {legacy_seconds * 1000:.1f}ms, "
+        f"packer {packing_seconds * 1000:.1f}ms"
+    )
+    assert packing_seconds < legacy_seconds
+    # Ten times the sections takes about ten times longer, not a hundred
+    assert packing_seconds < small_packing_seconds * 30
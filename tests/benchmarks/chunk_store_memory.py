@@ -0,0 +1,72 @@
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+import gc
+import logging
+import tracemalloc
+
+from langgraph.checkpoint.memory import MemorySaver
+
+from packages.framework.stores.chunk_store import ChunkStore
+from packages.framework.text_splitters.markdown import markdown_text_split
+from packages.workflows.paper_scanner.v0 import create_agent_config
+from packages.workflows.paper_scanner.v0.agent import build_paper_summarization_agent
+from tests.utils.fake_call_llm import patch_call_llm
+
+# HERE LIES A BENCHMARK OF THE PEAK MEMORY OF A CHECKPOINTED RUN WITH CHUNK TEXTS IN THE STATE VS IN A CHUNK STORE
+# It runs offline with a fake LLM on a synthetic 200-page paper (one ~3000 characters section per page)
+# Run with: poetry run pytest -s tests/benchmarks/chunk_store_memory.py
+
+NUM_PAGES = 200
+WINDOW_SIZE = 8
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def create_markdown_paper():
+    return "\n\n".join(
+        f"# Page {i}\n\n" + f"Experiment {i} measures the effect of a layer. " * 64
+        for i in range(NUM_PAGES)
+    )
+
+
+def measure_peak_memory(monkeypatch, options=None):
+    patch_call_llm(monkeypatch, latency=0)
+    chunks = markdown_text_split(
+        input_text=create_markdown_paper(), chunk_size=10000, chunk_overlap=0
+    )
+    # Every super-step is checkpointed in memory, like a resumable run
+    agent = build_paper_summarization_agent(windowed=True, checkpointer=MemorySaver())
+    config = create_agent_config(WINDOW_SIZE, run_id="benchmark", options=options)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = agent.invoke({"chunks": chunks}, config)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak, result
+
+
+def test_chunk_store_peak_memory(monkeypatch):
+    state_peak, state_result = measure_peak_memory(monkeypatch)
+    store_peak, store_result = measure_peak_memory(
+        monkeypatch, {"chunk_store": ChunkStore()}
+    )
+
+    logger.info(f"chunk texts in the state: peak {state_peak / 1024 / 1024:.1f} MiB")
+    logger.info(f"chunk texts in the store: peak {store_peak / 1024 / 1024:.1f} MiB")
+
+    # Same chunks processed and same findings, with a lower peak
+    assert len(state_result["processed_chunks"]) == len(
+        store_result["processed_chunks"]
+    )
+    assert len(state_result["findings"]) == len(store_result["findings"]) > 0
+    assert all(
+        chunk["content"] is None and "analysis" not in chunk
+        for chunk in store_result["processed_chunks"]
+    )
+    assert store_peak < state_peak / 2
@@ -0,0 +1,122 @@
+import gc
+import logging
+import time
+from typing import Dict, List
+
+from packages.workflows.paper_scanner.v0.agent.schemas.states import (
+    FindingsCollection,
+    merge_findings,
+)
+from packages.workflows.paper_scanner.v0.agent.nodes.chunk.processing import (
+    search_finding_by_id,
+)
+
+# HERE LIES A MICRO-BENCHMARK OF THE FINDINGS REDUCER AND LOOKUPS AT 10, 100 AND 1000 FINDINGS
+# It replays the reducer calls of a run: one finding created and one updated per chunk, every node
+# returning the whole state in between, and one lookup by id per update branch
+# Run with: poetry run pytest -s tests/benchmarks/findings_collection.py
+
+SIZES = [10, 100, 1000]
+REPEATS = 3
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# Previous implementation, rebuilding a dict from the whole list on every reducer call
+def list_scan_merge_findings(existing_findings, new_findings):
+    findings_dict: Dict[str, dict] = {f["id"]: f for f in existing_findings}
+    for finding in new_findings:
+        if finding["id"] in findings_dict:
+            existing = findings_dict[finding["id"]]
+            existing.update(
+                {
+                    key: finding[key]
+                    for key in ("title", "summary", "methodology")
+                    if finding.get(key)
+                }
+            )
+            existing["keywords"] = list(set(existing["keywords"] + finding["keywords"]))
+            existing["source_chunks_ids"] = list(
+                set(existing["source_chunks_ids"] + finding["source_chunks_ids"])
+            )
+        else:
+            findings_dict[finding["id"]] = finding
+    return list(findings_dict.values())
+
+
+def list_scan_search_finding_by_id(state, finding_id):
+    for finding in state["findings"]:
+        if finding["id"] == finding_id:
+            return finding
+    return None
+
+
+def create_finding(i: int, chunk_id: str) -> dict:
+    return {
+        "id": f"finding-{i}",
+        "title": f"Finding {i}",
+        "summary": f"Summary of finding {i}",
+        "methodology": "methodology",
+        "keywords": [f"keyword-{i}"],
+        "source_chunks_ids": [chunk_id],
+    }
+
+
+def replay_run(merge, search, num_findings: int) -> float:
+    start = time.perf_counter()
+    findings: List[dict] = []
+    for i in range(num_findings):
+        chunk_id = f"chunk-{i}"
+        # Nodes returning the whole state, then the finding creator and updater branches
+        findings = merge(findings, findings)
+        findings = merge(findings, [create_finding(i, chunk_id)])
+        target = f"finding-{i // 2}"
+        existing = search({"findings": findings}, target)
+        update = {**existing, "summary": "updated", "source_chunks_ids": [chunk_id]}
+        findings = merge(findings, [update])
+    assert len(findings) == num_findings
+    return time.perf_counter() - start
+
+
+def best_time(merge, search, num_findings: int) -> float:
+    # Like timeit, garbage collection pauses are left out of the timings
+    gc.disable()
+    try:
+        return min(replay_run(merge, search, num_findings) for _ in range(REPEATS))
+    finally:
+        gc.enable()
+
+
+def test_findings_collection_micro_benchmark():
+    timings = {}
+    for num_findings in SIZES:
+        list_scan = best_time(
+            list_scan_merge_findings, list_scan_search_finding_by_id, num_findings
+        )
+        indexed = best_time(merge_findings, search_finding_by_id, num_findings)
+        timings[num_findings] = (list_scan, indexed)
+        logger.info(
+            f"{num_findings} findings: list scan {list_scan * 1000:.2f}ms, "
+            f"indexed {indexed * 1000:.2f}ms ({list_scan / indexed:.1f}x)"
+        )
+
+    # The list scan is quadratic over a run, each upsert into the collection is O(1),
+    # so ten times the findings take about ten times as long
+    list_scan, indexed = timings[1000]
+    assert indexed < list_scan / 5
+    assert timings[1000][1] < timings[100][1] * 15
+
+
+def test_findings_collection_matches_list_scan():
+    # Checkpoints restore findings as plain lists
+    restored = [create_finding(0, "chunk-0"), create_finding(1, "chunk-1")]
+    update = {**create_finding(0, "chunk-2"), "title": None, "keywords": ["new"]}
+
+    findings = merge_findings(restored, [update, create_finding(2, "chunk-2")])
+
+    assert isinstance(findings, FindingsCollection)
+    assert [f["id"] for f in findings] == ["finding-0", "finding-1", "finding-2"]
+    assert findings.get("finding-0")["title"] == "Finding 0"
+    assert findings.get("finding-0")["keywords"] == ["keyword-0", "new"]
+    assert findings.get("finding-0")["source_chunks_ids"] == ["chunk-0", "chunk-2"]
@@ -0,0 +1,82 @@
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+import importlib
+import logging
+
+from packages.framework.utils.estimate_tokens import estimate_tokens
+from packages.workflows.paper_scanner.v0 import run_paper_scanner_v0
+from packages.workflows.paper_scanner.v0.agent.schemas.format_instructions import (
+    ChunkProcessorAnalysis,
+)
+from tests.utils.fake_call_llm import patch_call_llm
+
+# HERE LIES A BENCHMARK OF THE DISCOVERY PROMPT SIZE WITH ALL EXISTING FINDINGS VS THE MOST RELEVANT ONES
+# It runs offline with a fake LLM that creates one finding per chunk
+# Run with: poetry run pytest -s tests/benchmarks/findings_context_tokens.py
+
+NUM_SECTIONS = 40
+TOP_K = 8
+MAX_TOKENS = 600
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TOPICS = ["residual", "attention", "dropout", "normalization", "convolution"]
+
+
+def create_markdown_paper():
+    return "\n\n".join(
+        f"# Section {i}\n\n"
+        + f"This section studies {TOPICS[i % len(TOPICS)]} layers, experiment {i}. "
+        * 12
+        for i in range(NUM_SECTIONS)
+    )
+
+
+def measure_prompt_tokens(monkeypatch, options=None):
+    fake_call_llm, _ = patch_call_llm(monkeypatch, latency=0)
+    processing = importlib.import_module(
+        "packages.workflows.paper_scanner.v0.agent.nodes.chunk.processing"
+    )
+
+    prompt_tokens = []
+
+    def measuring_call_llm(prompt_template, input_parameters, pydantic_object, llm=None):
+        if pydantic_object is ChunkProcessorAnalysis:
+            prompt = prompt_template.format(**input_parameters, format_instructions="")
+            prompt_tokens.append(estimate_tokens(prompt))
+        return fake_call_llm(prompt_template, input_parameters, pydantic_object)
+
+    monkeypatch.setattr(processing, "call_llm", measuring_call_llm)
+    # One chunk per section, sections are not packed together
+    run_paper_scanner_v0(
+        markdown_paper=create_markdown_paper(),
+        options={"chunk_token_budget": 0, **(options or {})},
+    )
+    return prompt_tokens
+
+
+def test_relevant_findings_context_tokens(monkeypatch):
+    all_tokens = measure_prompt_tokens(monkeypatch)
+    relevant_tokens = measure_prompt_tokens(
+        monkeypatch,
+        {"findings_context_top_k": TOP_K, "findings_context_max_tokens": MAX_TOKENS},
+    )
+
+    for label, tokens in [
+        ("all findings", all_tokens),
+        ("relevant findings", relevant_tokens),
+    ]:
+        logger.info(
+            f"{label}: total {sum(tokens)} prompt tokens, "
+            f"first chunk {tokens[0]}, last chunk {tokens[-1]}, max {max(tokens)}"
+        )
+
+    assert len(all_tokens) == len(relevant_tokens) == NUM_SECTIONS
+    # The full context keeps growing, the relevant one is capped
+    assert all_tokens[-1] > all_tokens[0] * 3
+    assert max(relevant_tokens) - min(relevant_tokens) <= MAX_TOKENS
+    assert relevant_tokens[-1] < all_tokens[-1] / 2
+    assert sum(relevant_tokens) < sum(all_tokens)
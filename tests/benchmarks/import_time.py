@@ -0,0 +1,78 @@
+import logging
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, Tuple
+
+# HERE LIES A BENCHMARK OF THE STARTUP COST OF THE WORKFLOWS, BASED ON python -X importtime
+# Importing the workflows must not import PDF converters or chat model SDKs, nor build a chat model
+# Run with: poetry run pytest -s tests/benchmarks/import_time.py
+
+ENTRY_MODULE = "packages.workflows"
+
+# Only imported when a PDF is converted locally or a chat model is built
+LAZY_MODULES = [
+    "marker",
+    "langchain_google_vertexai",
+    "langchain_community",
+    "google.cloud.aiplatform",
+    "vertexai",
+    "pdfplumber",
+    "pypdfium2",
+    "packages.framework.document_loaders.hybrid_loader",
+]
+
+# Generous budget for a cold import, override it on slow machines
+IMPORT_TIME_BUDGET_SECONDS = float(os.getenv("IMPORT_TIME_BUDGET_SECONDS", 10))
+TOP_MODULES = 10
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+# Returns the self and cumulative microseconds of every imported module
+def measure_import_time(module: str) -> Dict[str, Tuple[int, int]]:
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"import {module}; "
+            "from packages.workflows.paper_scanner.v0.utils.call_llm import get_default_llm; "
+            "assert get_default_llm.cache_info().currsize == 0, 'chat model built at import'",
+        ],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    )
+    assert completed.returncode == 0, completed.stderr[-2000:]
+
+    timings = {}
+    for line in completed.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, _, name = match.groups()
+            timings[name] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def test_import_time():
+    timings = measure_import_time(ENTRY_MODULE)
+    total_seconds = timings[ENTRY_MODULE][1] / 1e6
+
+    top_modules = sorted(timings.items(), key=lambda item: item[1][0], reverse=True)
+    logger.info(f"import {ENTRY_MODULE}: {total_seconds:.2f}s, {len(timings)} modules")
+    for name, (self_us, cumulative_us) in top_modules[:TOP_MODULES]:
+        logger.info(f"  {name:<60} self {self_us / 1e3:8.1f}ms")
+
+    eager = [
+        name
+        for name in timings
+        if any(name == lazy or name.startswith(f"{lazy}.") for lazy in LAZY_MODULES)
+    ]
+    assert not eager, f"Heavy modules imported eagerly: {sorted(eager)[:10]}"
+    assert total_seconds < IMPORT_TIME_BUDGET_SECONDS
@@ -0,0 +1,106 @@
+import logging
+import random
+import re
+import tracemalloc
+
+from langchain.text_splitter import MarkdownTextSplitter
+
+from packages.framework.text_splitters.markdown import (
+    iter_markdown_chunks,
+    markdown_text_split,
+)
+from tests.utils.benchmark_baseline import best_time
+
+# HERE LIES A BENCHMARK OF THE SINGLE-PASS MARKDOWN SPLITTER AGAINST THE PREVIOUS HEADER REGEX SPLITTER
+# The paper is several megabytes of sections, oversized sections, code fences holding "# comments" and $$ math
+# Run with: poetry run pytest -s tests/benchmarks/markdown_splitter.py
+
+PAPER_SECTIONS = 3000
+CHUNK_SIZE = 10000
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# The splitter before the single-pass one, every header-like line is a section break
+def legacy_markdown_text_split(
+    input_text: str, chunk_size: int = 10000, chunk_overlap: int = 0
+):
+    matches = list(re.finditer(r"^(#{1,6} .+)$", input_text, flags=re.MULTILINE))
+    sections = []
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(input_text)
+        sections.append(input_text[match.start() : end].strip())
+
+    splitter = MarkdownTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    chunks = []
+    for section in sections:
+        if len(section) <= chunk_size:
+            chunks.append(section)
+        else:
+            chunks.extend(splitter.split_text(section))
+    return chunks
+
+
+def create_large_paper(num_sections: int) -> str:
+    rng = random.Random(0)
+    words = ["protein", "layer", "model", "cell", "signal", "dataset", "effect"]
+
+    def paragraph() -> str:
+        return " ".join(rng.choice(words) for _ in range(rng.randint(20, 120)))
+
+    sections = []
+    for i in range(num_sections):
+        # One section in ten is longer than a chunk
+        paragraphs = rng.randint(40, 60) if i % 10 == 0 else rng.randint(1, 8)
+        body = "\n\n".join(paragraph() for _ in range(paragraphs))
+        if i % 4 == 0:
+            body += "\n\n```python\n# Configure the model\nmodel = build()\n```"
+        if i % 7 == 0:
+            body += "\n\n$$\nE = mc^2\n$$"
+        sections.append(f"{'#' * (i % 3 + 1)} Section {i}\n\n{body}")
+    return "\n\n".join(sections)
+
+
+def peak_memory(func) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_markdown_splitter():
+    paper = create_large_paper(PAPER_SECTIONS)
+    size_mb = len(paper) / 1e6
+
+    legacy_chunks = legacy_markdown_text_split(paper, CHUNK_SIZE)
+    chunks = markdown_text_split(paper, CHUNK_SIZE)
+    # Comments of code fences are not sections anymore
+    assert len(chunks) < len(legacy_chunks)
+    assert all(len(chunk) <= CHUNK_SIZE for chunk in chunks)
+
+    legacy_seconds = best_time(lambda: legacy_markdown_text_split(paper, CHUNK_SIZE))
+    seconds = best_time(lambda: markdown_text_split(paper, CHUNK_SIZE))
+
+    # Consuming the chunks one by one never holds copies of the sections
+    def consume():
+        for _ in iter_markdown_chunks(paper, CHUNK_SIZE):
+            pass
+
+    legacy_peak = peak_memory(lambda: legacy_markdown_text_split(paper, CHUNK_SIZE))
+    streaming_peak = peak_memory(consume)
+
+    logger.info(f"Paper: {size_mb:.1f}MB, {len(chunks)} chunks")
+    logger.info(
+        f"legacy splitter:      {legacy_seconds * 1000:8.1f}ms, "
+        f"peak {legacy_peak / 1e6:6.1f}MB"
+    )
+    logger.info(
+        f"single-pass splitter: {seconds * 1000:8.1f}ms, "
+        f"peak {streaming_peak / 1e6:6.1f}MB streamed"
+    )
+    assert size_mb > 2
+    assert seconds < legacy_seconds
+    assert streaming_peak < len(paper) / 10
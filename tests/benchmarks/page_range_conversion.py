@@ -0,0 +1,88 @@
+from io import BytesIO
+import logging
+import time
+
+import pypdfium2 as pdfium
+
+from packages.framework.document_loaders.marker_loader.worker_pool import (
+    MarkerWorkerPool,
+)
+
+# HERE LIES A BENCHMARK OF THE PAGE RANGE CONVERSION AGAINST THE WHOLE PDF CONVERSION
+# The fake converter sleeps for each page instead of running the marker models, the workers of a
+# host with few cores still convert their ranges side by side like on a multi-core host
+# Run with: poetry run pytest -s tests/benchmarks/page_range_conversion.py
+
+PAGE_COUNTS = [8, 16, 32, 64]
+NUM_WORKERS = 4
+PAGES_PER_RANGE = 8
+# Marker takes about a second per page on a CPU, scaled down
+PAGE_SECONDS = 0.02
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def create_pdf(num_pages: int) -> bytes:
+    document = pdfium.PdfDocument.new()
+    for _ in range(num_pages):
+        document.new_page(612, 792)
+    buffer = BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def create_sleeping_converter():
+    def convert(pdf_path: str, page_range=None):
+        document = pdfium.PdfDocument(pdf_path)
+        pages = list(page_range) if page_range is not None else range(len(document))
+        document.close()
+
+        time.sleep(PAGE_SECONDS * len(pages))
+        return {
+            "markdown": "\n\n".join(f"Page {page}." for page in pages),
+            "images": {},
+            "metadata": {
+                "table_of_contents": [],
+                "page_stats": [{"page_id": page} for page in pages],
+            },
+        }
+
+    return convert
+
+
+def test_page_range_conversion():
+    pdfs = {page_count: create_pdf(page_count) for page_count in PAGE_COUNTS}
+    with MarkerWorkerPool(
+        num_workers=1, converter_factory=create_sleeping_converter
+    ) as whole_pool, MarkerWorkerPool(
+        num_workers=NUM_WORKERS, converter_factory=create_sleeping_converter
+    ) as range_pool:
+        # Both pools are warm before the measures
+        whole_pool.convert(pdfs[PAGE_COUNTS[0]])
+        range_pool.convert_pages(pdfs[PAGE_COUNTS[-1]], PAGES_PER_RANGE)
+
+        results = {}
+        for page_count, pdf in pdfs.items():
+            start = time.perf_counter()
+            whole = whole_pool.convert(pdf)
+            whole_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            stitched = range_pool.convert_pages(pdf, PAGES_PER_RANGE)
+            range_seconds = time.perf_counter() - start
+
+            assert stitched["markdown"] == whole["markdown"]
+            results[page_count] = (whole_seconds, range_seconds)
+            logger.info(
+                f"{page_count:3d} pages: whole {whole_seconds * 1000:7.1f}ms, "
+                f"{NUM_WORKERS} workers in ranges of {PAGES_PER_RANGE} pages "
+                f"{range_seconds * 1000:7.1f}ms, {whole_seconds / range_seconds:4.1f}x"
+            )
+
+    # The whole conversion grows with the pages, the ranges with the pages per worker
+    whole_seconds, range_seconds = results[PAGE_COUNTS[-1]]
+    assert range_seconds < whole_seconds / 2
+    # A PDF of a single range is converted in one piece, at the same speed
+    whole_seconds, range_seconds = results[PAGE_COUNTS[0]]
+    assert range_seconds < whole_seconds * 2
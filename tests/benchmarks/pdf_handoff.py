@@ -0,0 +1,110 @@
+from functools import partial
+from io import BytesIO
+import logging
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pytest
+
+from packages.framework.document_loaders.marker_loader import convert_pdf_buffer
+
+# HERE LIES A BENCHMARK OF THE IN-MEMORY PDF HANDOFF TO MARKER AGAINST THE PREVIOUS TEMPORARY FILE ON DISK
+# The converter reads the PDF back from its path like marker does, the PDF is a large scanned paper. Marker
+# keeps the file for minutes, long enough for the page cache to write a temporary file back to the disk
+# Run with: poetry run pytest -s tests/benchmarks/pdf_handoff.py
+
+PDF_SIZE_MB = 64
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# The handoff before the in-memory one, the buffer is copied then written to a temporary file on disk
+def legacy_convert_pdf_buffer(convert, pdf_buffer):
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
+        content = (
+            pdf_buffer.getvalue() if isinstance(pdf_buffer, BytesIO) else pdf_buffer
+        )
+        temp_file.write(content)
+        temp_path = temp_file.name
+    try:
+        return convert(temp_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def read_pdf(pdf_path: str) -> int:
+    # Reads the PDF in blocks, marker renders the pages from the file
+    size = 0
+    with open(pdf_path, "rb", buffering=0) as file:
+        while block := file.read(1024 * 1024):
+            size += len(block)
+    return size
+
+
+def measure(convert, data: bytes, repeats: int = 3) -> dict:
+    # Every measure gets a buffer written like an uploaded file, getvalue copies it only once
+    def fresh_buffer() -> BytesIO:
+        pdf_buffer = BytesIO()
+        pdf_buffer.write(data)
+        return pdf_buffer
+
+    def write_bytes() -> int:
+        # Bytes this process sent, or will send, to the storage layer, page cache writes included
+        with open("/proc/self/io") as file:
+            counters = dict(line.split(": ") for line in file.read().splitlines())
+        return int(counters["write_bytes"])
+
+    seconds = []
+    for _ in range(repeats):
+        pdf_buffer = fresh_buffer()
+        start = time.perf_counter()
+        assert convert(read_pdf, pdf_buffer) == len(data)
+        seconds.append(time.perf_counter() - start)
+
+    pdf_buffer = fresh_buffer()
+    tracemalloc.start()
+    try:
+        convert(read_pdf, pdf_buffer)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    pdf_buffer = fresh_buffer()
+    start_bytes = write_bytes()
+    convert(read_pdf, pdf_buffer)
+    storage = write_bytes() - start_bytes
+    return {"seconds": min(seconds), "peak": peak, "storage": storage}
+
+
+@pytest.mark.skipif(
+    not os.path.exists("/proc/self/io"), reason="Storage counters are Linux only"
+)
+def test_pdf_handoff():
+    data = os.urandom(PDF_SIZE_MB * 1024 * 1024)
+    size = len(data)
+
+    results = {}
+    for name, convert in [
+        ("legacy", legacy_convert_pdf_buffer),
+        ("on disk", partial(convert_pdf_buffer, in_memory=False)),
+        ("in memory", convert_pdf_buffer),
+    ]:
+        results[name] = measure(convert, data)
+        logger.info(
+            f"{name:<10} {results[name]['seconds'] * 1000:8.1f}ms, "
+            f"peak {results[name]['peak'] / 1e6:6.1f}MB of Python allocations, "
+            f"{results[name]['storage'] / 1e6:6.1f}MB written to storage"
+        )
+
+    # The buffer is not copied anymore, and the in-memory file never reaches the disk
+    assert results["legacy"]["peak"] >= size
+    assert results["on disk"]["peak"] < size / 10
+    assert results["in memory"]["peak"] < size / 10
+    assert results["legacy"]["storage"] >= size
+    assert results["in memory"]["storage"] == 0
+    # Page cache writes are about as fast as tmpfs ones, the handoff itself costs about the same
+    assert results["in memory"]["seconds"] < results["legacy"]["seconds"] * 3
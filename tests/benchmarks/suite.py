@@ -0,0 +1,177 @@
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+import copy
+import importlib
+import logging
+import os
+import random
+
+import pytest
+
+from packages.framework.text_splitters.markdown import markdown_text_split
+from packages.workflows.paper_scanner.v0 import create_agent_config
+from packages.workflows.paper_scanner.v0.agent import paper_summarization_agent
+from packages.workflows.paper_scanner.v0.agent.nodes.chunk.loading import (
+    chunks_initializer,
+)
+from packages.workflows.paper_scanner.v0.agent.nodes.chunk.processing import (
+    post_processing_router,
+)
+from packages.workflows.paper_scanner.v0.agent.schemas.states import (
+    merge_findings,
+    merge_metadata,
+)
+from tests.utils.benchmark_baseline import best_time, check_baseline
+
+# HERE LIES THE BENCHMARK SUITE OF THE SPLITTER, STATE REDUCERS, ROUTER AND FULL GRAPH
+# Every benchmark runs on synthetic papers of 10, 100 and 1000 chunks and fails when it regresses
+# past its baseline, stored in tests/benchmarks/baselines/suite.json (see tests/utils/benchmark_baseline.py)
+# The full graph runs offline with the synthetic chat model (LLM_MODEL_NAME=fake-synthetic, no latency)
+# Run with: poetry run pytest -s tests/benchmarks/suite.py
+
+SIZES = [10, 100, 1000]
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "suite.json")
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def create_markdown_paper(num_chunks: int) -> str:
+    # One section per chunk, longer than the minimum chunk size of the chunks initializer
+    rng = random.Random(num_chunks)
+    words = ["protein", "layer", "model", "cell", "signal", "dataset", "effect"]
+    return "\n\n".join(
+        f"# Section {i}\n\n"
+        + " ".join(f"{rng.choice(words)} {i}." for _ in range(200))
+        + ("\n\n```python\nprint('code')\n```" if i % 10 == 0 else "")
+        for i in range(num_chunks)
+    )
+
+
+def create_finding(i: int) -> dict:
+    return {
+        "id": f"finding-{i}",
+        "title": f"Finding {i}",
+        "summary": f"Summary of finding {i}",
+        "methodology": "methodology",
+        "keywords": [f"keyword-{i}"],
+        "source_chunks_ids": [f"chunk-{i}"],
+    }
+
+
+def report(name: str, seconds: float):
+    ratio = check_baseline(BASELINE_PATH, name, seconds)
+    logger.info(f"{name:<40} {seconds * 1000:10.2f}ms  {ratio:5.2f}x baseline")
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_markdown_text_split(size):
+    paper = create_markdown_paper(size)
+    chunks = markdown_text_split(input_text=paper, chunk_size=10000, chunk_overlap=0)
+    assert len(chunks) == size
+
+    report(
+        f"markdown_text_split[{size}]",
+        best_time(lambda: markdown_text_split(paper, 10000, 0)),
+    )
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_chunks_initializer(size):
+    chunks = markdown_text_split(create_markdown_paper(size), 10000, 0)
+    # Sections are packed into chunks of the default token budget
+    chunks_queue = chunks_initializer({"chunks": chunks})["chunks_queue"]
+    assert len(chunks_queue) < size
+    assert "\n\n".join(chunk["content"] for chunk in chunks_queue) == "\n\n".join(
+        chunks
+    )
+
+    report(
+        f"chunks_initializer[{size}]",
+        best_time(lambda: chunks_initializer({"chunks": chunks})),
+    )
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_state_reducers(size):
+    # One finding created and one updated per chunk, metadata merged per chunk, like a sequential run
+    def run():
+        findings = []
+        metadata = {}
+        for i in range(size):
+            update = create_finding(i // 2)
+            findings = merge_findings(findings, [create_finding(i), update])
+            metadata = merge_metadata(metadata, {"title": f"Title {i}", "authors": None})
+        return findings
+
+    assert len(run()) == size
+    report(f"merge_findings_metadata[{size}]", best_time(run))
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_post_processing_router(size):
+    findings = [create_finding(i) for i in range(size)]
+    state = {
+        "findings": findings,
+        "current_chunk": {
+            "chunk_id": "chunk-0",
+            "content": "text",
+            "status": "processing",
+            "analysis": {
+                "findings": {
+                    "reasoning": "",
+                    "findings_updates": [
+                        {"id": f"finding-{i}", "what_to_update": "more"}
+                        for i in [0, size // 2, size - 1]
+                    ],
+                    "new_findings": [
+                        {"title": "New", "description": "new finding"}
+                    ],
+                },
+                "metadata": {"title": "Title"},
+            },
+        },
+    }
+    config = create_agent_config()
+    assert len(post_processing_router(state, config)) == 5
+
+    def run():
+        # The router runs once per chunk
+        for _ in range(100):
+            post_processing_router(state, config)
+
+    report(f"post_processing_router[{size}]", best_time(run))
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_paper_summarization_agent(size, monkeypatch):
+    call_llm = importlib.import_module(
+        "packages.workflows.paper_scanner.v0.utils.call_llm"
+    )
+    monkeypatch.setattr(call_llm, "LLM_MODEL_NAME", "fake-synthetic")
+    call_llm.get_default_llm.cache_clear()
+
+    chunks = markdown_text_split(create_markdown_paper(size), 10000, 0)
+    # One chunk per section, the graph runs once per chunk
+    config = {
+        **create_agent_config(options={"chunk_token_budget": 0}),
+        "recursion_limit": 10 * size + 50,
+    }
+
+    results = []
+
+    def run():
+        results.append(
+            paper_summarization_agent.invoke({"chunks": copy.deepcopy(chunks)}, config)
+        )
+
+    try:
+        # A single run, the largest paper takes tens of seconds
+        seconds = best_time(run, repeats=1)
+    finally:
+        call_llm.get_default_llm.cache_clear()
+
+    assert len(results[0]["processed_chunks"]) == size
+    report(f"paper_summarization_agent[{size}]", seconds)
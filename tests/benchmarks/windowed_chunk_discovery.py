@@ -0,0 +1,73 @@
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+import logging
+import time
+
+from packages.workflows.paper_scanner.v0.agent import (
+    paper_summarization_agent,
+    paper_summarization_windowed_agent,
+)
+from tests.utils.fake_call_llm import patch_call_llm
+
+# HERE LIES A BENCHMARK OF THE WINDOWED CHUNK DISCOVERY AGAINST THE SEQUENTIAL ONE
+# It runs offline with a fake LLM of fixed latency
+# Run with: poetry run pytest -s tests/benchmarks/windowed_chunk_discovery.py
+
+NUM_CHUNKS = 16
+LLM_LATENCY = 0.05
+WINDOW_SIZES = [1, 2, 4, 8]
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def create_chunks(num_chunks: int):
+    return [
+        f"# Section {i}\n\n" + f"Content of section {i}. " * 40
+        for i in range(num_chunks)
+    ]
+
+
+# One chunk per section, sections are not packed together
+def run_sequential():
+    start = time.perf_counter()
+    result = paper_summarization_agent.invoke(
+        {"chunks": create_chunks(NUM_CHUNKS)},
+        {"recursion_limit": 500, "configurable": {"chunk_token_budget": 0}},
+    )
+    return time.perf_counter() - start, result
+
+
+def run_windowed(window_size: int):
+    start = time.perf_counter()
+    result = paper_summarization_windowed_agent.invoke(
+        {"chunks": create_chunks(NUM_CHUNKS)},
+        {
+            "recursion_limit": 500,
+            "max_concurrency": window_size,
+            "configurable": {"window_size": window_size, "chunk_token_budget": 0},
+        },
+    )
+    return time.perf_counter() - start, result
+
+
+def test_windowed_discovery_speedup(monkeypatch):
+    patch_call_llm(monkeypatch, latency=LLM_LATENCY)
+
+    sequential_time, sequential_result = run_sequential()
+    logger.info(f"sequential: {sequential_time:.2f}s")
+
+    timings = {}
+    for window_size in WINDOW_SIZES:
+        timings[window_size], result = run_windowed(window_size)
+        logger.info(f"window_size={window_size}: {timings[window_size]:.2f}s")
+
+        # Every chunk is processed once and yields the same findings as the sequential run
+        assert len(result["processed_chunks"]) == NUM_CHUNKS
+        assert len(result["findings"]) == len(sequential_result["findings"])
+
+    # Wall time should go down roughly linearly with the window size
+    assert timings[4] < timings[1] / 2
+    assert timings[8] < timings[2] / 2
@@ -0,0 +1,103 @@
+import multiprocessing
+import sqlite3
+import time
+
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.outputs import Generation
+
+from packages.framework.caches.sqlite_llm_cache import SQLiteLLMCache
+
+# HERE LIES A TEST SCRIPT FOR THE PERSISTENT LLM RESPONSE CACHE
+# Run with: poetry run pytest -s tests/framework/caches/sqlite_llm_cache.py
+
+
+def test_cached_model_reruns_are_free(tmp_path):
+    cache = SQLiteLLMCache(str(tmp_path / "llm.sqlite"))
+    model = FakeListChatModel(responses=["first", "second"], cache=cache)
+
+    assert model.invoke("prompt").content == "first"
+    # The same prompt is answered from the cache instead of the next response
+    assert model.invoke("prompt").content == "first"
+    assert model.invoke("other prompt").content == "second"
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["entries"] == 2
+
+
+def test_model_parameters_are_part_of_the_key(tmp_path):
+    cache = SQLiteLLMCache(str(tmp_path / "llm.sqlite"))
+    cache.update("prompt", "temperature=0", [Generation(text="cold")])
+
+    assert cache.lookup("prompt", "temperature=0")[0].text == "cold"
+    assert cache.lookup("prompt", "temperature=1") is None
+
+
+def test_eviction(tmp_path):
+    cache = SQLiteLLMCache(str(tmp_path / "llm.sqlite"), max_entries=2)
+    for i in range(3):
+        cache.update(f"prompt {i}", "llm", [Generation(text=str(i))])
+        time.sleep(0.01)
+    assert cache.lookup("prompt 0", "llm") is None
+    assert cache.stats()["entries"] == 2
+
+    cache = SQLiteLLMCache(str(tmp_path / "bytes.sqlite"), max_bytes=1500)
+    for i in range(5):
+        cache.update(f"prompt {i}", "llm", [Generation(text="x" * 200)])
+        time.sleep(0.01)
+    assert cache.stats()["bytes"] <= 1500
+    assert cache.lookup("prompt 4", "llm") is not None
+
+    cache = SQLiteLLMCache(str(tmp_path / "age.sqlite"), max_age_seconds=0.05)
+    cache.update("prompt", "llm", [Generation(text="old")])
+    time.sleep(0.1)
+    assert cache.lookup("prompt", "llm") is None
+
+
+def fill_cache(database_path: str, worker: int):
+    cache = SQLiteLLMCache(database_path)
+    for i in range(50):
+        cache.update(f"worker {worker} prompt {i}", "llm", [Generation(text=str(i))])
+        cache.lookup(f"worker {worker} prompt {i}", "llm")
+
+
+def test_shared_across_processes(tmp_path):
+    database_path = str(tmp_path / "llm.sqlite")
+    SQLiteLLMCache(database_path)
+
+    workers = [
+        multiprocessing.Process(target=fill_cache, args=(database_path, worker))
+        for worker in range(4)
+    ]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+        assert process.exitcode == 0
+
+    stats = SQLiteLLMCache(database_path).stats()
+    assert stats["entries"] == 200
+    assert stats["hits"] == 200
+
+
+def test_misses_do_not_wait_for_writers(tmp_path):
+    database_path = str(tmp_path / "llm.sqlite")
+    cache = SQLiteLLMCache(database_path, timeout=0.1)
+    cache.update("prompt", "llm", [Generation(text="cached")])
+
+    # Another process holds the write lock
+    writer = sqlite3.connect(database_path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    start = time.perf_counter()
+    assert cache.lookup("other prompt", "llm") is None
+    assert cache.lookup("prompt 2", "llm") is None
+    assert time.perf_counter() - start < 0.1
+    writer.execute("ROLLBACK")
+    writer.close()
+
+    # Misses are counted with the next write
+    assert cache.lookup("prompt", "llm")[0].text == "cached"
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
@@ -0,0 +1,176 @@
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+import asyncio
+import importlib
+from uuid import uuid4
+
+import pytest
+from langchain_core.exceptions import OutputParserException
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableLambda
+
+from packages.framework.callbacks.run_profiler import (
+    LLM_SLOT_WAIT_EVENT,
+    MAX_COUNTED_ERRORS,
+    RunProfiler,
+    report_event,
+)
+from packages.framework.utils.retry_policy import RetryPolicy
+from packages.workflows.paper_scanner.v0 import (
+    arun_paper_scanner_v0,
+    prepare_agent_run,
+    run_paper_scanner_v0,
+)
+from packages.workflows.paper_scanner.v0.agent import build_paper_summarization_agent
+from packages.workflows.paper_scanner.v0.agent.schemas.format_instructions import (
+    NewFinding,
+)
+from packages.workflows.paper_scanner.v0.utils.call_llm import (
+    call_llm,
+    llm_calls_limiter,
+)
+from tests.utils.fake_call_llm import create_fake_call_llm, patch_call_llm
+
+# HERE LIES A TEST SCRIPT FOR THE PER-NODE RUN PROFILER
+# Runs the graph offline with the synthetic chat model and checks the profile added to the result
+# Run with: poetry run pytest -s tests/framework/callbacks/run_profiler.py
+
+MARKDOWN_PAPER = "\n\n".join(
+    f"# Section {i}\n\nThe protein layer {i} changes the cell signal. " * 20
+    for i in range(3)
+)
+# One chunk per section, sections are not packed together
+OPTIONS = {"chunk_token_budget": 0}
+
+
+@pytest.fixture
+def synthetic_llm(monkeypatch):
+    call_llm_module = importlib.import_module(
+        "packages.workflows.paper_scanner.v0.utils.call_llm"
+    )
+    monkeypatch.setattr(call_llm_module, "LLM_MODEL_NAME", "fake-synthetic")
+    call_llm_module.get_default_llm.cache_clear()
+    yield
+    call_llm_module.get_default_llm.cache_clear()
+
+
+def get_node(profile: dict, name: str) -> dict:
+    return next(node for node in profile["nodes"] if node["node"] == name)
+
+
+def test_run_profile(synthetic_llm):
+    result = run_paper_scanner_v0(markdown_paper=MARKDOWN_PAPER, options=OPTIONS)
+    profile = result["profile"]
+
+    chunks = len(result["processed_chunks"])
+    assert get_node(profile, "chunks_initializer")["invocations"] == 1
+    assert get_node(profile, "chunk_processor")["invocations"] == chunks
+    assert get_node(profile, "chunk_processor")["llm_calls"] == chunks
+
+    # Every LLM call is attributed to a node, tokens come from the model usage metadata
+    assert profile["llm_calls"] > chunks
+    assert profile["prompt_tokens"] > profile["completion_tokens"] > 0
+    assert all(node["node"] != "unknown" for node in profile["nodes"])
+    assert profile["retries"] == 0
+    assert profile["llm_queue_seconds"] == 0
+
+    # Nodes are sorted slowest first, their time fits in the run
+    wall_seconds = [node["wall_seconds"] for node in profile["nodes"]]
+    assert wall_seconds == sorted(wall_seconds, reverse=True)
+    assert 0 < wall_seconds[0] <= profile["wall_seconds"]
+    assert profile["llm_call_seconds"] <= profile["wall_seconds"]
+
+
+def test_async_run_profile_with_slot_wait(synthetic_llm, monkeypatch):
+    call_llm_module = importlib.import_module(
+        "packages.workflows.paper_scanner.v0.utils.call_llm"
+    )
+    monkeypatch.setattr(call_llm_module, "LLM_FAKE_LATENCY_SECONDS", 0.05)
+
+    async def run():
+        # A shared budget of one LLM call makes the chunks of a window wait for a slot
+        token = llm_calls_limiter.set(asyncio.Semaphore(1))
+        try:
+            return await arun_paper_scanner_v0(
+                markdown_paper=MARKDOWN_PAPER, window_size=3, options=OPTIONS
+            )
+        finally:
+            llm_calls_limiter.reset(token)
+
+    profile = asyncio.run(run())["profile"]
+    assert profile["llm_calls"] > 0
+    assert get_node(profile, "window_chunk_processor")["invocations"] == 3
+    assert get_node(profile, "window_chunk_processor")["llm_queue_seconds"] > 0.05
+
+
+def test_retries_per_node(monkeypatch):
+    patch_call_llm(monkeypatch, latency=0)
+
+    # The finding creator fails once per finding with a retryable error
+    fake_call_llm = create_fake_call_llm(latency=0)
+    attempts = {}
+
+    class ServiceUnavailable(Exception):
+        code = 503
+
+    def flaky_call_llm(prompt_template, input_parameters, pydantic_object, llm=None):
+        key = input_parameters["title"]
+        attempts[key] = attempts.get(key, 0) + 1
+        if attempts[key] == 1:
+            raise ServiceUnavailable("overloaded")
+        return fake_call_llm(prompt_template, input_parameters, pydantic_object)
+
+    creation = importlib.import_module(
+        "packages.workflows.paper_scanner.v0.agent.nodes.finding.creation"
+    )
+    monkeypatch.setattr(creation, "call_llm", flaky_call_llm)
+
+    _, agent_input, agent_config = prepare_agent_run(MARKDOWN_PAPER, options=OPTIONS)
+    agent = build_paper_summarization_agent(
+        retry_policies={"finding_creator": RetryPolicy(initial_interval=0)}
+    )
+    agent.invoke(agent_input, agent_config)
+
+    profile = agent_config["callbacks"][0].profile()
+    assert get_node(profile, "finding_creator")["retries"] == len(attempts) > 0
+    assert profile["retries"] == len(attempts)
+
+
+def test_parse_failures_counted_once():
+    llm = FakeListChatModel(responses=["not json"])
+    prompt = ChatPromptTemplate.from_template("Create a finding\n{format_instructions}")
+
+    def node(_):
+        return call_llm(prompt, {}, NewFinding, llm=llm)
+
+    profiler = RunProfiler()
+    # The error goes up through the parser, the chain, the lambda and the outer chain
+    chain = RunnableLambda(node) | RunnableLambda(lambda x: x)
+    with pytest.raises(OutputParserException):
+        chain.invoke({}, {"callbacks": [profiler]})
+
+    profile = profiler.profile()
+    assert profile["parse_failures"] == 1
+    assert profile["llm_calls"] == 1
+
+
+def test_counted_errors_are_bounded():
+    profiler = RunProfiler()
+    run_id = uuid4()
+    for _ in range(MAX_COUNTED_ERRORS * 2):
+        error = OutputParserException("not json")
+        # Every parent run reports the same error
+        for _ in range(3):
+            profiler.on_chain_error(error, run_id=run_id)
+
+    assert profiler.profile()["parse_failures"] == MAX_COUNTED_ERRORS * 2
+    assert len(profiler._counted_errors) == MAX_COUNTED_ERRORS
+
+
+def test_events_outside_of_a_run():
+    # Reporting from code running without callbacks is a no-op
+    report_event(LLM_SLOT_WAIT_EVENT, {"seconds": 1.0})
+    assert RunProfiler().profile()["llm_queue_seconds"] == 0
@@ -0,0 +1,108 @@
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+import asyncio
+import importlib
+import json
+import statistics
+
+import pytest
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.output_parsers import PydanticOutputParser
+
+from packages.framework.chat_model.custom.fake_chat_model import FakeChatModel
+from packages.framework.chat_model.get_chat_model import get_chat_model
+from packages.workflows import paper_scanner
+from packages.workflows.paper_scanner.v0.agent.schemas.format_instructions import (
+    ChunkProcessorAnalysis,
+    FindingsConsolidator,
+    FindingUpdate,
+    NewFinding,
+)
+
+# HERE LIES A TEST SCRIPT FOR THE OFFLINE RECORD, REPLAY AND SYNTHETIC CHAT MODEL
+# Run with: poetry run pytest -s tests/framework/chat_model/fake_chat_model.py
+
+SCHEMAS = [ChunkProcessorAnalysis, NewFinding, FindingUpdate, FindingsConsolidator]
+
+
+def create_prompt(pydantic_object, text: str = "Proteins fold in cells.") -> str:
+    parser = PydanticOutputParser(pydantic_object=pydantic_object)
+    return (
+        f"Text: {text}\n\nExisting findings:\nId: finding-1\nTitle: Folding\n"
+        f"Id: finding-2\nTitle: Cells\n\n{parser.get_format_instructions()}"
+    )
+
+
+@pytest.mark.parametrize("pydantic_object", SCHEMAS)
+def test_synthetic_answers_are_valid_and_deterministic(pydantic_object):
+    model = get_chat_model("fake-synthetic")
+    prompt = create_prompt(pydantic_object)
+    parser = PydanticOutputParser(pydantic_object=pydantic_object)
+
+    answer = model.invoke(prompt).content
+    parser.parse(answer)
+    assert model.invoke(prompt).content == answer
+
+
+def test_synthetic_updates_reference_listed_ids():
+    model = FakeChatModel(max_items=3)
+    updated_ids = set()
+    for i in range(20):
+        prompt = create_prompt(ChunkProcessorAnalysis, text=f"Chunk {i}")
+        analysis = json.loads(model.invoke(prompt).content)
+        updated_ids |= {u["id"] for u in analysis["findings"]["findings_updates"]}
+    assert updated_ids == {"finding-1", "finding-2"}
+
+
+def test_record_and_replay(tmp_path):
+    cassette_path = str(tmp_path / "cassettes" / "paper.json")
+    recorded_model = FakeListChatModel(responses=["first", "second"])
+    recorder = get_chat_model(
+        "fake-record", cassette_path=cassette_path, recorded_model=recorded_model
+    )
+    assert recorder.invoke("prompt 1").content == "first"
+    assert recorder.invoke("prompt 2").content == "second"
+
+    player = get_chat_model(
+        "fake-replay", cassette_path=cassette_path, latency="recorded"
+    )
+    assert player.invoke("prompt 2").content == "second"
+    assert asyncio.run(player.ainvoke("prompt 1")).content == "first"
+    with pytest.raises(KeyError):
+        player.invoke("prompt 3")
+
+
+def test_latency_distributions():
+    for latency in ["constant", "uniform", "lognormal"]:
+        model = FakeChatModel(latency=latency, latency_seconds=2.0, latency_spread=0.5)
+        samples = [model._sample_latency(f"prompt {i}", None) for i in range(2000)]
+        assert abs(statistics.mean(samples) - 2.0) < 0.1
+        assert (statistics.pstdev(samples) > 0) == (latency != "constant")
+
+
+def test_pipeline_runs_offline(monkeypatch):
+    # Select the synthetic model like LLM_MODEL_NAME=fake-synthetic does
+    call_llm = importlib.import_module(
+        "packages.workflows.paper_scanner.v0.utils.call_llm"
+    )
+    monkeypatch.setattr(call_llm, "LLM_MODEL_NAME", "fake-synthetic")
+    call_llm.get_default_llm.cache_clear()
+    try:
+        markdown = "\n\n".join(
+            f"# Section {i}\n\n" + f"Experiment {i} shows protein folding. " * 30
+            for i in range(4)
+        )
+        # One chunk per section, sections are not packed together
+        options = {"chunk_token_budget": 0}
+        result = paper_scanner["v0"](markdown_paper=markdown, options=options)
+        window_result = paper_scanner["v0"](
+            markdown_paper=markdown, window_size=2, options=options
+        )
+    finally:
+        call_llm.get_default_llm.cache_clear()
+
+    assert len(result["processed_chunks"]) == 4
+    assert result["findings"]
+    assert len(window_result["processed_chunks"]) == 4
@@ -0,0 +1,203 @@
+import ctypes
+from io import BytesIO
+
+import pypdfium2 as pdfium
+import pypdfium2.raw as pdfium_c
+from PIL import Image
+
+from packages.framework.document_loaders.hybrid_loader import hybrid_load
+from packages.framework.document_loaders.hybrid_loader.text_layer import (
+    extract_text_layer,
+    text_quality,
+)
+from packages.workflows.paper_scanner.v0.utils import hybrid_pdf
+
+# HERE LIES A TEST SCRIPT FOR THE HYBRID PDF LOADER
+# The PDFs are written with pdfium: text pages, a math page, a scanned page and a garbled page
+# Run with: poetry run pytest -s tests/framework/document_loaders/hybrid_loader.py
+
+BODY = [
+    "Deep networks are hard to train because of the vanishing gra-",
+    "dients of their layers, we present a residual learning framework",
+    "to ease the training of networks that are much deeper than those",
+    "used before, and we show that these residual networks are easier",
+    "to optimize and gain accuracy from a considerably increased depth",
+]
+
+
+def add_text(document, page, text, y, size=10.0, font="Helvetica"):
+    text_object = pdfium_c.FPDFPageObj_NewTextObj(
+        document.raw, font.encode(), ctypes.c_float(size)
+    )
+    text_buffer = ctypes.create_string_buffer((text + "\x00").encode("utf-16-le"))
+    pdfium_c.FPDFText_SetText(
+        text_object, ctypes.cast(text_buffer, ctypes.POINTER(pdfium_c.FPDF_WCHAR))
+    )
+    pdfium_c.FPDFPageObj_Transform(text_object, 1, 0, 0, 1, 72, y)
+    pdfium_c.FPDFPage_InsertObject(page.raw, text_object)
+
+
+def add_lines(document, page, lines, y=700, font="Helvetica"):
+    for line in lines:
+        add_text(document, page, line, y, font=font)
+        y -= 12
+    return y
+
+
+def create_pdf(kinds) -> bytes:
+    document = pdfium.PdfDocument.new()
+    for index, kind in enumerate(kinds):
+        page = document.new_page(612, 792)
+        if kind == "title":
+            add_text(document, page, "Deep Residual Learning", 740, size=18)
+            add_text(document, page, "1 Introduction", 715, size=13)
+            add_lines(document, page, BODY)
+        elif kind == "text":
+            add_text(document, page, f"{index + 1} Section", 740, size=13)
+            add_lines(document, page, BODY)
+        elif kind == "math":
+            add_lines(document, page, BODY[:2])
+            add_lines(document, page, ["a + b = c", "x < y + z"] * 4, 670, "Symbol")
+        elif kind == "garbled":
+            add_lines(document, page, ["xq zrtk vbnm qwrt plkj hgfd zxcv bnmk"] * 5)
+        elif kind == "scanned":
+            image = pdfium.PdfImage.new(document)
+            image.set_bitmap(
+                pdfium.PdfBitmap.from_pil(Image.new("RGB", (100, 130), "white")),
+                pages=[page],
+            )
+            image.set_matrix(pdfium.PdfMatrix().scale(612, 792))
+            page.insert_obj(image)
+        # Running page number
+        add_text(document, page, str(index + 1), 40)
+        page.gen_content()
+
+    buffer = BytesIO()
+    document.save(buffer)
+    document.close()
+    return buffer.getvalue()
+
+
+def fake_convert_ranges(calls):
+    def convert_ranges(pdf_buffer, page_ranges):
+        calls.append(page_ranges)
+        return [
+            {
+                "markdown": f"Marker pages {page_range}.",
+                "images": {},
+                "metadata": {
+                    "table_of_contents": [],
+                    "page_stats": [{"page_id": page} for page in page_range],
+                },
+            }
+            for page_range in page_ranges
+        ]
+
+    return convert_ranges
+
+
+def test_text_layer_markdown():
+    pages = extract_text_layer(create_pdf(["title", "text"]))
+
+    assert pages[0]["markdown"] == (
+        "## Deep Residual Learning\n\n## 1 Introduction\n\n"
+        + " ".join(BODY).replace("gra- dients", "gradients")
+    )
+    assert [entry["title"] for entry in pages[0]["table_of_contents"]] == [
+        "Deep Residual Learning",
+        "1 Introduction",
+    ]
+    # The page number is dropped
+    assert pages[1]["markdown"].startswith("## 2 Section\n\n")
+    assert not pages[1]["markdown"].endswith("2")
+    assert all(page["quality"] == 1.0 for page in pages)
+    assert all(page["math_density"] == 0.0 for page in pages)
+
+
+def test_text_quality():
+    assert text_quality(" ".join(BODY)) == 1.0
+    assert text_quality("xq zrtk vbnm qwrt plkj") < 0.5
+    assert text_quality("(cid:12)(cid:13) (cid:14) layer") < 0.5
+    assert text_quality("") == 0.0
+
+
+def test_pages_are_routed():
+    calls = []
+    rendered = hybrid_load(
+        create_pdf(["title", "math", "scanned", "text", "garbled", "text"]),
+        convert_ranges=fake_convert_ranges(calls),
+    )
+
+    assert [route["route"] for route in rendered["metadata"]["page_routes"]] == [
+        "text_layer",
+        "math",
+        "scanned",
+        "text_layer",
+        "garbled",
+        "text_layer",
+    ]
+    # Consecutive marker pages are converted in one range
+    assert calls == [[[1, 2], [4]]]
+    markdown = rendered["markdown"]
+    assert markdown.startswith("## Deep Residual Learning\n\n## 1 Introduction\n\n")
+    assert markdown.index("Marker pages [1, 2].") < markdown.index("## 4 Section")
+    assert markdown.index("## 4 Section") < markdown.index("Marker pages [4].")
+    assert markdown.endswith(" ".join(BODY).replace("gra- dients", "gradients"))
+    assert [stats["page_id"] for stats in rendered["metadata"]["page_stats"]] == list(
+        range(6)
+    )
+
+
+def test_born_digital_pdf_skips_marker():
+    calls = []
+    rendered = hybrid_load(
+        BytesIO(create_pdf(["title", "text", "text"])),
+        convert_ranges=fake_convert_ranges(calls),
+    )
+    assert calls == []
+    assert rendered["markdown"].count("## ") == 4
+
+
+def test_marker_api_converts_every_range_in_one_job(monkeypatch):
+    calls = []
+
+    def fake_call_marker_api(pdf_file, paginate=False):
+        document = pdfium.PdfDocument(pdf_file)
+        num_pages = len(document)
+        document.close()
+        calls.append((num_pages, paginate))
+        # Like marker, every page starts with its separator, the sentence of the first page is
+        # continued by the second page
+        page_markdowns = ["Marker page 0 cut", "continued on page 1.", "Marker page 2."]
+        return {
+            "markdown": "".join(
+                f"\n\n{{{page}}}{'-' * 48}\n\n{page_markdowns[page]}"
+                for page in range(num_pages)
+            ),
+            "images": {"_page_2_Figure_0.jpeg": "image"},
+            "metadata": {
+                "table_of_contents": [{"title": "Math", "page_id": 0}],
+                "page_stats": [{"page_id": page} for page in range(num_pages)],
+            },
+        }
+
+    monkeypatch.setattr(hybrid_pdf, "call_marker_api", fake_call_marker_api)
+    rendered = hybrid_load(
+        create_pdf(["title", "math", "scanned", "text", "garbled", "text"]),
+        convert_ranges=hybrid_pdf.get_page_ranges_converter(use_local_marker=False),
+    )
+
+    assert calls == [(3, True)]
+    markdown = rendered["markdown"]
+    assert "Marker page 0 cut continued on page 1.\n\n## 4 Section" in markdown
+    assert markdown.index("## 4 Section") < markdown.index("Marker page 2.")
+    assert "-" * 48 not in markdown
+    assert rendered["images"] == {"_page_2_Figure_0.jpeg": "image"}
+    # Page ids are the pages of the paper
+    assert rendered["metadata"]["table_of_contents"][2] == {
+        "title": "Math",
+        "page_id": 1,
+    }
+    assert [stats["page_id"] for stats in rendered["metadata"]["page_stats"]] == list(
+        range(6)
+    )
@@ -0,0 +1,87 @@
+from io import BytesIO
+import errno
+import os
+import subprocess
+import sys
+
+import pytest
+
+from packages.framework.document_loaders import marker_loader
+from packages.framework.document_loaders.marker_loader import (
+    convert_pdf_buffer,
+    pdf_buffer_path,
+)
+
+# HERE LIES A TEST SCRIPT FOR THE IN-MEMORY PDF HANDOFF TO MARKER
+# Run with: poetry run pytest -s tests/framework/document_loaders/marker_loader.py
+
+PDF = b"%PDF-1.4\n" + os.urandom(1024 * 1024) + b"\n%%EOF"
+
+
+def read_path(pdf_path: str) -> bytes:
+    with open(pdf_path, "rb") as file:
+        return file.read()
+
+
+@pytest.mark.parametrize(
+    "pdf_buffer",
+    [PDF, bytearray(PDF), memoryview(PDF), BytesIO(PDF)],
+    ids=["bytes", "bytearray", "memoryview", "BytesIO"],
+)
+def test_buffers_are_readable_from_the_path(pdf_buffer):
+    assert convert_pdf_buffer(read_path, pdf_buffer) == PDF
+
+
+def test_in_memory_path():
+    with pdf_buffer_path(PDF) as pdf_path:
+        # Nothing is written under the temporary directory on disk
+        assert pdf_path.startswith("/dev/shm/")
+        assert read_path(pdf_path) == PDF
+        # Other processes, e.g. the pdftext workers of marker, read it too
+        completed = subprocess.run(
+            [sys.executable, "-c", f"print(len(open({pdf_path!r}, 'rb').read()))"],
+            capture_output=True,
+            text=True,
+        )
+        assert completed.stdout.strip() == str(len(PDF))
+    assert not os.path.exists(pdf_path)
+
+
+def test_disk_path_is_removed():
+    with pdf_buffer_path(PDF, in_memory=False) as pdf_path:
+        assert pdf_path.endswith(".pdf")
+        assert read_path(pdf_path) == PDF
+    assert not os.path.exists(pdf_path)
+
+
+def test_full_shared_memory_falls_back_to_disk(monkeypatch):
+    shared_memory_files = []
+    write_all = marker_loader._write_all
+
+    def write_all_until_full(fd, view):
+        # Half of the PDF fits in /dev/shm
+        path = os.readlink(f"/proc/self/fd/{fd}")
+        if path.startswith("/dev/shm/"):
+            shared_memory_files.append(path)
+            write_all(fd, view[: len(view) // 2])
+            raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC))
+        write_all(fd, view)
+
+    monkeypatch.setattr(marker_loader, "_write_all", write_all_until_full)
+    with pdf_buffer_path(PDF) as pdf_path:
+        assert not pdf_path.startswith("/dev/shm/")
+        assert read_path(pdf_path) == PDF
+        # The partial file is removed
+        assert len(shared_memory_files) == 1
+        assert not os.path.exists(shared_memory_files[0])
+    assert not os.path.exists(pdf_path)
+
+
+def test_bytes_io_is_released():
+    pdf_buffer = BytesIO(PDF)
+    with pdf_buffer_path(pdf_buffer):
+        # The buffer is viewed in place while it is written
+        pass
+    pdf_buffer.write(b"more")
+    pdf_buffer.seek(0)
+    assert pdf_buffer.read(len(PDF)) == b"more" + PDF[4:]
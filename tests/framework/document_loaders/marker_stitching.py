@@ -0,0 +1,135 @@
+from io import BytesIO
+
+import pypdfium2 as pdfium
+
+from packages.framework.document_loaders.marker_loader.stitching import (
+    count_pdf_pages,
+    heading_levels,
+    split_page_ranges,
+    stitch_markdown,
+)
+from packages.framework.document_loaders.marker_loader.worker_pool import (
+    MarkerWorkerPool,
+)
+
+# HERE LIES A TEST SCRIPT FOR THE PAGE RANGE CONVERSION AND THE MARKDOWN STITCHING
+# The workers load a fake converter rendering each page of a real PDF like marker would
+# Run with: poetry run pytest -s tests/framework/document_loaders/marker_stitching.py
+
+HEADING_HEIGHTS = {"Title": 24, "Section": 16, "Subsection": 12}
+
+
+def create_pdf(num_pages: int) -> bytes:
+    document = pdfium.PdfDocument.new()
+    for _ in range(num_pages):
+        document.new_page(612, 792)
+    buffer = BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def render_page(page: int):
+    # Every page but the first continues the sentence cut by the previous one
+    name = "Title" if page == 0 else ("Section" if page % 2 else "Subsection")
+    title = f"{name} {page}"
+    continued = "and continues.\n\n" if page > 0 else ""
+    markdown = (
+        f"{continued}## {title}\n\nParagraph {page}.\n\nA sentence cut by page {page}"
+    )
+    height = HEADING_HEIGHTS[name]
+    polygon = [[0, 0], [100, 0], [100, height], [0, height]]
+    return markdown, {"title": title, "heading_level": 2, "polygon": polygon}
+
+
+def create_fake_converter():
+    def convert(pdf_path: str, page_range=None):
+        document = pdfium.PdfDocument(pdf_path)
+        pages = list(page_range) if page_range is not None else range(len(document))
+        document.close()
+
+        rendered = [render_page(page) for page in pages]
+        table_of_contents = [entry for _, entry in rendered]
+        markdown = " ".join(page_markdown for page_markdown, _ in rendered)
+        # Like marker, headings are leveled by height when there are more than 4 of them
+        if len(table_of_contents) > 4:
+            levels = heading_levels(
+                [entry["polygon"][2][1] for entry in table_of_contents]
+            )
+            for entry in table_of_contents:
+                level = levels[entry["polygon"][2][1]]
+                markdown = markdown.replace(
+                    f"## {entry['title']}\n", f"{'#' * level} {entry['title']}\n"
+                )
+                entry["heading_level"] = level
+        return {
+            "markdown": markdown,
+            "images": {f"_page_{page}_Picture_0.jpeg": page for page in pages},
+            "metadata": {
+                "table_of_contents": table_of_contents,
+                "page_stats": [{"page_id": page} for page in pages],
+            },
+        }
+
+    return convert
+
+
+def test_split_page_ranges():
+    assert split_page_ranges(10, 4) == [[0, 1, 2, 3], [4, 5, 6], [7, 8, 9]]
+    assert split_page_ranges(3, 8) == [[0, 1, 2]]
+    assert count_pdf_pages(create_pdf(5)) == 5
+    assert count_pdf_pages(BytesIO(create_pdf(2))) == 2
+
+
+def test_tables_are_continued():
+    table = "| Layer | Error |\n|---|---|\n| 1 | 0.1 |"
+    # Marker repeats the header of a table continued on the next range
+    continued = "| Layer | Error |\n|---|---|\n| 2 | 0.2 |\n\nAfter the table."
+    assert stitch_markdown([f"Text.\n\n{table}", continued]) == (
+        f"Text.\n\n{table}\n| 2 | 0.2 |\n\nAfter the table."
+    )
+
+    # Without a repeated header the first row is data
+    continued = "| 2 | 0.2 |\n|---|---|\n| 3 | 0.3 |"
+    assert stitch_markdown([table, continued]) == f"{table}\n| 2 | 0.2 |\n| 3 | 0.3 |"
+
+    # Another table is kept apart
+    other = "| a | b | c |\n|---|---|---|\n| 1 | 2 | 3 |"
+    assert stitch_markdown([table, other]) == f"{table}\n\n{other}"
+
+
+def test_paragraphs_are_continued():
+    assert stitch_markdown(["A sentence cut", "in two."]) == "A sentence cut in two."
+    assert stitch_markdown(["A sentence.", "next one."]) == "A sentence.\n\nnext one."
+    assert stitch_markdown(["## Heading", "lowercase text"]) == (
+        "## Heading\n\nlowercase text"
+    )
+    assert stitch_markdown(["", "Text.", "  "]) == "Text."
+
+
+def test_page_ranges_match_a_single_conversion():
+    pdf = create_pdf(12)
+    with MarkerWorkerPool(
+        num_workers=2, converter_factory=create_fake_converter
+    ) as pool:
+        whole = pool.convert(pdf)
+        stitched = pool.convert_pages(pdf, pages_per_range=3)
+        # A PDF of a single range is converted in one piece
+        short_pdf = create_pdf(2)
+        assert pool.convert_pages(short_pdf, pages_per_range=3) == pool.convert(
+            short_pdf
+        )
+        stats = pool.stats()
+
+    # Ranges of 3 pages only have the default heading level, it is recomputed over the PDF
+    assert "# Title 0\n" in whole["markdown"]
+    assert "### Subsection 2\n" in whole["markdown"]
+    assert stitched["markdown"] == whole["markdown"]
+    assert [
+        entry["heading_level"] for entry in stitched["metadata"]["table_of_contents"]
+    ] == [entry["heading_level"] for entry in whole["metadata"]["table_of_contents"]]
+    assert stitched["images"] == whole["images"]
+    assert stitched["metadata"]["page_ranges"] == 4
+
+    assert stats["page_ranges"] == 4
+    assert stats["documents"] == 4
+    assert stats["pages"] == 12 + 12 + 2 + 2
@@ -0,0 +1,112 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from packages.framework.document_loaders.marker_loader import marker_load
+from packages.framework.document_loaders.marker_loader.worker_pool import (
+    MarkerWorkerPool,
+)
+
+# HERE LIES A TEST SCRIPT FOR THE MARKER WORKER POOL, THE WORKERS LOAD A FAKE CONVERTER INSTEAD OF THE MARKER MODELS
+# Run with: poetry run pytest -s tests/framework/document_loaders/marker_worker_pool.py
+
+MODEL_LOAD_SECONDS = 0.3
+
+
+def create_fake_converter():
+    # Loading the models, once per worker process
+    time.sleep(MODEL_LOAD_SECONDS)
+
+    def convert(pdf_path: str):
+        with open(pdf_path, "rb") as file:
+            content = file.read()
+        if content == b"crash":
+            os._exit(1)
+        if content == b"fail":
+            raise ValueError("unreadable PDF")
+        pages = int(content.decode())
+        return {
+            "markdown": f"# Paper of {pages} pages",
+            "images": {},
+            "metadata": {"page_stats": [{}] * pages, "pid": os.getpid()},
+        }
+
+    return convert
+
+
+def worker_pids(results):
+    return {result["metadata"]["pid"] for result in results}
+
+
+def test_models_are_loaded_once_per_worker():
+    with MarkerWorkerPool(
+        num_workers=2, converter_factory=create_fake_converter
+    ) as pool:
+        futures = [pool.submit(str(pages).encode()) for pages in range(1, 9)]
+        results = [future.result() for future in futures]
+
+        assert [result["markdown"] for result in results] == [
+            f"# Paper of {pages} pages" for pages in range(1, 9)
+        ]
+        # Eight PDFs are converted by the two warm workers, without loading the models again
+        assert len(worker_pids(results)) <= 2
+        # Warm pools convert through marker_load too
+        assert marker_load(b"3", pool=pool)["markdown"] == "# Paper of 3 pages"
+
+        stats = pool.stats()
+    assert stats["documents"] == 9
+    assert stats["pages"] == sum(range(1, 9)) + 3
+    assert stats["failures"] == 0
+    assert stats["recycled_workers"] == 0
+    assert stats["model_load_seconds"] < MODEL_LOAD_SECONDS * 3
+    assert stats["documents_per_minute"] > 0
+    assert stats["pages_per_minute"] > stats["documents_per_minute"]
+
+
+def test_workers_are_recycled():
+    # A fresh worker after every two PDFs
+    with MarkerWorkerPool(
+        max_documents_per_worker=2, converter_factory=create_fake_converter
+    ) as pool:
+        results = [pool.convert(b"1") for _ in range(5)]
+        assert len(worker_pids(results)) == 3
+        assert pool.stats()["recycled_workers"] == 2
+
+    # Every worker grows past a 1MB peak RSS, a fresh worker for every PDF
+    with MarkerWorkerPool(
+        max_worker_rss_mb=1, converter_factory=create_fake_converter
+    ) as pool:
+        results = [pool.convert(b"1") for _ in range(3)]
+        assert len(worker_pids(results)) == 3
+        assert pool.stats()["recycled_workers"] == 3
+
+
+def test_failures_do_not_stop_the_pool():
+    with MarkerWorkerPool(converter_factory=create_fake_converter) as pool:
+        with pytest.raises(RuntimeError, match="unreadable PDF"):
+            pool.convert(b"fail")
+        # The worker dies mid-conversion, the next PDF goes to a new one
+        with pytest.raises(RuntimeError, match="exited with code 1"):
+            pool.convert(b"crash")
+        assert pool.convert(b"2")["markdown"] == "# Paper of 2 pages"
+
+        stats = pool.stats()
+    assert stats["failures"] == 2
+    assert stats["documents"] == 1
+
+    with pytest.raises(RuntimeError, match="closed"):
+        pool.submit(b"1")
+
+
+def test_async_conversions():
+    async def convert_all(pool):
+        return await asyncio.gather(*(pool.aconvert(b"1") for _ in range(4)))
+
+    with MarkerWorkerPool(
+        num_workers=2, converter_factory=create_fake_converter
+    ) as pool:
+        results = asyncio.run(convert_all(pool))
+    assert len(results) == 4
+    assert len(worker_pids(results)) <= 2
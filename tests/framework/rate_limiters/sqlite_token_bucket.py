@@ -0,0 +1,119 @@
+import asyncio
+import multiprocessing
+import sqlite3
+import time
+
+from langchain_core.language_models import FakeListChatModel
+
+from packages.framework.rate_limiters.sqlite_token_bucket import (
+    SQLiteTokenBucketRateLimiter,
+    get_rate_limiter,
+    rate_limited_tokens,
+)
+
+# HERE LIES A TEST SCRIPT FOR THE PROCESS-SHARED TOKEN BUCKET RATE LIMITER
+# Run with: poetry run pytest -s tests/framework/rate_limiters/sqlite_token_bucket.py
+
+# 20 requests per second with a bucket of a single request
+REQUESTS_PER_MINUTE = 1200
+BURST_SECONDS = 0.05
+
+
+def create_limiter(database_path: str, **kwargs) -> SQLiteTokenBucketRateLimiter:
+    return SQLiteTokenBucketRateLimiter(
+        database_path, "model", burst_seconds=BURST_SECONDS, **kwargs
+    )
+
+
+def test_requests_per_minute(tmp_path):
+    limiter = create_limiter(
+        str(tmp_path / "limits.sqlite"), requests_per_minute=REQUESTS_PER_MINUTE
+    )
+    model = FakeListChatModel(responses=["answer"] * 11, rate_limiter=limiter)
+
+    start = time.perf_counter()
+    for _ in range(11):
+        model.invoke("prompt")
+    # The first request uses the full bucket, the next 10 wait 1/20s each
+    assert time.perf_counter() - start >= 0.45
+
+    stats = limiter.stats()
+    assert stats["acquired"] == 11
+    assert stats["waited"] >= 9
+    assert stats["wait_seconds"] >= 0.4
+    assert not limiter.acquire(blocking=False)
+
+
+def test_tokens_per_minute(tmp_path):
+    # 1000 tokens per second, 50 tokens bucket
+    limiter = create_limiter(str(tmp_path / "limits.sqlite"), tokens_per_minute=60000)
+
+    async def acquire_all():
+        for _ in range(5):
+            with rate_limited_tokens(50):
+                await limiter.aacquire()
+
+    start = time.perf_counter()
+    asyncio.run(acquire_all())
+    assert time.perf_counter() - start >= 0.18
+
+
+def test_async_acquire_does_not_block_the_event_loop(tmp_path):
+    database_path = str(tmp_path / "limits.sqlite")
+    limiter = create_limiter(
+        database_path, requests_per_minute=REQUESTS_PER_MINUTE, timeout=1.0
+    )
+
+    async def acquire_while_locked():
+        # Another process holds the write lock of the buckets
+        writer = sqlite3.connect(database_path, isolation_level=None)
+        writer.execute("BEGIN IMMEDIATE")
+        acquisition = asyncio.create_task(limiter.aacquire())
+        start = time.perf_counter()
+        await asyncio.sleep(0.05)
+        slept_seconds = time.perf_counter() - start
+        writer.execute("ROLLBACK")
+        writer.close()
+        return slept_seconds, await acquisition
+
+    slept_seconds, acquired = asyncio.run(acquire_while_locked())
+    assert acquired
+    assert slept_seconds < 0.5
+
+
+def acquire_in_process(database_path: str, acquisitions: int):
+    limiter = create_limiter(database_path, requests_per_minute=REQUESTS_PER_MINUTE)
+    for _ in range(acquisitions):
+        limiter.acquire()
+
+
+def test_limit_is_shared_across_processes(tmp_path):
+    database_path = str(tmp_path / "limits.sqlite")
+    create_limiter(database_path, requests_per_minute=REQUESTS_PER_MINUTE)
+
+    start = time.perf_counter()
+    processes = [
+        multiprocessing.Process(target=acquire_in_process, args=(database_path, 5))
+        for _ in range(2)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    # 10 requests from both processes at 20 per second
+    assert time.perf_counter() - start >= 0.4
+    stats = create_limiter(database_path).stats()
+    assert stats["acquired"] == 10
+    assert stats["waited"] > 0
+
+
+def test_get_rate_limiter_takes_new_rates(tmp_path):
+    database_path = str(tmp_path / "limits.sqlite")
+    limiter = get_rate_limiter(database_path, "model", requests_per_minute=60)
+
+    # The buckets are shared, the latest rates apply to them
+    assert get_rate_limiter(database_path, "model", requests_per_minute=60) is limiter
+    assert get_rate_limiter(database_path, "model", tokens_per_minute=1000) is limiter
+    assert limiter.requests_per_minute is None
+    assert limiter.tokens_per_minute == 1000
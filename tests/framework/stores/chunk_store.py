@@ -0,0 +1,54 @@
+import pytest
+
+from packages.framework.stores.chunk_store import ChunkStore
+
+# HERE LIES A TEST SCRIPT FOR THE CONTENT-ADDRESSED CHUNK STORE
+# Run with: poetry run pytest -s tests/framework/stores/chunk_store.py
+
+
+def test_identical_contents_are_stored_once():
+    store = ChunkStore()
+    first_digest = store.put("chunk-1", "same text")
+    second_digest = store.put("chunk-2", "same text")
+
+    assert first_digest == second_digest
+    assert store.get("chunk-2") == "same text"
+    assert len(store) == 2
+    assert store.memory_bytes == len("same text")
+
+    with pytest.raises(KeyError):
+        store.get("unknown")
+
+
+def test_spill_to_disk(tmp_path):
+    store = ChunkStore(spill_directory=str(tmp_path), max_memory_bytes=10)
+    for i in range(5):
+        store.put(f"chunk-{i}", f"content number {i}")
+
+    # Every text is larger than the memory budget, they are read back from disk
+    assert store.memory_bytes == 0
+    assert [store.get(f"chunk-{i}") for i in range(5)] == [
+        f"content number {i}" for i in range(5)
+    ]
+
+
+def test_reopen_spilled_store(tmp_path):
+    store = ChunkStore(spill_directory=str(tmp_path), max_memory_bytes=0)
+    store.put("chunk-1", "persisted text")
+
+    # A new process resolves the chunks of the previous one
+    reopened = ChunkStore(spill_directory=str(tmp_path))
+    assert "chunk-1" in reopened
+    assert reopened.get("chunk-1") == "persisted text"
+
+
+def test_durable_texts_outlive_the_process(tmp_path):
+    store = ChunkStore(spill_directory=str(tmp_path))
+    store.put("chunk-1", "durable text", durable=True)
+    store.put("chunk-2", "memory text")
+
+    # Durable texts are on disk and still read from memory
+    assert store.memory_bytes == len("durable text") + len("memory text")
+    reopened = ChunkStore(spill_directory=str(tmp_path))
+    assert reopened.get("chunk-1") == "durable text"
+    assert "chunk-2" not in reopened
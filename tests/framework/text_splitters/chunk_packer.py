@@ -0,0 +1,46 @@
+from packages.framework.text_splitters.chunk_packer import pack_chunks
+from packages.framework.utils.estimate_tokens import estimate_tokens
+
+# HERE LIES A TEST SCRIPT FOR THE TOKEN BUDGET CHUNK PACKER
+# Run with: poetry run pytest -s tests/framework/text_splitters/chunk_packer.py
+
+
+def section(name: str, tokens: int) -> str:
+    # About `tokens` tokens with the offline estimate
+    header = f"# {name}\n\n"
+    return header + "x" * (tokens * 4 - len(header))
+
+
+def test_sections_are_packed_up_to_the_budget():
+    sections = [section(f"Section {i}", 300) for i in range(10)]
+    packed = pack_chunks(sections, token_budget=1000)
+
+    # Three sections and two separators fit in 1000 tokens, a fourth one does not
+    assert len(packed) == 4
+    assert all(estimate_tokens(chunk) <= 1000 for chunk in packed)
+    assert "\n\n".join(packed) == "\n\n".join(sections)
+
+
+def test_sections_are_never_cut():
+    sections = [section("Small", 100), section("Large", 3000), section("End", 100)]
+    assert pack_chunks(sections, token_budget=1000) == sections
+
+
+def test_short_sections_are_merged():
+    title = "# Title"
+    caption = "#### Figure 1\n\nCaption."
+    sections = [title, section("Intro", 900), section("Methods", 900), caption]
+    packed = pack_chunks(sections, token_budget=1000, min_tokens=125)
+
+    # The title goes with the next section past the budget, the last caption with the previous one
+    assert packed == [
+        f"{title}\n\n{sections[1]}",
+        f"{sections[2]}\n\n{caption}",
+    ]
+
+
+def test_without_budget_only_short_sections_are_merged():
+    sections = ["# Title", section("Intro", 200), section("Methods", 200)]
+    packed = pack_chunks(sections, token_budget=None, min_tokens=125)
+    assert packed == [f"{sections[0]}\n\n{sections[1]}", sections[2]]
+    assert pack_chunks([], token_budget=1000) == []
@@ -0,0 +1,128 @@
+import random
+
+import pytest
+
+from packages.framework.text_splitters.markdown import (
+    iter_markdown_chunks,
+    markdown_text_split,
+    split_markdown_by_headers,
+)
+
+# HERE LIES A TEST SCRIPT FOR THE SINGLE-PASS MARKDOWN SPLITTER
+# Run with: poetry run pytest -s tests/framework/text_splitters/markdown.py
+
+PAPER = """Preamble before the first header
+
+# Title
+
+Intro text.
+
+```python
+# not a header
+def f():
+    return 1
+```
+
+## Methods
+
+$$
+# not a header either
+x = \\frac{1}{2}
+$$
+
+Inline $$x$$ math.
+
+~~~~
+```
+# still code, the fence is closed by ~~~~ only
+~~~~
+
+### Details
+
+Details text.
+
+# Results
+
+The end."""
+
+
+def test_sections_respect_fences():
+    chunks = list(iter_markdown_chunks(PAPER))
+
+    assert [chunk["headers"] for chunk in chunks] == [
+        ["# Title"],
+        ["# Title", "## Methods"],
+        ["# Title", "## Methods", "### Details"],
+        ["# Results"],
+    ]
+    assert "# not a header\n" in chunks[0]["text"]
+    assert "# not a header either" in chunks[1]["text"]
+    assert "# still code" in chunks[1]["text"]
+
+    # Chunks are slices of the input, stripped, preamble excluded
+    for chunk in chunks:
+        assert PAPER[chunk["start"] : chunk["end"]] == chunk["text"]
+        assert chunk["text"] == chunk["text"].strip()
+    assert chunks[0]["text"].startswith("# Title")
+
+    assert markdown_text_split(PAPER) == [chunk["text"] for chunk in chunks]
+    assert split_markdown_by_headers(PAPER)[1] == ("## Methods", chunks[1]["text"])
+
+
+def test_chunks_are_lazy():
+    chunks = iter_markdown_chunks("# One\n\ntext\n\n# Two\n\n```\n# Three")
+    assert next(chunks)["text"] == "# One\n\ntext"
+    # An unclosed fence runs to the end of the content
+    assert next(chunks)["text"] == "# Two\n\n```\n# Three"
+    with pytest.raises(StopIteration):
+        next(chunks)
+
+
+def test_unclosed_math_stops_at_blank_lines():
+    # A $$ that is never closed is not a block running to the end of the paper
+    chunks = markdown_text_split("# A\n\n$$ price is high\n\n# B\n\ntext")
+    assert chunks == ["# A\n\n$$ price is high", "# B\n\ntext"]
+    chunks = markdown_text_split("# A\n\n$$\nx = 1\n# B\n\ntext")
+    assert chunks == ["# A\n\n$$\nx = 1", "# B\n\ntext"]
+
+
+def test_oversized_sections_keep_fenced_blocks_whole():
+    code = "```\n" + "\n\n".join(f"line {i}" for i in range(20)) + "\n```"
+    section = "# Section\n\n" + "word " * 30 + "\n\n" + code + "\n\n" + "end " * 30
+    chunks = list(iter_markdown_chunks(section, chunk_size=len(code) + 10))
+
+    # Blank lines inside the fence are not cut points, the block stays in one chunk
+    assert code in [chunk["text"] for chunk in chunks]
+    assert all(len(chunk["text"]) <= len(code) + 10 for chunk in chunks)
+
+
+@pytest.mark.parametrize("chunk_overlap", [0, 50])
+def test_oversized_sections_offsets(chunk_overlap):
+    rng = random.Random(chunk_overlap)
+    words = ["protein", "layer", "model", "cell", "signal"]
+    paper = "\n\n".join(
+        f"{'#' * rng.randint(1, 3)} Section {i}\n\n"
+        + "\n".join(
+            " ".join(rng.choice(words) for _ in range(rng.randint(1, 80)))
+            for _ in range(rng.randint(1, 30))
+        )
+        for i in range(50)
+    )
+    chunks = list(
+        iter_markdown_chunks(paper, chunk_size=500, chunk_overlap=chunk_overlap)
+    )
+
+    previous_end = 0
+    for chunk in chunks:
+        assert paper[chunk["start"] : chunk["end"]] == chunk["text"]
+        assert 0 < len(chunk["text"]) <= 500
+        assert chunk["start"] > previous_end - chunk_overlap - 1
+        previous_end = chunk["end"]
+
+    # Overlapping chunks always move forward, no chunk is a part of the previous one
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk["end"] > previous["end"]
+
+    # Without overlap, the chunks hold every word of the paper
+    if not chunk_overlap:
+        assert " ".join(c["text"] for c in chunks).split() == paper.split()
@@ -0,0 +1,207 @@
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+import asyncio
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+import pytest
+
+from packages.framework.utils.retry_policy import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    default_retry_on,
+)
+from packages.framework.utils.with_retries import with_retries
+from packages.workflows.paper_scanner.v0 import prepare_agent_run
+from packages.workflows.paper_scanner.v0.agent import build_paper_summarization_agent
+from tests.utils.fake_call_llm import create_fake_call_llm, patch_call_llm
+
+# HERE LIES A TEST SCRIPT FOR THE THREAD AND ASYNC SAFE RETRY POLICY
+# Run with: poetry run pytest -s tests/framework/utils/retry_policy.py
+
+
+class ServiceUnavailable(Exception):
+    code = 503
+
+
+def create_flaky(failures: int, error=ServiceUnavailable, delay: float = 0):
+    def flaky():
+        flaky.calls += 1
+        time.sleep(delay)
+        if flaky.calls <= failures:
+            raise error("flaky")
+        return "ok"
+
+    flaky.calls = 0
+    return flaky
+
+
+def test_classification():
+    assert default_retry_on(ServiceUnavailable())
+    assert default_retry_on(TimeoutError())
+    assert not default_retry_on(ValueError())
+
+    # Fatal errors are raised at once
+    flaky = create_flaky(1, error=ValueError)
+    with pytest.raises(ValueError):
+        RetryPolicy(initial_interval=0).call(flaky)
+    assert flaky.calls == 1
+
+    flaky = create_flaky(2)
+    assert RetryPolicy(initial_interval=0).call(flaky) == "ok"
+    assert flaky.calls == 3
+
+
+def test_jittered_backoff():
+    policy = RetryPolicy(initial_interval=1, backoff_factor=2, max_interval=5)
+    for attempt, interval in enumerate([1, 2, 4, 5, 5]):
+        assert all(0 <= policy.backoff(attempt) <= interval for _ in range(50))
+    assert RetryPolicy(initial_interval=1, jitter=False).backoff(2) == 4
+
+
+def test_timeouts_from_worker_threads():
+    # signal.alarm only works on the main thread, attempts time out from any thread here
+    policy = RetryPolicy(max_attempts=2, initial_interval=0, attempt_timeout=0.1)
+
+    def call(_):
+        flaky = create_flaky(0, delay=0.3)
+        with pytest.raises(TimeoutError):
+            policy.call(flaky)
+        return flaky.calls
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert list(executor.map(call, range(4))) == [2] * 4
+    assert time.perf_counter() - start < 0.6
+
+
+def test_total_deadline():
+    policy = RetryPolicy(
+        max_attempts=100, initial_interval=0.05, jitter=False, deadline=0.3
+    )
+    flaky = create_flaky(100, delay=0.05)
+
+    start = time.perf_counter()
+    # Either the last error, or a timeout when the deadline falls within an attempt
+    with pytest.raises((ServiceUnavailable, TimeoutError)):
+        policy.call(flaky)
+    assert time.perf_counter() - start < 0.4
+    assert flaky.calls < 10
+
+
+def test_async():
+    policy = RetryPolicy(max_attempts=3, initial_interval=0, attempt_timeout=0.1)
+
+    async def slow_then_fast():
+        slow_then_fast.calls += 1
+        await asyncio.sleep(0.3 if slow_then_fast.calls == 1 else 0)
+        return "ok"
+
+    slow_then_fast.calls = 0
+    assert asyncio.run(policy.wrap(slow_then_fast)()) == "ok"
+    assert slow_then_fast.calls == 2
+
+
+def test_circuit_breaker():
+    breaker = CircuitBreaker("endpoint", failure_threshold=3, reset_seconds=0.2)
+    policy = RetryPolicy(max_attempts=10, initial_interval=0, circuit_breaker=breaker)
+
+    # The circuit opens after 3 failures and stops the retries
+    flaky = create_flaky(100)
+    with pytest.raises(CircuitOpenError):
+        policy.call(flaky)
+    assert flaky.calls == 3
+    assert breaker.is_open
+
+    # Other callers of the endpoint fail fast
+    other = create_flaky(0)
+    with pytest.raises(CircuitOpenError):
+        RetryPolicy(circuit_breaker=breaker).call(other)
+    assert other.calls == 0
+
+    # After the reset delay a trial call closes it again
+    time.sleep(0.2)
+    assert policy.call(other) == "ok"
+    assert not breaker.is_open
+
+
+def test_circuit_breaker_trials_end():
+    breaker = CircuitBreaker("trials", failure_threshold=1, reset_seconds=0)
+
+    def open_circuit():
+        with pytest.raises(ServiceUnavailable):
+            RetryPolicy(max_attempts=1, circuit_breaker=breaker).call(create_flaky(1))
+        assert breaker.is_open
+
+    # An interrupted trial lets the next call try again
+    def interrupted():
+        raise KeyboardInterrupt()
+
+    open_circuit()
+    with pytest.raises(KeyboardInterrupt):
+        RetryPolicy(circuit_breaker=breaker).call(interrupted)
+    assert RetryPolicy(circuit_breaker=breaker).call(create_flaky(0)) == "ok"
+    assert not breaker.is_open
+
+    # So does a cancelled async trial
+    async def cancelled():
+        raise asyncio.CancelledError()
+
+    open_circuit()
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(RetryPolicy(circuit_breaker=breaker).acall(cancelled))
+    assert RetryPolicy(circuit_breaker=breaker).call(create_flaky(0)) == "ok"
+
+    # A non-retryable error is an answer of the endpoint, it closes the circuit
+    open_circuit()
+    with pytest.raises(ValueError):
+        RetryPolicy(circuit_breaker=breaker).call(create_flaky(1, error=ValueError))
+    assert not breaker.is_open
+
+
+def test_with_retries_raises():
+    flaky = create_flaky(1, error=ValueError)
+    assert with_retries(max_retries=2)(flaky)() == "ok"
+
+    flaky = create_flaky(5, error=ValueError)
+    with pytest.raises(ValueError):
+        with_retries(max_retries=2)(flaky)()
+
+
+def test_node_retry_policy(monkeypatch):
+    patch_call_llm(monkeypatch, latency=0)
+
+    # The finding creator fails once per call with a retryable error
+    fake_call_llm = create_fake_call_llm(latency=0)
+    attempts = {}
+
+    def flaky_call_llm(prompt_template, input_parameters, pydantic_object, llm=None):
+        key = input_parameters["title"]
+        attempts[key] = attempts.get(key, 0) + 1
+        if attempts[key] == 1:
+            raise ServiceUnavailable("overloaded")
+        return fake_call_llm(prompt_template, input_parameters, pydantic_object)
+
+    creation = importlib.import_module(
+        "packages.workflows.paper_scanner.v0.agent.nodes.finding.creation"
+    )
+    monkeypatch.setattr(creation, "call_llm", flaky_call_llm)
+
+    markdown = "\n\n".join(f"# Section {i}\n\n" + "Text. " * 50 for i in range(3))
+    _, agent_input, agent_config = prepare_agent_run(markdown)
+
+    agent = build_paper_summarization_agent(
+        retry_policies={"finding_creator": RetryPolicy(initial_interval=0)}
+    )
+    result = agent.invoke(agent_input, agent_config)
+    assert len(result["findings"]) == len(attempts) > 0
+    assert all(count == 2 for count in attempts.values())
+
+    # Without a policy the error stops the run
+    attempts.clear()
+    with pytest.raises(ServiceUnavailable):
+        build_paper_summarization_agent().invoke(agent_input, agent_config)
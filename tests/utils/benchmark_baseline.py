@@ -0,0 +1,69 @@
+import json
+import os
+import time
+from typing import Callable, Dict, Optional
+
+# HERE LIES A HELPER COMPARING BENCHMARK TIMINGS AGAINST STORED BASELINES
+# Timings are divided by the time of a fixed CPU workload measured in the same process, so baselines
+# recorded on one machine stay meaningful on another. A metric regresses when it gets slower than
+# baseline * BENCHMARK_REGRESSION_THRESHOLD. Missing metrics are added to the baseline file, set
+# BENCHMARK_UPDATE_BASELINE=1 to overwrite existing ones after an intended change.
+# ----------------------------
+
+REGRESSION_THRESHOLD = float(os.getenv("BENCHMARK_REGRESSION_THRESHOLD", 1.5))
+UPDATE_BASELINE = os.getenv("BENCHMARK_UPDATE_BASELINE") == "1"
+
+_calibration_seconds: Optional[float] = None
+
+
+def best_time(func: Callable[[], object], repeats: int = 3) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def calibration_seconds() -> float:
+    # Dict, string and list work, close to what the graph reducers and splitters do
+    global _calibration_seconds
+    if _calibration_seconds is None:
+
+        def workload():
+            items = {}
+            for i in range(200_000):
+                items[f"key-{i}"] = [i, str(i)]
+            return sorted(items, reverse=True)
+
+        _calibration_seconds = best_time(workload, repeats=5)
+    return _calibration_seconds
+
+
+def load_baseline(path: str) -> Dict[str, float]:
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def check_baseline(path: str, name: str, seconds: float) -> float:
+    """Compares a timing with its baseline and returns the ratio, raises AssertionError on regression."""
+    normalized = seconds / calibration_seconds()
+    baseline = load_baseline(path)
+
+    if name not in baseline or UPDATE_BASELINE:
+        baseline[name] = round(normalized, 4)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(dict(sorted(baseline.items())), file, indent=2)
+            file.write("\n")
+        return 1.0
+
+    ratio = normalized / baseline[name]
+    assert ratio <= REGRESSION_THRESHOLD, (
+        f"{name} regressed: {ratio:.2f}x its baseline "
+        f"(threshold {REGRESSION_THRESHOLD}x, {seconds * 1000:.1f}ms)"
+    )
+    return ratio
@@ -0,0 +1,122 @@
+import asyncio
+import hashlib
+import importlib
+import re
+import time
+
+from packages.workflows.paper_scanner.v0.utils.call_llm import llm_call_slot
+from packages.workflows.paper_scanner.v0.agent.schemas.format_instructions import (
+    ChunkProcessorAnalysis,
+    FindingsBatch,
+    FindingsConsolidator,
+    FindingUpdate,
+    NewFinding,
+)
+
+# HERE LIES A STAND-IN FOR call_llm THAT RETURNS SCHEMA-VALID OUTPUTS AFTER A FIXED LATENCY
+# Patch it into the node modules to run the whole graph offline
+# ----------------------------
+
+NODE_MODULES = [
+    "packages.workflows.paper_scanner.v0.agent.nodes.chunk.processing",
+    "packages.workflows.paper_scanner.v0.agent.nodes.finding.creation",
+    "packages.workflows.paper_scanner.v0.agent.nodes.finding.update",
+    "packages.workflows.paper_scanner.v0.agent.nodes.finding.batch",
+    "packages.workflows.paper_scanner.v0.agent.nodes.finding.consolidation",
+]
+
+
+def create_fake_output(input_parameters, pydantic_object):
+    params = input_parameters or {}
+
+    if pydantic_object is ChunkProcessorAnalysis:
+        # One new finding per chunk, named after the chunk content
+        digest = hashlib.sha1(params["text"].encode()).hexdigest()[:8]
+        return {
+            "findings": {
+                "reasoning": "fake",
+                "findings_updates": [],
+                "new_findings": [
+                    {"title": f"Finding {digest}", "description": "fake finding"}
+                ],
+            },
+            "metadata": {
+                "reasoning": "fake",
+                "title": None,
+                "authors": None,
+                "publication_date": None,
+                "abstract": None,
+            },
+        }
+    if pydantic_object is NewFinding:
+        return {
+            "title": params["title"],
+            "summary": params["description"],
+            "methodology": "fake methodology",
+        }
+    if pydantic_object is FindingUpdate:
+        return {"title": None, "summary": None, "methodology": None}
+    if pydantic_object is FindingsBatch:
+        # One result per requested key, new findings keep their requested title
+        return {
+            "new_findings": [
+                {
+                    "key": key,
+                    "title": title,
+                    "summary": description,
+                    "methodology": "fake methodology",
+                }
+                for key, title, description in re.findall(
+                    r"Key: (new-\d+)\nTitle: (.*)\nSubject: (.*)\n",
+                    params["new_findings"],
+                )
+            ],
+            "findings_updates": [
+                {"key": key, "title": None, "summary": None, "methodology": None}
+                for key in re.findall(r"Key: (update-\d+)\n", params["findings_updates"])
+            ],
+        }
+    if pydantic_object is FindingsConsolidator:
+        return {"findings": []}
+
+    raise ValueError(f"Unexpected pydantic object {pydantic_object}")
+
+
+def create_fake_call_llm(latency: float = 0.05):
+    def fake_call_llm(prompt_template, input_parameters, pydantic_object, llm=None):
+        time.sleep(latency)
+        return create_fake_output(input_parameters, pydantic_object)
+
+    return fake_call_llm
+
+
+def create_fake_acall_llm(latency: float = 0.05):
+    async def fake_acall_llm(
+        prompt_template, input_parameters, pydantic_object, llm=None
+    ):
+        # Honour the shared LLM budget like acall_llm does
+        async with llm_call_slot():
+            fake_acall_llm.in_flight += 1
+            fake_acall_llm.max_in_flight = max(
+                fake_acall_llm.max_in_flight, fake_acall_llm.in_flight
+            )
+            try:
+                await asyncio.sleep(latency)
+            finally:
+                fake_acall_llm.in_flight -= 1
+        return create_fake_output(input_parameters, pydantic_object)
+
+    fake_acall_llm.in_flight = 0
+    fake_acall_llm.max_in_flight = 0
+    return fake_acall_llm
+
+
+def patch_call_llm(monkeypatch, latency: float = 0.05):
+    fake_call_llm = create_fake_call_llm(latency)
+    fake_acall_llm = create_fake_acall_llm(latency)
+    for module in NODE_MODULES:
+        # Resolve the module explicitly, "paper_scanner" is shadowed by the versions registry
+        node_module = importlib.import_module(module)
+        monkeypatch.setattr(node_module, "call_llm", fake_call_llm)
+        monkeypatch.setattr(node_module, "acall_llm", fake_acall_llm)
+    return fake_call_llm, fake_acall_llm
@@ -0,0 +1,144 @@
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+import asyncio
+import importlib
+import threading
+
+from packages.workflows.paper_scanner.v0.agent.nodes.finding.consolidation import (
+    afindings_consolidator,
+    findings_consolidator,
+)
+
+# HERE LIES A TEST SCRIPT FOR THE TREE-REDUCE CONSOLIDATION, IT RUNS OFFLINE WITH A FAKE LLM THAT MERGES FINDINGS IN PAIRS
+# Run with: poetry run pytest -s tests/workflows/findings_consolidation.py
+
+GROUP_SIZE = 10
+
+consolidation = importlib.import_module(
+    "packages.workflows.paper_scanner.v0.agent.nodes.finding.consolidation"
+)
+
+
+def create_state(num_findings: int):
+    return {
+        "findings": [
+            {
+                "id": str(i),
+                "title": f"Finding {i}",
+                "summary": f"Summary {i}",
+                "methodology": f"Methodology {i}",
+                "keywords": [],
+                "source_chunks_ids": [],
+            }
+            for i in range(num_findings)
+        ]
+    }
+
+
+def merge_in_pairs(input_parameters):
+    titles = [
+        line[len("Title: ") :]
+        for line in input_parameters["findings"].splitlines()
+        if line.startswith("Title: ")
+    ]
+    return {
+        "findings": [
+            {
+                "title": " + ".join(titles[i : i + 2]),
+                "summary": "merged",
+                "methodology": "merged",
+                "keywords": ["merged"],
+            }
+            for i in range(0, len(titles), 2)
+        ]
+    }
+
+
+def patch_consolidation_llm(monkeypatch):
+    calls = []
+    lock = threading.Lock()
+
+    def fake_call_llm(prompt_template, input_parameters, pydantic_object, llm=None):
+        with lock:
+            calls.append(input_parameters["findings"].count("Title: "))
+        return merge_in_pairs(input_parameters)
+
+    async def fake_acall_llm(
+        prompt_template, input_parameters, pydantic_object, llm=None
+    ):
+        return fake_call_llm(prompt_template, input_parameters, pydantic_object)
+
+    monkeypatch.setattr(consolidation, "call_llm", fake_call_llm)
+    monkeypatch.setattr(consolidation, "acall_llm", fake_acall_llm)
+    return calls
+
+
+def test_small_findings_use_single_call(monkeypatch):
+    calls = patch_consolidation_llm(monkeypatch)
+    config = {"configurable": {"consolidation_group_size": GROUP_SIZE}}
+
+    state = findings_consolidator(create_state(GROUP_SIZE), config)
+
+    assert calls == [GROUP_SIZE]
+    assert len(state["consolidated_findings"]) == GROUP_SIZE // 2
+
+
+def test_large_findings_are_tree_reduced(monkeypatch):
+    calls = patch_consolidation_llm(monkeypatch)
+    config = {"configurable": {"consolidation_group_size": GROUP_SIZE}}
+
+    state = findings_consolidator(create_state(85), config)
+
+    # No call receives more findings than the group size
+    assert max(calls) <= GROUP_SIZE
+    # Levels: 85 findings in 9 groups -> 45, 5 groups -> 25, 3 groups -> 13, 2 groups -> 7, then a final call
+    assert len(calls) == 9 + 5 + 3 + 2 + 1
+    assert len(state["consolidated_findings"]) == 4
+    assert all("id" in finding for finding in state["consolidated_findings"])
+
+
+def test_async_tree_reduce(monkeypatch):
+    calls = patch_consolidation_llm(monkeypatch)
+    config = {"configurable": {"consolidation_group_size": GROUP_SIZE}}
+
+    state = asyncio.run(afindings_consolidator(create_state(85), config))
+
+    assert max(calls) <= GROUP_SIZE
+    assert len(state["consolidated_findings"]) == 4
+
+
+def test_level_without_merges_keeps_partial_results(monkeypatch):
+    calls = []
+
+    def fake_call_llm(prompt_template, input_parameters, pydantic_object, llm=None):
+        calls.append(input_parameters["findings"].count("Title: "))
+        # Nothing is merged, every finding is returned as it is
+        return {
+            "findings": [
+                {"title": line[len("Title: ") :], "summary": "kept", "methodology": ""}
+                for line in input_parameters["findings"].splitlines()
+                if line.startswith("Title: ")
+            ]
+        }
+
+    monkeypatch.setattr(consolidation, "call_llm", fake_call_llm)
+    config = {"configurable": {"consolidation_group_size": GROUP_SIZE}}
+
+    state = findings_consolidator(create_state(25), config)
+
+    # One level of groups, no call over all the findings
+    assert calls == [9, 8, 8]
+    assert len(state["consolidated_findings"]) == 25
+
+
+def test_consolidated_ids_are_derived_from_content(monkeypatch):
+    patch_consolidation_llm(monkeypatch)
+    config = {"configurable": {"consolidation_group_size": GROUP_SIZE}}
+
+    first = findings_consolidator(create_state(4), config)["consolidated_findings"]
+    second = findings_consolidator(create_state(4), config)["consolidated_findings"]
+
+    assert [finding["id"] for finding in first] == [finding["id"] for finding in second]
+    assert len({finding["id"] for finding in first}) == len(first)
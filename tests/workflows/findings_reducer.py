@@ -0,0 +1,151 @@
+import pickle
+from copy import copy
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from packages.framework.retrievers.bm25_index import BM25Index
+from packages.workflows.paper_scanner.v0.agent.nodes.chunk.processing import (
+    select_relevant_findings,
+)
+from packages.workflows.paper_scanner.v0.agent.schemas.states import (
+    FindingsCollection,
+    merge_findings,
+)
+
+# HERE LIES A TEST SCRIPT FOR THE FINDINGS REDUCER AND THE FINDINGS COLLECTION
+# Run with: poetry run pytest -s tests/workflows/findings_reducer.py
+
+
+def create_finding(finding_id, chunk_id="chunk_0", **fields):
+    return {
+        "id": finding_id,
+        "title": f"Title {finding_id}",
+        "summary": f"Summary {finding_id}",
+        "methodology": f"Methodology {finding_id}",
+        "keywords": [f"keyword_{finding_id}"],
+        "source_chunks_ids": [chunk_id],
+        **fields,
+    }
+
+
+def test_merge_findings_upserts():
+    findings = merge_findings([], [create_finding("a"), create_finding("b")])
+    findings = merge_findings(
+        findings,
+        [
+            create_finding(
+                "a",
+                "chunk_1",
+                title="New title",
+                summary="",
+                methodology=None,
+                keywords=["keyword_a", "new_keyword"],
+            ),
+            create_finding("c"),
+        ],
+    )
+
+    assert isinstance(findings, FindingsCollection)
+    assert [finding["id"] for finding in findings] == ["a", "b", "c"]
+    # Empty values keep the existing ones, keywords and chunks keep their first-seen order
+    assert findings.get("a") == {
+        "id": "a",
+        "title": "New title",
+        "summary": "Summary a",
+        "methodology": "Methodology a",
+        "keywords": ["keyword_a", "new_keyword"],
+        "source_chunks_ids": ["chunk_0", "chunk_1"],
+    }
+    assert findings.get("d") is None
+
+    # New findings get a keywords field
+    finding = create_finding("d")
+    del finding["keywords"]
+    assert merge_findings(findings, [finding]).get("d")["keywords"] == []
+
+
+def test_merge_findings_keeps_existing_value():
+    existing = merge_findings([], [create_finding("a")])
+    existing_finding = existing.get("a")
+    new_finding = create_finding("a", "chunk_1", title="New title")
+
+    findings = merge_findings(existing, [new_finding, create_finding("b")])
+
+    # The channel value and its findings are not changed
+    assert findings is not existing
+    assert [finding["id"] for finding in existing] == ["a"]
+    assert existing.get("b") is None
+    assert existing_finding["title"] == "Title a"
+    assert existing_finding["source_chunks_ids"] == ["chunk_0"]
+    assert new_finding["source_chunks_ids"] == ["chunk_1"]
+    assert findings.get("a")["title"] == "New title"
+
+    # Nodes returning the whole state send the current findings back
+    assert merge_findings(findings, findings) is findings
+    assert [finding["id"] for finding in merge_findings(findings, list(findings))] == [
+        "a",
+        "b",
+    ]
+
+
+def test_versions_are_persistent():
+    first = FindingsCollection([create_finding("a")])
+    second = first.upserted([create_finding("a", "chunk_1", title="New title")])
+    third = second.upserted([create_finding("b"), create_finding("b", "chunk_1")])
+
+    # Every version reads its own findings, the records are shared between them
+    assert first == [create_finding("a")]
+    assert second.get("a")["title"] == "New title" and second.get("b") is None
+    assert [finding["id"] for finding in third] == ["a", "b"]
+    assert third.get("b")["source_chunks_ids"] == ["chunk_0", "chunk_1"]
+    assert third[-1] == third.get("b") and third[:1] == list(second)
+    assert copy(third) is third
+
+    # Findings read from a collection do not change it
+    third.get("a")["keywords"].append("changed")
+    assert third.get("a")["keywords"] == ["keyword_a"]
+
+    # Upserting into an older version branches off without changing the newer ones
+    branch = first.upserted([create_finding("c")])
+    assert [finding["id"] for finding in branch] == ["a", "c"]
+    assert branch.get("a")["title"] == "Title a"
+    assert [finding["id"] for finding in third] == ["a", "b"]
+    assert third.upserted([create_finding("d")]).get("c") is None
+
+
+def test_collection_round_trips_through_checkpoints():
+    findings = merge_findings([], [create_finding("a"), create_finding("b")])
+    serde = JsonPlusSerializer()
+
+    restored = serde.loads_typed(serde.dumps_typed(findings))
+
+    assert isinstance(restored, FindingsCollection)
+    assert restored == findings
+    assert pickle.loads(pickle.dumps(findings)) == findings
+
+
+def test_search_index_follows_the_upserts():
+    findings = FindingsCollection(
+        [
+            create_finding("a", summary="Residual networks"),
+            create_finding("b", summary="Batch normalization"),
+        ]
+    )
+    assert findings.rank("residual layers") == [0, 1]
+    index = findings._log.index
+
+    findings = findings.upserted(
+        [
+            create_finding("a", summary="Dropout regularization"),
+            create_finding("c", summary="Deep residual learning"),
+        ]
+    )
+
+    # The index is updated with the changed findings instead of being rebuilt
+    assert findings.rank("residual layers") == [2, 0, 1]
+    assert findings._log.index is index
+    texts = [f"{finding['title']} {finding['summary']}" for finding in findings]
+    assert index.scores("residual dropout") == BM25Index(texts).scores(
+        "residual dropout"
+    )
+    assert select_relevant_findings(findings, "dropout", top_k=1) == [findings[0]]
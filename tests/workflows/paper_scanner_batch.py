@@ -0,0 +1,99 @@
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+import asyncio
+import contextvars
+import logging
+import time
+
+from packages.workflows import paper_scanner_batch
+from packages.workflows.paper_scanner.v0 import batch
+from tests.utils.fake_call_llm import patch_call_llm
+
+# HERE LIES A TEST SCRIPT FOR THE BATCH RUNNER, IT RUNS OFFLINE WITH A FAKE LLM
+# Run with: poetry run pytest -s tests/workflows/paper_scanner_batch.py
+
+VERSION = "v0"
+MAX_PAPERS_IN_FLIGHT = 3
+MAX_LLM_CALLS_IN_FLIGHT = 4
+LLM_LATENCY = 0.02
+# One chunk per section, sections are not packed together
+OPTIONS = {"chunk_token_budget": 0}
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def create_markdown_paper(paper_index: int, num_sections: int):
+    return "\n\n".join(
+        f"# Section {i}\n\n" + f"Paper {paper_index} section {i}. " * 40
+        for i in range(num_sections)
+    )
+
+
+def test_paper_scanner_batch(monkeypatch):
+    _, fake_acall_llm = patch_call_llm(monkeypatch, latency=LLM_LATENCY)
+
+    # The first paper is the longest, so it should not come back first
+    sections_per_paper = [8, 1, 2, 1, 3, 1]
+    papers = (
+        create_markdown_paper(i, num_sections)
+        for i, num_sections in enumerate(sections_per_paper)
+    )
+
+    start = time.perf_counter()
+    results = list(
+        paper_scanner_batch[VERSION](
+            papers,
+            max_papers_in_flight=MAX_PAPERS_IN_FLIGHT,
+            max_llm_calls_in_flight=MAX_LLM_CALLS_IN_FLIGHT,
+            options=OPTIONS,
+        )
+    )
+    logger.info(f"Scanned {len(results)} papers in {time.perf_counter() - start:.2f}s")
+
+    assert sorted(r["index"] for r in results) == list(range(len(sections_per_paper)))
+    assert all(r["error"] is None for r in results)
+    assert results[0]["index"] != 0
+    assert 1 < fake_acall_llm.max_in_flight <= MAX_LLM_CALLS_IN_FLIGHT
+    for r in results:
+        assert len(r["result"]["findings"]) == sections_per_paper[r["index"]]
+
+
+def test_paper_tasks_are_isolated_and_awaited(monkeypatch):
+    paper_context = contextvars.ContextVar("paper_context", default=None)
+    cancelled = []
+
+    async def fake_scan_paper(index, paper, *args):
+        # A paper sees none of the context changes of the other papers
+        previous = paper_context.get()
+        paper_context.set(index)
+        try:
+            await asyncio.sleep(0.01 * (index + 1))
+        except asyncio.CancelledError:
+            cancelled.append(index)
+            raise
+        return {"index": index, "result": {"previous": previous}, "error": None}
+
+    monkeypatch.setattr(batch, "scan_paper", fake_scan_paper)
+
+    async def scan_first_papers():
+        results = []
+        papers = batch.arun_paper_scanner_batch_v0(
+            [""] * 6, max_papers_in_flight=MAX_PAPERS_IN_FLIGHT
+        )
+        async for result in papers:
+            results.append(result)
+            if len(results) == 3:
+                break
+        await papers.aclose()
+        # The papers still in flight are cancelled and awaited
+        assert asyncio.all_tasks() == {asyncio.current_task()}
+        return results
+
+    results = asyncio.run(scan_first_papers())
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert all(r["result"]["previous"] is None for r in results)
+    # The last paper is submitted with the third result, it is cancelled before it starts
+    assert sorted(cancelled) == [3, 4]
@@ -0,0 +1,55 @@
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+from uuid import UUID
+
+from packages.workflows import paper_scanner
+from tests.utils.fake_call_llm import patch_call_llm
+
+# HERE LIES A TEST SCRIPT FOR THE CONTENT-HASH CHUNK IDS AND PAPER FINGERPRINTS, IT RUNS OFFLINE WITH A FAKE LLM
+# Run with: poetry run pytest -s tests/workflows/paper_scanner_ids.py
+
+VERSION = "v0"
+# One chunk per section, sections are not packed together
+OPTIONS = {"chunk_token_budget": 0}
+
+
+def create_markdown_paper(spacing: str = " "):
+    sections = [
+        f"# Section {i}\n\n" + f"Experiment{spacing}{i} results. " * 40
+        for i in range(4)
+    ]
+    # A repeated section, e.g. a boilerplate paragraph
+    sections.append(sections[0])
+    return "\n\n".join(sections)
+
+
+def chunk_ids(result):
+    return [chunk["chunk_id"] for chunk in result["processed_chunks"]]
+
+
+def test_ids_are_stable_across_runs(monkeypatch):
+    patch_call_llm(monkeypatch, latency=0)
+
+    first = paper_scanner[VERSION](
+        markdown_paper=create_markdown_paper(), options=OPTIONS
+    )
+    # Same text with different whitespace, processed by the windowed agent
+    second = paper_scanner[VERSION](
+        markdown_paper=create_markdown_paper(spacing="  "),
+        window_size=2,
+        options=OPTIONS,
+    )
+    other = paper_scanner[VERSION](
+        markdown_paper=create_markdown_paper() + "\n\nMore.", options=OPTIONS
+    )
+
+    assert first["paper_fingerprint"] == second["paper_fingerprint"]
+    assert first["paper_fingerprint"] != other["paper_fingerprint"]
+    assert chunk_ids(first) == chunk_ids(second)
+
+    # Still uuid strings, repeated sections keep distinct ids
+    assert all(str(UUID(chunk_id)) == chunk_id for chunk_id in chunk_ids(first))
+    assert len(chunk_ids(first)) == 5
+    assert len(set(chunk_ids(first))) == len(chunk_ids(first))
@@ -0,0 +1,155 @@
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+import importlib
+import logging
+
+import pytest
+
+from packages.framework.stores.chunk_store import ChunkStore
+from packages.workflows import paper_scanner_resume
+from packages.workflows.paper_scanner.v0 import run_paper_scanner_v0
+from packages.workflows.paper_scanner.v0.agent.schemas.format_instructions import (
+    ChunkProcessorAnalysis,
+)
+from tests.utils.fake_call_llm import patch_call_llm
+
+# HERE LIES A TEST SCRIPT FOR CHECKPOINTED RUNS, A RUN FAILS MID-PAPER AND IS RESUMED OFFLINE WITH A FAKE LLM
+# Run with: poetry run pytest -s tests/workflows/paper_scanner_resume.py
+
+VERSION = "v0"
+NUM_SECTIONS = 10
+FAILING_CHUNK = 7
+# One chunk per section, sections are not packed together
+OPTIONS = {"chunk_token_budget": 0}
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def create_markdown_paper():
+    return "\n\n".join(
+        f"# Section {i}\n\n" + f"Content of section {i}. " * 40
+        for i in range(NUM_SECTIONS)
+    )
+
+
+@pytest.mark.parametrize("window_size", [None, 3])
+def test_resume_after_failure(monkeypatch, tmp_path, window_size):
+    fake_call_llm, _ = patch_call_llm(monkeypatch, latency=0)
+    processing = importlib.import_module(
+        "packages.workflows.paper_scanner.v0.agent.nodes.chunk.processing"
+    )
+
+    discovered_chunks = []
+
+    def failing_call_llm(prompt_template, input_parameters, pydantic_object, llm=None):
+        if pydantic_object is ChunkProcessorAnalysis:
+            if f"section {FAILING_CHUNK}." in input_parameters["text"]:
+                raise RuntimeError("LLM unavailable")
+            discovered_chunks.append(input_parameters["text"])
+        return fake_call_llm(prompt_template, input_parameters, pydantic_object)
+
+    monkeypatch.setattr(processing, "call_llm", failing_call_llm)
+    checkpoint_path = str(tmp_path / "checkpoints.sqlite")
+
+    with pytest.raises(RuntimeError):
+        run_paper_scanner_v0(
+            markdown_paper=create_markdown_paper(),
+            window_size=window_size,
+            run_id="run-1",
+            checkpoint_path=checkpoint_path,
+            options=OPTIONS,
+        )
+    discovered_before_failure = len(discovered_chunks)
+
+    # The LLM is back, resume the run
+    monkeypatch.setattr(processing, "call_llm", fake_call_llm)
+    discovered_chunks.clear()
+
+    def counting_call_llm(prompt_template, input_parameters, pydantic_object, llm=None):
+        if pydantic_object is ChunkProcessorAnalysis:
+            discovered_chunks.append(input_parameters["text"])
+        return fake_call_llm(prompt_template, input_parameters, pydantic_object)
+
+    monkeypatch.setattr(processing, "call_llm", counting_call_llm)
+    result = paper_scanner_resume[VERSION]("run-1", checkpoint_path=checkpoint_path)
+
+    logger.info(
+        f"discovered {discovered_before_failure} chunks before failing, {len(discovered_chunks)} on resume"
+    )
+    assert len(result["processed_chunks"]) == NUM_SECTIONS
+    assert len(result["findings"]) == NUM_SECTIONS
+    # Chunks completed before the failure are not discovered again
+    assert discovered_before_failure + len(discovered_chunks) <= NUM_SECTIONS + (
+        window_size or 1
+    )
+    assert len(discovered_chunks) < NUM_SECTIONS
+
+
+def test_resume_unknown_run(tmp_path):
+    with pytest.raises(ValueError):
+        paper_scanner_resume[VERSION](
+            "missing", checkpoint_path=str(tmp_path / "checkpoints.sqlite")
+        )
+
+
+def test_resume_with_chunk_store(monkeypatch, tmp_path):
+    fake_call_llm, _ = patch_call_llm(monkeypatch, latency=0)
+    processing = importlib.import_module(
+        "packages.workflows.paper_scanner.v0.agent.nodes.chunk.processing"
+    )
+
+    def failing_call_llm(prompt_template, input_parameters, pydantic_object, llm=None):
+        if pydantic_object is ChunkProcessorAnalysis:
+            if f"section {FAILING_CHUNK}." in input_parameters["text"]:
+                raise RuntimeError("LLM unavailable")
+        return fake_call_llm(prompt_template, input_parameters, pydantic_object)
+
+    monkeypatch.setattr(processing, "call_llm", failing_call_llm)
+    checkpoint_path = str(tmp_path / "checkpoints.sqlite")
+    spill_directory = str(tmp_path / "chunks")
+
+    # Texts are kept in memory by the store, the run still writes them for the resume
+    with pytest.raises(RuntimeError):
+        run_paper_scanner_v0(
+            markdown_paper=create_markdown_paper(),
+            run_id="run-1",
+            checkpoint_path=checkpoint_path,
+            options={**OPTIONS, "chunk_store": ChunkStore(spill_directory)},
+        )
+
+    monkeypatch.setattr(processing, "call_llm", fake_call_llm)
+    result = paper_scanner_resume[VERSION](
+        "run-1",
+        checkpoint_path=checkpoint_path,
+        chunk_store=ChunkStore(spill_directory),
+    )
+
+    assert len(result["processed_chunks"]) == NUM_SECTIONS
+    assert all(chunk["content"] for chunk in result["processed_chunks"])
+
+
+def test_checkpointed_run_builds_one_config(monkeypatch, tmp_path):
+    patch_call_llm(monkeypatch, latency=0)
+    v0 = importlib.import_module("packages.workflows.paper_scanner.v0")
+    configs = []
+    create_agent_config = v0.create_agent_config
+
+    def counting_create_agent_config(*args, **kwargs):
+        configs.append(create_agent_config(*args, **kwargs))
+        return configs[-1]
+
+    monkeypatch.setattr(v0, "create_agent_config", counting_create_agent_config)
+    result = run_paper_scanner_v0(
+        markdown_paper=create_markdown_paper(),
+        run_id="run-1",
+        checkpoint_path=str(tmp_path / "checkpoints.sqlite"),
+        options=OPTIONS,
+    )
+
+    # One profiler, the one of the checkpointed run
+    assert len(configs) == 1
+    assert configs[0]["configurable"]["thread_id"] == "run-1"
+    assert result["profile"]["nodes"]
@@ -0,0 +1,156 @@
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+import asyncio
+import importlib
+import logging
+import re
+import time
+
+from packages.workflows import paper_scanner_stream, paper_scanner_stream_async
+from packages.workflows.paper_scanner.v0.agent.schemas.format_instructions import (
+    ChunkProcessorAnalysis,
+)
+from packages.workflows.paper_scanner.v0.streaming import ScannerEventType
+from tests.utils.fake_call_llm import NODE_MODULES, create_fake_call_llm, patch_call_llm
+
+# HERE LIES A TEST SCRIPT FOR THE STREAMING RUNNERS, IT RUNS OFFLINE WITH A FAKE LLM
+# Run with: poetry run pytest -s tests/workflows/paper_scanner_stream.py
+
+VERSION = "v0"
+NUM_SECTIONS = 10
+LLM_LATENCY = 0.02
+# One chunk per section, sections are not packed together
+OPTIONS = {"chunk_token_budget": 0}
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def create_markdown_paper():
+    return "\n\n".join(
+        f"# Section {i}\n\n" + f"This section reports experiment {i}. " * 40
+        for i in range(NUM_SECTIONS)
+    )
+
+
+def check_events(events):
+    types = [event["type"] for event in events]
+
+    # Every chunk starts and finishes once, each one creates a finding with the fake LLM
+    started = [
+        e["chunk_id"] for e in events if e["type"] == ScannerEventType.CHUNK_STARTED
+    ]
+    finished = [
+        e["chunk_id"] for e in events if e["type"] == ScannerEventType.CHUNK_FINISHED
+    ]
+    assert len(started) == NUM_SECTIONS
+    assert sorted(started) == sorted(finished)
+    assert types.count(ScannerEventType.FINDING_CREATED) == NUM_SECTIONS
+
+    # Consolidation comes after every chunk, the result comes last
+    assert types[-2:] == [
+        ScannerEventType.CONSOLIDATION_DONE,
+        ScannerEventType.RUN_FINISHED,
+    ]
+    result = events[-1]["result"]
+    assert len(result["findings"]) == NUM_SECTIONS
+    assert len(result["processed_chunks"]) == NUM_SECTIONS
+
+
+def test_stream_paper_scanner(monkeypatch):
+    patch_call_llm(monkeypatch, latency=LLM_LATENCY)
+
+    for window_size in [None, 4]:
+        start = time.perf_counter()
+        events, first_finding_time = [], None
+        for event in paper_scanner_stream[VERSION](
+            markdown_paper=create_markdown_paper(),
+            window_size=window_size,
+            options=OPTIONS,
+        ):
+            if (
+                first_finding_time is None
+                and event["type"] == ScannerEventType.FINDING_CREATED
+            ):
+                first_finding_time = time.perf_counter() - start
+            events.append(event)
+        total_time = time.perf_counter() - start
+
+        logger.info(
+            f"window_size={window_size}: first finding after {first_finding_time:.2f}s, "
+            f"run finished after {total_time:.2f}s"
+        )
+        check_events(events)
+        # Findings arrive while the rest of the paper is still processed
+        assert first_finding_time < total_time / 2
+
+
+def test_astream_paper_scanner(monkeypatch):
+    patch_call_llm(monkeypatch, latency=LLM_LATENCY)
+
+    async def collect_events():
+        return [
+            event
+            async for event in paper_scanner_stream_async[VERSION](
+                markdown_paper=create_markdown_paper(),
+                window_size=4,
+                options=OPTIONS,
+            )
+        ]
+
+    check_events(asyncio.run(collect_events()))
+
+
+def patch_discovery(monkeypatch):
+    # Every chunk discovers two findings and updates the first existing one, so that the
+    # finding changes of a chunk go through the batch processor
+    fake_call_llm = create_fake_call_llm(LLM_LATENCY)
+
+    def call_llm(prompt_template, input_parameters, pydantic_object, llm=None):
+        output = fake_call_llm(prompt_template, input_parameters, pydantic_object)
+        if pydantic_object is ChunkProcessorAnalysis:
+            section = re.search(r"# Section (\d+)", input_parameters["text"]).group(1)
+            existing_ids = re.findall(
+                r"Id: (\S+)", input_parameters["existing_findings"]
+            )
+            output["findings"]["new_findings"] = [
+                {"title": f"Finding {section}.{i}", "description": "fake finding"}
+                for i in range(2)
+            ]
+            output["findings"]["findings_updates"] = [
+                {"id": finding_id, "what_to_update": "Add the new results"}
+                for finding_id in existing_ids[:1]
+            ]
+        return output
+
+    for module in NODE_MODULES:
+        monkeypatch.setattr(importlib.import_module(module), "call_llm", call_llm)
+
+
+def test_stream_batched_finding_changes(monkeypatch):
+    patch_discovery(monkeypatch)
+
+    for options in [OPTIONS, {**OPTIONS, "batch_finding_changes": True}]:
+        events = list(
+            paper_scanner_stream[VERSION](
+                markdown_paper=create_markdown_paper(), options=options
+            )
+        )
+        created = [
+            event["finding"]["id"]
+            for event in events
+            if event["type"] == ScannerEventType.FINDING_CREATED
+        ]
+        updated = [
+            event["finding"]["id"]
+            for event in events
+            if event["type"] == ScannerEventType.FINDING_UPDATED
+        ]
+        # With or without batching, every finding is created once then updated
+        result = events[-1]["result"]
+        assert len(created) == len(set(created)) == len(result["findings"])
+        assert len(created) == 2 * NUM_SECTIONS
+        assert len(updated) == NUM_SECTIONS - 1
+        assert set(updated) <= set(created)
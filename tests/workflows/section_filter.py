@@ -0,0 +1,166 @@
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+import pytest
+
+from packages.workflows import paper_scanner
+from packages.workflows.paper_scanner.v0.agent.schemas.format_instructions import (
+    ChunkProcessorAnalysis,
+)
+from packages.workflows.paper_scanner.v0.agent.schemas.states import ChunkStatus
+from packages.workflows.paper_scanner.v0.utils.section_filter import (
+    classify_section,
+    filter_sections,
+)
+from tests.utils import fake_call_llm
+
+# HERE LIES A TEST SCRIPT FOR THE LOW-VALUE SECTION FILTER, THE GRAPH RUN IS OFFLINE WITH A FAKE LLM
+# Run with: poetry run pytest -s tests/workflows/section_filter.py
+
+VERSION = "v0"
+# One chunk per section, sections are not packed together
+OPTIONS = {"chunk_token_budget": 0}
+
+RESULTS = "## 4 Results\n\n" + "The model reduces the error by half. " * 30
+REFERENCES = "## References\n\n" + "\n".join(
+    f"- [{i}] A. Author. A paper title. In Proceedings of a conference, 2015."
+    for i in range(20)
+)
+ACKNOWLEDGMENTS = "## Acknowledgments\n\nWe thank the reviewers for their comments."
+RELATED_WORK = "## 2 Related Work\n\nDeep networks were studied before:\n" + "\n".join(
+    f"- Smith, J. A., Doe, B. Network number {i}. arXiv:1512.{i:05d}"
+    for i in range(6)
+)
+TABLES = "## Appendix A\n\n" + "\n".join(
+    ["| Layer | Error |", "|---|---|"] + [f"| {i} | 0.{i} |" for i in range(8)]
+)
+
+
+def test_classify_sections():
+    assert classify_section(RESULTS)["label"] == "content"
+    assert classify_section(REFERENCES)["reason"] == "header"
+    assert classify_section(ACKNOWLEDGMENTS)["reason"] == "header"
+    assert classify_section("### VII. Bibliography\n\nEntries.")["reason"] == "header"
+    assert classify_section(RELATED_WORK)["reason"] == "citations"
+    assert classify_section(TABLES)["reason"] == "tables"
+
+    # Inline citations of prose and short sections are still content
+    prose = "## 1 Introduction\n\n" + "As shown by Smith et al. (2019), it works.\n" * 5
+    assert classify_section(prose)["label"] == "content"
+    contributions = "## 1 Introduction\n\nOur contributions are:\n" + "\n".join(
+        f"({i}) We introduce a residual block number {i}." for i in range(1, 5)
+    )
+    assert classify_section(contributions)["label"] == "content"
+    background = "## 2 Background\n\n" + "\n".join(
+        f"Vaswani, A. et al. introduced attention layer {i} in their work."
+        for i in range(4)
+    )
+    assert classify_section(background)["label"] == "content"
+    author_references = "## Sources\n\n" + "\n".join(
+        f"Smith, J. A. ({2000 + i}). Networks number {i}. Journal of networks."
+        for i in range(4)
+    )
+    assert classify_section(author_references)["reason"] == "citations"
+    assert classify_section("## Table 1\n\n| a | b |")["label"] == "content"
+
+    # Tables outside of the appendices are results, they are kept
+    results_table = "## 4 Results\n\nThe model halves the error.\n\n" + "\n".join(
+        ["| Model | Error |", "|---|---|"] + [f"| {i} | 0.{i} |" for i in range(5)]
+    )
+    assert classify_section(results_table)["label"] == "content"
+    assert filter_sections([results_table]) == ([results_table], [])
+    supplementary = TABLES.replace("## Appendix A", "## B.2 Hyperparameters")
+    assert classify_section(supplementary)["reason"] == "tables"
+
+    # Thresholds come from the configuration
+    assert classify_section(TABLES, max_table_density=1.0)["label"] == "content"
+
+
+def test_filter_sections():
+    sections = [RESULTS, RELATED_WORK, TABLES, ACKNOWLEDGMENTS, REFERENCES]
+
+    kept, skipped = filter_sections(sections, action="skip")
+    assert kept == [RESULTS]
+    assert skipped == sections[1:]
+
+    # Downsized sections keep their header and prose, header-based and prose-less ones are skipped
+    kept, skipped = filter_sections(sections, action="downsize")
+    assert kept == [RESULTS, "## 2 Related Work\nDeep networks were studied before:"]
+    assert skipped == [TABLES, ACKNOWLEDGMENTS, REFERENCES]
+
+    assert filter_sections(sections, action="keep") == (sections, [])
+
+    # The following chunks of a split References section are skipped with it
+    references_end = "\n".join(REFERENCES.split("\n")[12:])
+    results_end = "The error is halved on every dataset."
+    sections = [RESULTS, results_end, REFERENCES, references_end, RESULTS]
+    kept, skipped = filter_sections(sections, action="skip")
+    assert kept == [RESULTS, results_end, RESULTS]
+    assert skipped == [REFERENCES, references_end]
+
+
+def test_low_value_sections_are_skipped(monkeypatch):
+    # Record the texts sent to the discovery prompt
+    discovered_texts = []
+    create_fake_output = fake_call_llm.create_fake_output
+
+    def recording_fake_output(input_parameters, pydantic_object):
+        if pydantic_object is ChunkProcessorAnalysis:
+            discovered_texts.append(input_parameters["text"])
+        return create_fake_output(input_parameters, pydantic_object)
+
+    monkeypatch.setattr(fake_call_llm, "create_fake_output", recording_fake_output)
+    fake_call_llm.patch_call_llm(monkeypatch, latency=0)
+
+    paper = "\n\n".join(["# A Paper", RESULTS, ACKNOWLEDGMENTS, REFERENCES])
+    # Nothing is skipped unless asked
+    result = paper_scanner[VERSION](markdown_paper=paper, options=OPTIONS)
+    assert all(
+        chunk["status"] == ChunkStatus.PROCESSED for chunk in result["processed_chunks"]
+    )
+    discovered_texts.clear()
+
+    result = paper_scanner[VERSION](
+        markdown_paper=paper, options={**OPTIONS, "low_value_sections": "skip"}
+    )
+
+    statuses = {
+        chunk["content"].split("\n", 1)[0]: chunk["status"]
+        for chunk in result["processed_chunks"]
+    }
+    assert statuses["## Acknowledgments"] == ChunkStatus.SKIPPED
+    assert statuses["## References"] == ChunkStatus.SKIPPED
+    assert statuses["# A Paper"] == ChunkStatus.PROCESSED
+
+    assert len(discovered_texts) == 1
+    assert "References" not in discovered_texts[0]
+    assert "Acknowledgments" not in discovered_texts[0]
+    assert len(result["findings"]) == 1
+
+
+@pytest.mark.parametrize("window_size", [None, 2])
+def test_skipped_sections_keep_their_place(monkeypatch, window_size):
+    fake_call_llm.patch_call_llm(monkeypatch, latency=0)
+    discussion = RESULTS.replace("## 4 Results", "## 5 Discussion")
+    paper = "\n\n".join(
+        [ACKNOWLEDGMENTS, RESULTS, REFERENCES, discussion, ACKNOWLEDGMENTS]
+    )
+
+    result = paper_scanner[VERSION](
+        markdown_paper=paper,
+        window_size=window_size,
+        options={**OPTIONS, "low_value_sections": "skip"},
+    )
+
+    # Processed chunks are stored in paper order
+    assert [
+        (chunk["content"].split("\n", 1)[0], chunk["status"])
+        for chunk in result["processed_chunks"]
+    ] == [
+        ("## Acknowledgments", ChunkStatus.SKIPPED),
+        ("## 4 Results", ChunkStatus.PROCESSED),
+        ("## References", ChunkStatus.SKIPPED),
+        ("## 5 Discussion", ChunkStatus.PROCESSED),
+        ("## Acknowledgments", ChunkStatus.SKIPPED),
+    ]